@@ -0,0 +1,358 @@
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+BENCHMARKS_DIRECTORY = Path(__file__).resolve().parent
+PYCASTER_DIRECTORY = BENCHMARKS_DIRECTORY.parent / 'pycaster'
+PYCASTER_SCRIPT = PYCASTER_DIRECTORY / 'pycaster.py'
+
+# The modules of pycaster import each other by their bare names
+sys.path.insert(0, str(PYCASTER_DIRECTORY))
+
+from catalog import SyntheticCatalog  # noqa: E402
+from database import Episode  # noqa: E402
+from manifest import ManifestEntry  # noqa: E402
+from pycaster import Pycaster  # noqa: E402
+from s3_stand_in import S3StandIn  # noqa: E402
+
+
+class PeakMemory:
+    PROC_STATUS_PATH = '/proc/self/status'
+    PROC_CLEAR_REFS_PATH = '/proc/self/clear_refs'
+    PEAK_RSS_FIELD = 'VmHWM:'
+    RESET_PEAK_RSS_COMMAND = '5'
+
+    def reset(self):
+        # Linux allows resetting the peak resident set size, elsewhere the peak of the whole process is reported
+        with contextlib.suppress(OSError):
+            with open(self.PROC_CLEAR_REFS_PATH, 'w') as clear_refs:
+                clear_refs.write(self.RESET_PEAK_RSS_COMMAND)
+
+    def read(self):
+        try:
+            with open(self.PROC_STATUS_PATH) as status:
+                for line in status:
+                    if line.startswith(self.PEAK_RSS_FIELD):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+
+        import resource
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Reported in kilobytes on Linux, but in bytes on macOS
+        return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+class CommandRun:
+    """
+    Runs a command in a fresh interpreter, as the import time is only paid once per process.
+    """
+    IMPORT_TIME_PREFIX = 'import time:'
+    # Dependencies that commands which neither touch the bucket nor the feed are expected not to load
+    HEAVY_MODULES = ('boto3', 'botocore', 'eyed3', 'feedgen', 'lxml', 'pytz', 'requests')
+
+    def __init__(self, arguments, working_directory):
+        self.arguments = arguments
+        self.working_directory = working_directory
+        # Lets the modules of pycaster be imported by their bare names from any working directory
+        self.environment = {**os.environ, 'PYTHONPATH': str(PYCASTER_DIRECTORY)}
+
+    def measure(self):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *self.arguments],
+            cwd=str(self.working_directory),
+            env=self.environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        return time.perf_counter() - started
+
+    def measure_imports(self):
+        # Measured in a separate run, as tracing the imports slows the command down
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', *self.arguments],
+            cwd=str(self.working_directory),
+            env=self.environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+
+        import_microseconds = 0
+        modules = set()
+
+        for line in completed.stderr.decode('utf-8').splitlines():
+            if line.startswith(self.IMPORT_TIME_PREFIX):
+                self_microseconds, _, module = line[len(self.IMPORT_TIME_PREFIX):].split('|')
+                # Skips the header line
+                if self_microseconds.strip().isdigit():
+                    import_microseconds += int(self_microseconds)
+                    modules.add(module.strip().split('.')[0])
+
+        return import_microseconds / 1000000, sorted(modules.intersection(self.HEAVY_MODULES))
+
+
+class Benchmark:
+    BUCKET = 'benchmark'
+    EPISODE_PATH = 'podcast/episodes'
+    FEED_PATH = 'podcast'
+    DATABASE_PATH = 'podcast/pycaster'
+    LOGO_PATH = 'podcast/logo'
+    LOGO = b'\xff\xd8\xff\xe0' + bytes(16 * 1024)
+    JPEG_MIME_TYPE = 'image/jpeg'
+    BYTES_PER_MEGABYTE = 1024 * 1024
+    LISTED_EPISODES = 20
+
+    def __init__(self, stand_in, working_directory, catalog_size, episode_sizes, feed_page_size, revision):
+        self.stand_in = stand_in
+        self.working_directory = working_directory
+        self.catalog_size = catalog_size
+        self.episode_sizes = episode_sizes
+        self.feed_page_size = feed_page_size
+        self.revision = revision
+        self.peak_memory = PeakMemory()
+        self.catalog = SyntheticCatalog()
+
+    def run(self):
+        self.stand_in.create_bucket(self.BUCKET)
+        self.stand_in.put_object(self.BUCKET, self.LOGO_PATH, self.LOGO, self.JPEG_MIME_TYPE)
+
+        # Pycaster resolves its configuration, database and caches relative to the parent of the working directory
+        run_directory = self.working_directory / f'catalog-{self.catalog_size}'
+        (run_directory / 'work').mkdir(parents=True)
+        self._write_config(run_directory / 'config.json')
+
+        previous_directory = os.getcwd()
+        os.chdir(str(run_directory / 'work'))
+
+        try:
+            yield from self._measure_command('import', ['-c', 'import pycaster'], run_directory / 'work')
+
+            pycaster = yield from self._measure('startup', lambda: Pycaster(republish=True))
+
+            yield from self._measure('seed_database', lambda: self._seed_database(pycaster))
+            yield from self._measure('database_read', lambda: sum(1 for _ in pycaster.db.iterate_episodes()))
+            yield from self._measure_command(
+                'list_command',
+                [str(PYCASTER_SCRIPT), 'list', '--limit', str(self.LISTED_EPISODES)],
+                run_directory / 'work',
+            )
+            yield from self._measure('feed_render_cold', lambda: self._render_feed(pycaster))
+            yield from self._measure('feed_render_warm', lambda: self._render_feed(pycaster))
+
+            for episode_size in self.episode_sizes:
+                entry = self._create_episode_file(run_directory, episode_size)
+                yield from self._measure(
+                    'publish',
+                    lambda: pycaster._publish_episodes([entry]),
+                    episode_size_bytes=episode_size * self.BYTES_PER_MEGABYTE,
+                )
+
+            yield from self._measure(
+                'republish',
+                lambda: pycaster._upload_publication(pycaster._prepare_publication(entries=[], media_files=[])),
+            )
+        finally:
+            os.chdir(previous_directory)
+
+    def _measure(self, stage, function, **details):
+        self.stand_in.take_counters()
+        self.peak_memory.reset()
+
+        started = time.perf_counter()
+        # Progress output of pycaster is moved out of the way of the machine-readable results
+        with contextlib.redirect_stdout(sys.stderr):
+            result = function()
+        wall_seconds = time.perf_counter() - started
+
+        counters = self.stand_in.take_counters()
+
+        yield {
+            'revision': self.revision,
+            'catalog_size': self.catalog_size,
+            'stage': stage,
+            'wall_seconds': round(wall_seconds, 6),
+            'peak_rss_bytes': self.peak_memory.read(),
+            'uploaded_bytes': counters['received_bytes'],
+            'downloaded_bytes': counters['sent_bytes'],
+            'requests': counters['requests'],
+            **details,
+        }
+
+        return result
+
+    def _measure_command(self, stage, arguments, working_directory):
+        command_run = CommandRun(arguments, working_directory)
+
+        self.stand_in.take_counters()
+        wall_seconds = command_run.measure()
+        counters = self.stand_in.take_counters()
+
+        import_seconds, heavy_modules = command_run.measure_imports()
+        self.stand_in.take_counters()
+
+        yield {
+            'revision': self.revision,
+            'catalog_size': self.catalog_size,
+            'stage': stage,
+            'wall_seconds': round(wall_seconds, 6),
+            # A forked child starts out with the peak RSS of the benchmark itself, hence it is not comparable
+            'peak_rss_bytes': None,
+            'uploaded_bytes': counters['received_bytes'],
+            'downloaded_bytes': counters['sent_bytes'],
+            'requests': counters['requests'],
+            'import_seconds': round(import_seconds, 6),
+            'heavy_modules': heavy_modules,
+        }
+
+    def _seed_database(self, pycaster):
+        pycaster.db.insert_new_episodes(
+            self.catalog.build_episodes(Episode, self.catalog_size, f'{self.stand_in.endpoint_url}/{self.BUCKET}'),
+        )
+
+    def _render_feed(self, pycaster):
+        _, feed_files = pycaster._prepare_feed()
+        feed_size = 0
+
+        for feed_file in feed_files.values():
+            with feed_file:
+                feed_size += feed_file.seek(0, os.SEEK_END)
+
+        return feed_size
+
+    def _create_episode_file(self, run_directory, episode_size):
+        file_location = run_directory / f'new-episode-{episode_size}mb.mp3'
+        SyntheticCatalog.write_mp3(file_location, episode_size * self.BYTES_PER_MEGABYTE)
+
+        return ManifestEntry(
+            title=f'New episode of {episode_size} MB',
+            description=self.catalog.build_description(),
+            duration=None,
+            file_location=str(file_location),
+            file_uri=f'{self.stand_in.endpoint_url}/{self.BUCKET}/{self.EPISODE_PATH}/{file_location.name}',
+            is_explicit='no',
+        )
+
+    def _write_config(self, config_path):
+        config = {
+            'hosting': {
+                'accessKey': 'benchmark',
+                'secret': 'benchmark',
+                'bucketName': self.BUCKET,
+                'endpointUrl': self.stand_in.endpoint_url,
+                'regionName': 'us-east-1',
+                'databasePath': self.DATABASE_PATH,
+                'episodePath': self.EPISODE_PATH,
+                'feedPath': self.FEED_PATH,
+                'feedPageSize': self.feed_page_size,
+            },
+            'podcast': {
+                'author': 'Benchmark',
+                'category': 'Technology',
+                'description': 'A synthetic podcast to benchmark pycaster with',
+                'email': 'benchmark@example.com',
+                'explicit': 'no',
+                'language': 'en',
+                'logoUri': f'{self.stand_in.endpoint_url}/{self.BUCKET}/{self.LOGO_PATH}',
+                'name': 'Benchmark',
+                'subtitle': 'Synthetic',
+                'website': 'https://example.com',
+            },
+        }
+
+        with open(str(config_path), 'w') as config_file:
+            json.dump(config, config_file)
+
+
+def read_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=str(BENCHMARKS_DIRECTORY),
+            stderr=subprocess.DEVNULL,
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(baseline):
+    results = {}
+
+    for line in baseline:
+        if line.strip():
+            result = json.loads(line)
+            results[(result['catalog_size'], result['stage'], result.get('episode_size_bytes'))] = result
+
+    return results
+
+
+def compare_with_baseline(result, baseline_results):
+    baseline = baseline_results.get((result['catalog_size'], result['stage'], result.get('episode_size_bytes')))
+
+    if baseline is None or not baseline['wall_seconds']:
+        return
+
+    change = (result['wall_seconds'] / baseline['wall_seconds'] - 1) * 100
+    print(
+        f"{result['catalog_size']:>7} {result['stage']:<17} "
+        f"{baseline['wall_seconds']:>10.3f}s -> {result['wall_seconds']:>10.3f}s ({change:+.1f}%)",
+        file=sys.stderr,
+    )
+
+
+def parse_sizes(context, parameter, value):
+    try:
+        return [int(size) for size in value.split(',') if size]
+    except ValueError:
+        raise click.BadParameter('has to be a comma separated list of integers')
+
+
+@click.command()
+@click.option('--catalog-sizes', default='100,10000,100000', callback=parse_sizes,
+              help='Comma separated numbers of episodes already in the catalog')
+@click.option('--episode-sizes', default='1,16', callback=parse_sizes,
+              help='Comma separated sizes in megabytes of the episodes that are published')
+@click.option('--feed-page-size', default=None, type=int, help='Benchmarks a paged feed of this size instead')
+@click.option('--output', type=click.File('w'), default='-', help='File the results are written to as JSON lines')
+@click.option('--baseline', type=click.File('r'), default=None, help='Results of a previous run to compare with')
+def main(catalog_sizes, episode_sizes, feed_page_size, output, baseline):
+    revision = read_revision()
+    baseline_results = load_baseline(baseline) if baseline else {}
+
+    print(f'Benchmarking revision {revision} on Python {platform.python_version()}', file=sys.stderr)
+
+    for catalog_size in catalog_sizes:
+        # Every catalog gets its own bucket, database and caches, so that no run warms up the next one
+        stand_in = S3StandIn().start()
+
+        try:
+            with tempfile.TemporaryDirectory(prefix='pycaster-benchmark-') as working_directory:
+                benchmark = Benchmark(
+                    stand_in=stand_in,
+                    working_directory=Path(working_directory),
+                    catalog_size=catalog_size,
+                    episode_sizes=episode_sizes,
+                    feed_page_size=feed_page_size,
+                    revision=revision,
+                )
+
+                for result in benchmark.run():
+                    output.write(json.dumps(result, sort_keys=True) + '\n')
+                    output.flush()
+                    compare_with_baseline(result, baseline_results)
+        finally:
+            stand_in.stop()
+
+
+if __name__ == '__main__':
+    main()
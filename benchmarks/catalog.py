@@ -0,0 +1,59 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+
+class SyntheticCatalog:
+    """
+    Generates reproducible episodes with HTML show notes and MP3 files made of valid MPEG frames.
+    """
+    MP3_MIME_TYPE = 'audio/mpeg'
+    # MPEG 1 Layer III, 128 kbit/s, 44.1 kHz, without padding, hence every frame is 417 bytes long
+    MP3_FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x64])
+    MP3_FRAME_SIZE = 417
+    FIRST_PUBLISHED = datetime(2015, 1, 5, 6, 0, tzinfo=timezone.utc)
+    WORDS = (
+        'podcast', 'episode', 'interview', 'software', 'python', 'latency', 'storage', 'feed', 'listener',
+        'question', 'release', 'music', 'history', 'science', 'remote', 'design', 'community', 'guest',
+        'news', 'deep', 'dive', 'weekly', 'recap', 'future', 'open', 'source', 'bucket', 'cloud', 'story',
+    )
+
+    def __init__(self, seed=5005):
+        self.random = random.Random(seed)
+
+    def build_episodes(self, episode_class, count, file_uri_prefix):
+        for index in range(count):
+            yield episode_class(
+                title=f'#{index + 1}: {self._build_sentence(4, 9)}',
+                description=self.build_description(),
+                duration=self.random.randint(15 * 60, 3 * 60 * 60),
+                file_uri=f'{file_uri_prefix}/episode-{index + 1}.mp3',
+                file_type=self.MP3_MIME_TYPE,
+                file_size=self.random.randint(10, 200) * 1024 * 1024,
+                is_explicit=self.random.random() < 0.1,
+                published=self.FIRST_PUBLISHED + timedelta(days=7 * index),
+            )
+
+    def build_description(self):
+        paragraphs = [f'<p>{self._build_sentence(12, 40)}</p>' for _ in range(self.random.randint(1, 4))]
+        links = ''.join(
+            f'<li><a href="https://example.com/{self.random.choice(self.WORDS)}?id={self.random.randint(1, 999)}">'
+            f'{self._build_sentence(2, 5)}</a></li>'
+            for _ in range(self.random.randint(0, 6))
+        )
+
+        if links:
+            paragraphs.append(f'<h3>Links &amp; resources</h3><ul>{links}</ul>')
+
+        return ''.join(paragraphs)
+
+    def _build_sentence(self, minimum_words, maximum_words):
+        words = self.random.choices(self.WORDS, k=self.random.randint(minimum_words, maximum_words))
+        return ' '.join(words).capitalize()
+
+    @classmethod
+    def write_mp3(cls, path, size):
+        frame_count = max(1, size // cls.MP3_FRAME_SIZE)
+
+        with open(str(path), 'wb') as file:
+            for index in range(frame_count):
+                file.write(cls.MP3_FRAME_HEADER + bytes([index % 256]) * (cls.MP3_FRAME_SIZE - 4))
@@ -0,0 +1,289 @@
+import hashlib
+import threading
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+
+class StoredObject:
+    def __init__(self, data, headers):
+        self.data = data
+        self.headers = headers
+        self.etag = f'"{hashlib.md5(data).hexdigest()}"'
+        self.last_modified = formatdate(usegmt=True)
+
+
+class S3StandIn:
+    """
+    An in-process, in-memory server that speaks just enough of the S3 REST API for boto3 and pycaster:
+    objects, conditional requests, copies, batch deletes, paginated listings and multipart uploads.
+    """
+    HOST = '127.0.0.1'
+    LIST_PAGE_SIZE = 1000
+    STORED_HEADERS = ('content-type', 'content-encoding', 'cache-control', 'x-amz-acl')
+    METADATA_HEADER_PREFIX = 'x-amz-meta-'
+
+    def __init__(self):
+        self.buckets = {}
+        self.multipart_uploads = {}
+        self.received_bytes = 0
+        self.sent_bytes = 0
+        self.request_counts = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((self.HOST, 0), self._build_handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def endpoint_url(self):
+        return f'http://{self.HOST}:{self.server.server_address[1]}'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def create_bucket(self, bucket):
+        self.buckets.setdefault(bucket, {})
+
+    def put_object(self, bucket, key, data, content_type):
+        self.buckets[bucket][key] = StoredObject(data, {'content-type': content_type})
+
+    def take_counters(self):
+        # Returns the traffic since the previous call, so that every benchmark stage is measured on its own
+        with self.lock:
+            counters = {
+                'received_bytes': self.received_bytes,
+                'sent_bytes': self.sent_bytes,
+                'requests': dict(self.request_counts),
+            }
+            self.received_bytes = 0
+            self.sent_bytes = 0
+            self.request_counts = {}
+
+        return counters
+
+    def _count(self, operation, received_bytes, sent_bytes):
+        with self.lock:
+            self.received_bytes += received_bytes
+            self.sent_bytes += sent_bytes
+            self.request_counts[operation] = self.request_counts.get(operation, 0) + 1
+
+    def _build_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                stand_in._handle(self, 'HEAD')
+
+            def do_GET(self):
+                stand_in._handle(self, 'GET')
+
+            def do_PUT(self):
+                stand_in._handle(self, 'PUT')
+
+            def do_POST(self):
+                stand_in._handle(self, 'POST')
+
+            def do_DELETE(self):
+                stand_in._handle(self, 'DELETE')
+
+        return Handler
+
+    def _handle(self, request, method):
+        url = urlsplit(request.path)
+        query = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        bucket, _, key = unquote(url.path).lstrip('/').partition('/')
+        body = request.rfile.read(int(request.headers.get('Content-Length') or 0))
+
+        if bucket not in self.buckets:
+            operation, response = 'unknown', self._error(404, 'NoSuchBucket')
+        elif not key:
+            operation, response = self._handle_bucket(method, bucket, query, body)
+        elif 'uploads' in query or 'uploadId' in query:
+            operation, response = self._handle_multipart(method, bucket, key, query, request.headers, body)
+        else:
+            operation, response = self._handle_object(method, bucket, key, request.headers, body)
+
+        status, headers, response_body = response
+        # Counted before the response is sent, so that the counters include every request the client saw completed
+        self._count(operation, len(body), 0 if method == 'HEAD' else len(response_body))
+
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', str(len(response_body)))
+        request.end_headers()
+
+        if method != 'HEAD':
+            request.wfile.write(response_body)
+
+    def _handle_bucket(self, method, bucket, query, body):
+        if method == 'GET' and query.get('list-type') == '2':
+            return 'list_objects_v2', self._list_objects(bucket, query)
+        if method == 'POST' and 'delete' in query:
+            return 'delete_objects', self._delete_objects(bucket, body)
+        return 'unknown', self._error(400, 'NotImplemented')
+
+    def _handle_object(self, method, bucket, key, headers, body):
+        objects = self.buckets[bucket]
+
+        if method == 'PUT' and 'x-amz-copy-source' in headers:
+            return 'copy_object', self._copy_object(bucket, key, headers)
+
+        if method == 'PUT':
+            objects[key] = StoredObject(body, self._extract_stored_headers(headers))
+            return 'put_object', (200, {'ETag': objects[key].etag}, b'')
+
+        if method == 'DELETE':
+            objects.pop(key, None)
+            return 'delete_object', (204, {}, b'')
+
+        stored_object = objects.get(key)
+        operation = 'head_object' if method == 'HEAD' else 'get_object'
+
+        if stored_object is None:
+            return operation, self._error(404, 'NoSuchKey')
+
+        response_headers = {
+            'ETag': stored_object.etag,
+            'Last-Modified': stored_object.last_modified,
+            **{
+                name: value for name, value in stored_object.headers.items()
+                if name != 'x-amz-acl'
+            },
+        }
+
+        if headers.get('If-None-Match') == stored_object.etag:
+            return operation, (304, response_headers, b'')
+
+        return operation, (200, response_headers, stored_object.data)
+
+    def _handle_multipart(self, method, bucket, key, query, headers, body):
+        if method == 'POST' and 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            self.multipart_uploads[upload_id] = {'headers': self._extract_stored_headers(headers), 'parts': {}}
+            return 'create_multipart_upload', self._xml(
+                'InitiateMultipartUploadResult',
+                f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>',
+            )
+
+        multipart_upload = self.multipart_uploads.get(query['uploadId'])
+        if multipart_upload is None:
+            return 'multipart_upload', self._error(404, 'NoSuchUpload')
+
+        if method == 'PUT':
+            part = StoredObject(body, {})
+            multipart_upload['parts'][int(query['partNumber'])] = part
+            return 'upload_part', (200, {'ETag': part.etag}, b'')
+
+        if method == 'GET':
+            parts = ''.join(
+                f'<Part><PartNumber>{number}</PartNumber><ETag>{escape(part.etag)}</ETag>'
+                f'<Size>{len(part.data)}</Size></Part>'
+                for number, part in sorted(multipart_upload['parts'].items())
+            )
+            return 'list_parts', self._xml('ListPartsResult', f'{parts}<IsTruncated>false</IsTruncated>')
+
+        if method == 'DELETE':
+            del self.multipart_uploads[query['uploadId']]
+            return 'abort_multipart_upload', (204, {}, b'')
+
+        part_numbers = [
+            int(element.text) for element in ElementTree.fromstring(body).iter()
+            if element.tag.endswith('PartNumber')
+        ]
+        parts = [multipart_upload['parts'][number] for number in part_numbers]
+
+        stored_object = StoredObject(b''.join(part.data for part in parts), multipart_upload['headers'])
+        # Just like S3, the ETag of a multipart upload is the hash of the part hashes followed by the part count
+        part_hashes = b''.join(bytes.fromhex(part.etag.strip('"')) for part in parts)
+        stored_object.etag = f'"{hashlib.md5(part_hashes).hexdigest()}-{len(parts)}"'
+
+        self.buckets[bucket][key] = stored_object
+        del self.multipart_uploads[query['uploadId']]
+
+        return 'complete_multipart_upload', self._xml(
+            'CompleteMultipartUploadResult',
+            f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><ETag>{escape(stored_object.etag)}</ETag>',
+        )
+
+    def _list_objects(self, bucket, query):
+        prefix = query.get('prefix', '')
+        max_keys = min(int(query.get('max-keys') or self.LIST_PAGE_SIZE), self.LIST_PAGE_SIZE)
+        start_after = query.get('continuation-token') or query.get('start-after') or ''
+        url_encoded = query.get('encoding-type') == 'url'
+
+        keys = sorted(key for key in self.buckets[bucket] if key.startswith(prefix) and key > start_after)
+        page, is_truncated = keys[:max_keys], len(keys) > max_keys
+
+        contents = ''.join(
+            f'<Contents><Key>{escape(quote(key) if url_encoded else key)}</Key>'
+            f'<LastModified>2020-01-01T00:00:00.000Z</LastModified>'
+            f'<ETag>{escape(self.buckets[bucket][key].etag)}</ETag>'
+            f'<Size>{len(self.buckets[bucket][key].data)}</Size>'
+            f'<StorageClass>STANDARD</StorageClass></Contents>'
+            for key in page
+        )
+        continuation = f'<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>' if is_truncated else ''
+
+        return self._xml(
+            'ListBucketResult',
+            f'<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>'
+            f'<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{str(is_truncated).lower()}</IsTruncated>'
+            f'{"<EncodingType>url</EncodingType>" if url_encoded else ""}{contents}{continuation}',
+        )
+
+    def _delete_objects(self, bucket, body):
+        for element in ElementTree.fromstring(body).iter():
+            if element.tag.endswith('Key'):
+                self.buckets[bucket].pop(element.text, None)
+
+        return self._xml('DeleteResult', '')
+
+    def _copy_object(self, bucket, key, headers):
+        source_bucket, _, source_key = unquote(headers['x-amz-copy-source']).lstrip('/').partition('/')
+        source_object = self.buckets.get(source_bucket, {}).get(source_key)
+
+        if source_object is None:
+            return self._error(404, 'NoSuchKey')
+
+        if headers.get('x-amz-metadata-directive') == 'REPLACE':
+            stored_headers = self._extract_stored_headers(headers)
+        else:
+            stored_headers = {**source_object.headers, **self._extract_stored_headers(headers)}
+
+        self.buckets[bucket][key] = StoredObject(source_object.data, stored_headers)
+
+        return self._xml(
+            'CopyObjectResult',
+            f'<ETag>{escape(self.buckets[bucket][key].etag)}</ETag>'
+            f'<LastModified>2020-01-01T00:00:00.000Z</LastModified>',
+        )
+
+    def _extract_stored_headers(self, headers):
+        return {
+            name.lower(): value for name, value in headers.items()
+            if name.lower() in self.STORED_HEADERS or name.lower().startswith(self.METADATA_HEADER_PREFIX)
+        }
+
+    @staticmethod
+    def _xml(root, content):
+        body = f'<?xml version="1.0" encoding="UTF-8"?><{root}>{content}</{root}>'.encode('utf-8')
+        return 200, {'Content-Type': 'application/xml'}, body
+
+    @classmethod
+    def _error(cls, status, code):
+        _, headers, body = cls._xml('Error', f'<Code>{code}</Code><Message>{code}</Message>')
+        return status, headers, body
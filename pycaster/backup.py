@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+
+class DatabaseBackup:
+    BACKUP_FILE_PREFIX = 'pycaster-'
+    BACKUP_FILE_EXTENSION = '.db.gz'
+    LATEST_BACKUP_FILE_NAME = 'pycaster.db.gz'
+    # Down to the microsecond, so that backups taken within the same second are still ordered chronologically
+    TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S%fZ'
+    HASH_LENGTH = 16
+    HASH_CHUNK_SIZE = 1024 * 1024
+    SPOOL_MAX_SIZE = 8 * 1024 * 1024
+    DEFAULT_RETENTION = 10
+
+    def __init__(self, db, uploader, bucket, upload_path, retention=DEFAULT_RETENTION):
+        self.db = db
+        self.uploader = uploader
+        self.bucket = bucket
+        self.upload_path = upload_path
+        self.retention = retention
+        self.latest_etag = None
+
+    def prepare(self):
+        compressed_snapshot, snapshot_hash = self._create_compressed_snapshot()
+        return compressed_snapshot, snapshot_hash, self._list_generations()
+
+    def upload(self, snapshot):
+        compressed_snapshot, snapshot_hash, generations = snapshot
+
+        with compressed_snapshot:
+            if generations and self._extract_hash(generations[-1]) == snapshot_hash:
+                return False
+
+            backup_file_name = self._build_backup_file_name(snapshot_hash)
+
+            self.uploader.upload_fileobj_privately(
+                fileobj=compressed_snapshot,
+                file_name=backup_file_name,
+                upload_path=self.upload_path,
+                bucket=self.bucket,
+                overwrite=True,
+            )
+
+        # A copy under a fixed name lets a fresh checkout revalidate the newest generation without listing them all
+        self.latest_etag = self.uploader.copy_file(
+            source_file_path=f'{self.upload_path}/{backup_file_name}',
+            target_file_path=self.build_latest_file_path(self.upload_path),
+            bucket=self.bucket,
+        )
+
+        self._prune_generations(generations + [backup_file_name])
+
+        return True
+
+    def _create_compressed_snapshot(self):
+        snapshot_descriptor, snapshot_path = tempfile.mkstemp(suffix='.db')
+        os.close(snapshot_descriptor)
+
+        try:
+            # The backup API copies a consistent state of the database, even while it is being written to
+            self.db.create_snapshot(snapshot_path)
+
+            snapshot_hash = self._calculate_hash(snapshot_path)
+
+            compressed_snapshot = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE)
+            with open(snapshot_path, 'rb') as snapshot:
+                # A fixed modification time keeps the compressed bytes of an unchanged snapshot identical
+                with gzip.GzipFile(fileobj=compressed_snapshot, mode='wb', mtime=0) as compressing_snapshot:
+                    shutil.copyfileobj(snapshot, compressing_snapshot)
+            compressed_snapshot.seek(0)
+        finally:
+            os.remove(snapshot_path)
+
+        return compressed_snapshot, snapshot_hash
+
+    def _list_generations(self):
+        file_names = (
+            remote_file_path.rsplit('/', 1)[-1]
+            for remote_file_path in self.uploader.list_files(self.upload_path, self.bucket)
+        )
+
+        # The timestamp at the start of the name makes the lexicographic order the chronological one
+        return sorted(
+            file_name for file_name in file_names
+            if file_name.startswith(self.BACKUP_FILE_PREFIX) and file_name.endswith(self.BACKUP_FILE_EXTENSION)
+        )
+
+    def _prune_generations(self, generations):
+        if len(generations) <= self.retention:
+            return
+
+        expired_generations = generations[:len(generations) - self.retention]
+
+        self.uploader.delete_files(
+            [f'{self.upload_path}/{generation}' for generation in expired_generations],
+            self.bucket,
+        )
+
+    @classmethod
+    def build_latest_file_path(cls, upload_path):
+        return f'{upload_path}/{cls.LATEST_BACKUP_FILE_NAME}'
+
+    def _build_backup_file_name(self, snapshot_hash):
+        timestamp = datetime.now(timezone.utc).strftime(self.TIMESTAMP_FORMAT)
+        return f'{self.BACKUP_FILE_PREFIX}{timestamp}-{snapshot_hash}{self.BACKUP_FILE_EXTENSION}'
+
+    def _extract_hash(self, file_name):
+        return file_name[:-len(self.BACKUP_FILE_EXTENSION)].rsplit('-', 1)[-1]
+
+    def _calculate_hash(self, snapshot_path):
+        snapshot_hash = hashlib.sha256()
+
+        with open(snapshot_path, 'rb') as snapshot:
+            for chunk in iter(lambda: snapshot.read(self.HASH_CHUNK_SIZE), b''):
+                snapshot_hash.update(chunk)
+
+        return snapshot_hash.hexdigest()[:self.HASH_LENGTH]
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from uploader import Uploader
+
+
+class EpisodeDrift:
+    # Problems, each along with the expected and the actual value
+    MISSING_FILE = 'missing_file'
+    FILE_SIZE = 'file_size'
+    CONTENT_TYPE = 'content_type'
+    ACL = 'acl'
+
+    PUBLIC_ACL = 'public-read'
+    PRIVATE_ACL = 'private'
+    REWRITABLE_PROBLEMS = (CONTENT_TYPE, ACL)
+
+    def __init__(self, episode, key):
+        self.episode = episode
+        self.key = key
+        self.problems = {}
+        self.metadata = {}
+
+    @property
+    def needs_metadata_rewrite(self):
+        return any(problem in self.problems for problem in self.REWRITABLE_PROBLEMS)
+
+
+class BucketReconciliation:
+    """
+    Compares the episode files in the bucket against the episodes in the database.
+    The episode path is listed once and joined against the database in memory, only the content type and the ACL
+    have to be looked up file by file, which happens concurrently.
+    """
+    # Replacing the metadata of a file drops everything that is not given again
+    PRESERVED_METADATA_KEYS = (
+        Uploader.CACHE_CONTROL_KEY,
+        Uploader.CONTENT_ENCODING_KEY,
+        'ContentDisposition',
+        'ContentLanguage',
+        Uploader.METADATA_KEY,
+    )
+
+    def __init__(self, uploader, bucket, upload_path, build_object_uri, workers):
+        self.uploader = uploader
+        self.bucket = bucket
+        self.upload_path = upload_path
+        self.build_object_uri = build_object_uri
+        self.workers = workers
+        self.orphaned_keys = []
+        self.unhosted_episodes = 0
+
+    def find_drift(self, episodes):
+        # Keyed by the whole key, as files in nested directories of the episode path may share their names
+        remote_files = {
+            self.build_object_uri(key): (key, size)
+            for key, size, _ in self.uploader.list_objects(self.upload_path, self.bucket)
+        }
+        hosted_file_uri_prefix = self.build_object_uri(f'{self.upload_path}/')
+        referenced_keys = set()
+        drifts = []
+
+        for episode in episodes:
+            if not episode.file_uri.startswith(hosted_file_uri_prefix):
+                # Hosted elsewhere, e.g. episodes that were imported from the feed of another host
+                self.unhosted_episodes += 1
+                continue
+
+            remote_file = remote_files.get(episode.file_uri)
+
+            if remote_file is None:
+                drift = EpisodeDrift(episode, key=None)
+                drift.problems[EpisodeDrift.MISSING_FILE] = (episode.file_uri, None)
+                drifts.append(drift)
+                continue
+
+            key, size = remote_file
+            referenced_keys.add(key)
+
+            drift = EpisodeDrift(episode, key)
+            if int(episode.file_size) != size:
+                # The length of the file in the bucket is what listeners actually download, not the recorded one
+                drift.problems[EpisodeDrift.FILE_SIZE] = (size, int(episode.file_size))
+            drifts.append(drift)
+
+        self.orphaned_keys = sorted(key for key, _ in remote_files.values() if key not in referenced_keys)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._inspect_metadata, [drift for drift in drifts if drift.key is not None]))
+
+        return [drift for drift in drifts if drift.problems]
+
+    def repair(self, drifts):
+        rewrites = [drift for drift in drifts if drift.needs_metadata_rewrite]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._rewrite_metadata, rewrites))
+
+        return len(rewrites)
+
+    def _inspect_metadata(self, drift):
+        drift.metadata = self.uploader.describe_file_metadata(drift.key, self.bucket)
+        content_type = drift.metadata.get(Uploader.CONTENT_TYPE_KEY)
+
+        if content_type != drift.episode.file_type:
+            drift.problems[EpisodeDrift.CONTENT_TYPE] = (drift.episode.file_type, content_type)
+
+        if not self.uploader.is_publicly_readable(drift.key, self.bucket):
+            drift.problems[EpisodeDrift.ACL] = (EpisodeDrift.PUBLIC_ACL, EpisodeDrift.PRIVATE_ACL)
+
+    def _rewrite_metadata(self, drift):
+        extra_args = {key: drift.metadata[key] for key in self.PRESERVED_METADATA_KEYS if drift.metadata.get(key)}
+        extra_args[Uploader.CONTENT_TYPE_KEY] = drift.episode.file_type
+
+        self.uploader.rewrite_file_metadata_publicly(drift.key, self.bucket, extra_args)
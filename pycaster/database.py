@@ -1,9 +1,25 @@
+import itertools
 import sqlite3
+from datetime import datetime, timezone
+
+from summary import ItunesSummary
 
 
 class Episode:
     def __init__(
-        self, title, description, duration, file_uri, file_type, file_size, is_explicit, published, db_id=None,
+        self,
+        title,
+        description,
+        duration,
+        file_uri,
+        file_type,
+        file_size,
+        is_explicit,
+        published,
+        content_hash=None,
+        itunes_summary=None,
+        chapters_uri=None,
+        db_id=None,
     ):
         self.db_id = db_id
         self.title = title
@@ -14,15 +30,220 @@ class Episode:
         self.file_size = file_size
         self.is_explicit = is_explicit
         self.published = published
+        self.content_hash = content_hash
+        self.itunes_summary = itunes_summary
+        self.chapters_uri = chapters_uri
+
+    @staticmethod
+    def parse_duration(duration):
+        seconds = 0
+
+        for part in str(duration).strip().split(':'):
+            seconds = seconds * 60 + int(part or 0)
+
+        return seconds
+
+    @staticmethod
+    def format_duration(seconds):
+        hours, remainder = divmod(int(seconds), 3600)
+        minutes, seconds = divmod(remainder, 60)
+
+        if hours:
+            return f'{hours}:{minutes:02d}:{seconds:02d}'
+        return f'{minutes}:{seconds:02d}'
+
+    @staticmethod
+    def parse_is_explicit(is_explicit):
+        return str(is_explicit).strip().lower() in ('yes', 'true', '1')
 
 
 class Database:
+    EPISODE_COLUMNS = (
+        'id, title, description, file_uri, file_type, file_size, duration, is_explicit, published, content_hash, '
+        'itunes_summary, chapters_uri'
+    )
+    FETCH_SIZE = 500
+    INSERT_EPISODE_STATEMENT = '''
+        INSERT INTO episodes(
+            title, description, file_uri, file_type, file_size, duration, is_explicit, published, content_hash,
+            itunes_summary, chapters_uri
+        )
+        VALUES(
+            :title, :description, :file_uri, :file_type, :file_size, :duration, :is_explicit, :published, :content_hash,
+            :itunes_summary, :chapters_uri
+        )
+    '''
+
+    # Resolutions of imported episodes that conflict with the unique title or file URI of an existing one
+    SKIP_CONFLICTS = 'skip'
+    REPLACE_CONFLICTS = 'replace'
+    ABORT_ON_CONFLICTS = 'abort'
+    CONFLICT_INSERT_CLAUSES = {
+        SKIP_CONFLICTS: 'INSERT OR IGNORE',
+        REPLACE_CONFLICTS: 'INSERT OR REPLACE',
+        ABORT_ON_CONFLICTS: 'INSERT',
+    }
+
     def __init__(self, db_file):
         self.db = self.init_db(db_file)
 
     def create_episode_database(self):
+        # The schema version is tracked in SQLite's `user_version` header field, every migration bumps it by one
+        migrations = (
+            self._migrate_to_text_schema,
+            self._migrate_to_typed_schema,
+            self._migrate_to_content_hash_schema,
+            self._migrate_to_itunes_summary_schema,
+            self._migrate_to_chapters_schema,
+            self._migrate_to_unindexed_content_hash_schema,
+        )
+
+        current_version = self._retrieve_schema_version()
+
+        for version, migration in enumerate(migrations, start=1):
+            if version <= current_version:
+                continue
+
+            with self.db:
+                # Schema changes are not wrapped into a transaction implicitly, but migrations have to be atomic
+                self.db.execute('BEGIN')
+                migration()
+                self.db.execute(f'PRAGMA user_version = {version}')
+
+    def insert_new_episode(self, episode: Episode):
+        cursor = self._get_cursor()
+        cursor.execute(self.INSERT_EPISODE_STATEMENT, self._serialize_episode(episode))
+        self._commit_db()
+        cursor.close()
+
+    def insert_new_episodes(self, episodes):
+        with self.db:
+            self.db.executemany(
+                self.INSERT_EPISODE_STATEMENT,
+                [self._serialize_episode(episode) for episode in episodes],
+            )
+
+    def import_episodes(self, episodes, conflict_resolution=ABORT_ON_CONFLICTS):
+        statement = self.INSERT_EPISODE_STATEMENT.replace(
+            'INSERT', self.CONFLICT_INSERT_CLAUSES[conflict_resolution], 1,
+        )
+        episodes = iter(episodes)
+
+        # A single transaction instead of a commit per episode, filled in batches so that memory stays bounded.
+        # An aborting conflict rolls back the whole import.
+        with self.db:
+            changes_before = self.db.total_changes
+
+            for batch in iter(lambda: list(itertools.islice(episodes, self.FETCH_SIZE)), []):
+                self.db.executemany(statement, [self._serialize_episode(episode) for episode in batch])
+
+            return self.db.total_changes - changes_before
+
+    def update_file_sizes(self, file_sizes):
+        with self.db:
+            self.db.executemany(
+                'UPDATE episodes SET file_size = ? WHERE file_uri = ?',
+                [(int(file_size), file_uri) for file_uri, file_size in file_sizes.items()],
+            )
+
+    def delete_episodes(self, file_uris):
+        with self.db:
+            self.db.executemany('DELETE FROM episodes WHERE file_uri = ?', [(file_uri,) for file_uri in file_uris])
+
+    def recompute_itunes_summaries(self):
+        with self.db:
+            return self._recompute_itunes_summaries()
+
+    def retrieve_all_episodes(self):
+        return list(self.iterate_episodes())
+
+    def iterate_episodes(self, limit=None, offset=0, newest_first=False, released_before=None):
         cursor = self._get_cursor()
         cursor.execute(
+            f'''
+            SELECT {self.EPISODE_COLUMNS} FROM (
+                SELECT * FROM episodes
+                WHERE :released_before IS NULL OR published <= :released_before
+                ORDER BY published, id LIMIT :limit OFFSET :offset
+            )
+            ORDER BY published {'DESC' if newest_first else 'ASC'}, id {'DESC' if newest_first else 'ASC'}
+            ''',
+            {
+                'limit': -1 if limit is None else limit,
+                'offset': offset,
+                'released_before': self._serialize_timestamp(released_before),
+            },
+        )
+
+        try:
+            rows = cursor.fetchmany(self.FETCH_SIZE)
+            while rows:
+                for row in rows:
+                    yield self._deserialize_episode(row)
+                rows = cursor.fetchmany(self.FETCH_SIZE)
+        finally:
+            cursor.close()
+
+    def count_episodes(self, released_before=None):
+        return self.db.execute(
+            'SELECT COUNT(*) FROM episodes WHERE :released_before IS NULL OR published <= :released_before',
+            {'released_before': self._serialize_timestamp(released_before)},
+        ).fetchone()[0]
+
+    def count_episodes_published_before(self, published):
+        return self.db.execute(
+            'SELECT COUNT(*) FROM episodes WHERE published < ?',
+            (self._serialize_timestamp(published),),
+        ).fetchone()[0]
+
+    def find_existing_file_uris(self, file_uris):
+        file_uris = list(file_uris)
+        existing_file_uris = set()
+
+        # Bounded, as SQLite limits the number of parameters of a single statement
+        for batch_start in range(0, len(file_uris), self.FETCH_SIZE):
+            batch = file_uris[batch_start:batch_start + self.FETCH_SIZE]
+            rows = self.db.execute(
+                f'SELECT file_uri FROM episodes WHERE file_uri IN ({", ".join("?" * len(batch))})',
+                batch,
+            )
+            existing_file_uris.update(file_uri for file_uri, in rows)
+
+        return existing_file_uris
+
+    def retrieve_data_version(self):
+        # Changes whenever another connection committed to the database, but not with commits of this one
+        return self.db.execute('PRAGMA data_version').fetchone()[0]
+
+    def find_next_release(self, after):
+        next_release = self.db.execute(
+            'SELECT MIN(published) FROM episodes WHERE published > ?',
+            (self._serialize_timestamp(after),),
+        ).fetchone()[0]
+
+        return None if next_release is None else datetime.fromtimestamp(next_release, timezone.utc)
+
+    def find_latest_release(self, before):
+        latest_release = self.db.execute(
+            'SELECT MAX(published) FROM episodes WHERE published <= ?',
+            (self._serialize_timestamp(before),),
+        ).fetchone()[0]
+
+        return None if latest_release is None else datetime.fromtimestamp(latest_release, timezone.utc)
+
+    def close(self):
+        self.db.close()
+
+    def create_snapshot(self, snapshot_file):
+        snapshot = sqlite3.connect(snapshot_file)
+
+        try:
+            self.db.backup(snapshot)
+        finally:
+            snapshot.close()
+
+    def _migrate_to_text_schema(self):
+        self.db.execute(
             '''
             CREATE TABLE IF NOT EXISTS episodes(
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -37,49 +258,93 @@ class Database:
             )
             '''
         )
-        self._commit_db()
-        cursor.close()
 
-    def insert_new_episode(self, episode: Episode):
-        cursor = self._get_cursor()
-        cursor.execute(
+    def _migrate_to_typed_schema(self):
+        self.db.execute(
+            '''
+            CREATE TABLE typed_episodes(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT unique,
+                description TEXT,
+                file_uri TEXT unique,
+                file_type TEXT,
+                file_size INTEGER,
+                duration INTEGER,
+                is_explicit BOOLEAN,
+                published INTEGER
+            )
             '''
-            INSERT INTO episodes(title, description, file_uri, file_type, file_size, duration, is_explicit, published)
-            VALUES(:title, :description, :file_uri, :file_type, :file_size, :duration, :is_explicit, :published)
-            ''',
-            {
-                'title': episode.title,
-                'description': episode.description,
-                'file_uri': episode.file_uri,
-                'file_type': episode.file_type,
-                'file_size': episode.file_size,
-                'duration': episode.duration,
-                'is_explicit': episode.is_explicit,
-                'published': str(episode.published),
-            }
         )
-        self._commit_db()
-        cursor.close()
 
-    def retrieve_all_episodes(self):
-        cursor = self._get_cursor()
-        cursor.execute(
-            '''
-            SELECT * FROM episodes
-            '''
+        text_columns = 'id, title, description, file_uri, file_type, file_size, duration, is_explicit, published'
+
+        text_rows = self.db.execute(f'SELECT {text_columns} FROM episodes ORDER BY id').fetchall()
+        self.db.executemany(
+            f'INSERT INTO typed_episodes({text_columns}) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (
+                    db_id,
+                    title,
+                    description,
+                    file_uri,
+                    file_type,
+                    int(file_size or 0),
+                    Episode.parse_duration(duration or 0),
+                    Episode.parse_is_explicit(is_explicit),
+                    int(datetime.fromisoformat(published).timestamp()),
+                )
+                for db_id, title, description, file_uri, file_type, file_size, duration, is_explicit, published
+                in text_rows
+            ],
         )
-        self._commit_db()
-        rows = cursor.fetchall()
-        cursor.close()
-        return self._deserialize_episodes(rows)
 
-    def _deserialize_episodes(self, episode_rows):
-        episodes = []
+        self.db.execute('DROP TABLE episodes')
+        self.db.execute('ALTER TABLE typed_episodes RENAME TO episodes')
+        self.db.execute('CREATE INDEX episodes_published ON episodes(published)')
 
-        for row in episode_rows:
-            episodes.append(self._deserialize_episode(row))
+    def _migrate_to_content_hash_schema(self):
+        # Episodes published before are left without a hash, as their files are not necessarily at hand anymore
+        self.db.execute('ALTER TABLE episodes ADD COLUMN content_hash TEXT')
 
-        return episodes
+    def _migrate_to_itunes_summary_schema(self):
+        self.db.execute('ALTER TABLE episodes ADD COLUMN itunes_summary TEXT')
+        self._recompute_itunes_summaries()
+
+    def _migrate_to_chapters_schema(self):
+        self.db.execute('ALTER TABLE episodes ADD COLUMN chapters_uri TEXT')
+
+    def _migrate_to_unindexed_content_hash_schema(self):
+        # Duplicates are detected by the content hash stored along with the uploaded file, nothing queries the column
+        self.db.execute('DROP INDEX IF EXISTS episodes_content_hash')
+
+    def _recompute_itunes_summaries(self):
+        changes_before = self.db.total_changes
+        last_id = 0
+
+        # Paged by id instead of reading all descriptions at once, and only rows whose summary differs are written
+        while True:
+            rows = self.db.execute(
+                'SELECT id, description FROM episodes WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, self.FETCH_SIZE),
+            ).fetchall()
+
+            if not rows:
+                return self.db.total_changes - changes_before
+
+            self.db.executemany(
+                '''
+                UPDATE episodes SET itunes_summary = :itunes_summary
+                WHERE id = :id AND itunes_summary IS NOT :itunes_summary
+                ''',
+                [
+                    {'id': db_id, 'itunes_summary': ItunesSummary.convert(description or '')}
+                    for db_id, description in rows
+                ],
+            )
+            last_id = rows[-1][0]
+
+    def _retrieve_schema_version(self):
+        return self.db.execute('PRAGMA user_version').fetchone()[0]
 
     def _get_cursor(self):
         return self.db.cursor()
@@ -87,6 +352,31 @@ class Database:
     def _commit_db(self):
         return self.db.commit()
 
+    @classmethod
+    def _serialize_episode(cls, episode: Episode):
+        return {
+            'title': episode.title,
+            'description': episode.description,
+            'file_uri': episode.file_uri,
+            'file_type': episode.file_type,
+            'file_size': int(episode.file_size),
+            'duration': int(episode.duration),
+            'is_explicit': bool(episode.is_explicit),
+            'published': cls._serialize_timestamp(episode.published),
+            'content_hash': episode.content_hash,
+            # Converted once when the episode is inserted, instead of on every build of the feed
+            'itunes_summary': (
+                episode.itunes_summary
+                if episode.itunes_summary is not None
+                else ItunesSummary.convert(episode.description)
+            ),
+            'chapters_uri': episode.chapters_uri,
+        }
+
+    @staticmethod
+    def _serialize_timestamp(moment):
+        return None if moment is None else int(moment.timestamp())
+
     @staticmethod
     def _deserialize_episode(episode_row):
         return Episode(
@@ -97,10 +387,16 @@ class Database:
             file_type=episode_row[4],
             file_size=episode_row[5],
             duration=episode_row[6],
-            is_explicit=episode_row[7],
-            published=episode_row[8],
+            is_explicit=bool(episode_row[7]),
+            published=datetime.fromtimestamp(episode_row[8], timezone.utc),
+            content_hash=episode_row[9],
+            itunes_summary=episode_row[10],
+            chapters_uri=episode_row[11],
         )
 
     @staticmethod
     def init_db(db_file):
-        return sqlite3.connect(db_file)
+        # Publishing hands the connection from one stage thread to the next, but never uses it concurrently
+        db = sqlite3.connect(db_file, check_same_thread=False)
+        db.execute('PRAGMA journal_mode = WAL')
+        return db
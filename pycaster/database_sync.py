@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from backup import DatabaseBackup
+
+
+class DatabaseSync:
+    SYNC_STATE_FILE_EXTENSION = '.sync.json'
+    ETAG_KEY = 'etag'
+    # Journal files of a replaced database would otherwise be replayed into the downloaded one
+    JOURNAL_FILE_SUFFIXES = ('-wal', '-shm')
+
+    def __init__(self, uploader, bucket, upload_path, database_file):
+        self.uploader = uploader
+        self.bucket = bucket
+        self.upload_path = upload_path
+        self.database_path = Path(database_file).resolve()
+        self.sync_state_path = self.database_path.with_name(f'{self.database_path.name}{self.SYNC_STATE_FILE_EXTENSION}')
+
+    def pull(self, before_replace=None):
+        etag = self._load_etag()
+
+        if etag is None and self.database_path.exists():
+            # A database that was never synced may hold episodes the bucket does not know about yet
+            return False
+
+        download_descriptor, download_path = tempfile.mkstemp(dir=str(self.database_path.parent), suffix='.gz')
+
+        try:
+            with os.fdopen(download_descriptor, 'wb') as download:
+                try:
+                    remote_etag = self.uploader.download_file_if_changed(
+                        file_path=DatabaseBackup.build_latest_file_path(self.upload_path),
+                        bucket=self.bucket,
+                        target_fileobj=download,
+                        etag=etag,
+                    )
+                except FileNotFoundError:
+                    return False
+
+            if remote_etag is None:
+                return False
+
+            if before_replace is not None:
+                # E.g. closes the connections to the database, which would otherwise still read the replaced one
+                before_replace()
+
+            self._replace_database(download_path)
+        finally:
+            os.remove(download_path)
+
+        self.record(remote_etag)
+
+        return True
+
+    def record(self, etag):
+        temporary_path = self.sync_state_path.with_suffix('.tmp')
+
+        with open(str(temporary_path), 'w') as file:
+            json.dump({self.ETAG_KEY: etag}, file)
+
+        os.replace(str(temporary_path), str(self.sync_state_path))
+
+    def _load_etag(self):
+        try:
+            with open(str(self.sync_state_path)) as file:
+                return json.load(file).get(self.ETAG_KEY)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _replace_database(self, download_path):
+        database_descriptor, database_path = tempfile.mkstemp(dir=str(self.database_path.parent), suffix='.db')
+
+        try:
+            with os.fdopen(database_descriptor, 'wb') as database, gzip.open(download_path, 'rb') as download:
+                shutil.copyfileobj(download, database)
+
+            for suffix in self.JOURNAL_FILE_SUFFIXES:
+                journal_path = Path(f'{self.database_path}{suffix}')
+                if journal_path.exists():
+                    os.remove(str(journal_path))
+
+            os.replace(database_path, str(self.database_path))
+        except BaseException:
+            os.remove(database_path)
+            raise
@@ -0,0 +1,176 @@
+import contextlib
+import ctypes
+import os
+import select
+import time
+from pathlib import Path
+
+from manifest import Sidecar
+
+
+class InotifyWatcher:
+    # Flags of `inotify_add_watch`, see `man 7 inotify`
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    # Files that are still being written keep signalling modifications, which postpones their publication
+    EVENT_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    READ_SIZE = 64 * 1024
+    NAME = 'inotify'
+
+    def __init__(self, path):
+        # Raises an AttributeError on platforms without inotify, e.g. macOS
+        libc = ctypes.CDLL(None, use_errno=True)
+        init = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify could not be initialized')
+
+        if add_watch(self.fd, os.fsencode(str(path)), self.EVENT_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"The directory '{path}' could not be watched")
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+
+        if not readable:
+            return False
+
+        # The directory is scanned as a whole afterwards, hence the events only have to be drained
+        with contextlib.suppress(BlockingIOError):
+            while os.read(self.fd, self.READ_SIZE):
+                pass
+
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    NAME = 'polling'
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.snapshot = self._take_snapshot()
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+
+            if delay <= 0:
+                return False
+
+            time.sleep(delay)
+
+            snapshot = self._take_snapshot()
+
+            # Files that are still being written change their size or modification time from one poll to the next
+            if snapshot != self.snapshot:
+                self.snapshot = snapshot
+                return True
+
+    def close(self):
+        pass
+
+    def _take_snapshot(self):
+        with os.scandir(str(self.path)) as entries:
+            return {
+                entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns)
+                for entry in entries
+                if entry.is_file()
+            }
+
+
+class DropArrival:
+    def __init__(self, file_path, sidecar_path):
+        self.file_path = file_path
+        self.sidecar_path = sidecar_path
+
+    def load_entry(self):
+        return Sidecar(self.sidecar_path, self.file_path).entry
+
+    def move_to(self, directory, error=None):
+        directory.mkdir(exist_ok=True)
+
+        for path in (self.file_path, self.sidecar_path):
+            os.replace(str(path), str(directory / path.name))
+
+        if error is not None:
+            (directory / f'{self.file_path.stem}{DropDirectory.ERROR_FILE_EXTENSION}').write_text(f'{error!r}\n')
+
+
+class DropDirectory:
+    """
+    A directory that episode files are dropped into, each with a sidecar file holding its metadata.
+    Arrivals are only handed out once the directory was quiet for the settle time, so that a burst of arrivals
+    is published at once and files that are still being written are not picked up.
+    """
+    EPISODE_FILE_EXTENSION = '.mp3'
+    SIDECAR_FILE_EXTENSION = Sidecar.JSON_FILE_EXTENSION
+    ERROR_FILE_EXTENSION = '.error.txt'
+    PUBLISHED_DIRECTORY = 'published'
+    FAILED_DIRECTORY = 'failed'
+
+    def __init__(self, path, settle_seconds, poll_interval, force_polling=False):
+        self.path = Path(path).resolve()
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+
+        if not self.path.is_dir():
+            raise ValueError(f"The drop directory could not be found at '{self.path}'")
+
+    @property
+    def published_path(self):
+        return self.path / self.PUBLISHED_DIRECTORY
+
+    @property
+    def failed_path(self):
+        return self.path / self.FAILED_DIRECTORY
+
+    def watch(self):
+        with contextlib.closing(self._create_watcher()) as watcher:
+            print(f"\nWatching '{self.path}' for new episodes using {watcher.NAME}...")
+
+            # Episodes that were dropped while nobody was watching are published right away
+            pending = True
+
+            while True:
+                if watcher.wait(self.settle_seconds if pending else None):
+                    pending = True
+                    continue
+
+                pending = False
+                arrivals = self.find_arrivals()
+
+                if arrivals:
+                    yield arrivals
+
+    def find_arrivals(self):
+        arrivals = []
+
+        for file_path in sorted(self.path.glob(f'*{self.EPISODE_FILE_EXTENSION}')):
+            sidecar_path = file_path.with_suffix(self.SIDECAR_FILE_EXTENSION)
+
+            # Episodes without their sidecar yet are picked up with a later scan
+            if file_path.is_file() and sidecar_path.is_file():
+                arrivals.append(DropArrival(file_path, sidecar_path))
+
+        return arrivals
+
+    def _create_watcher(self):
+        if not self.force_polling:
+            try:
+                return InotifyWatcher(self.path)
+            except (AttributeError, OSError):
+                pass
+
+        return PollingWatcher(self.path, self.poll_interval)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+class FeedFragmentCache:
+    # Bump whenever the rendering of an episode changes, so that previously cached fragments are not reused
+    FRAGMENT_FORMAT_VERSION = 2
+    FRAGMENT_FILE_EXTENSION = '.xml'
+    CHANNEL_CLOSING_TAG = b'</channel>'
+    NAMESPACES = {
+        'itunes': 'http://www.itunes.com/dtds/podcast-1.0.dtd',
+        'atom': 'http://www.w3.org/2005/Atom',
+        'content': 'http://purl.org/rss/1.0/modules/content/',
+        'podcast': 'https://podcastindex.org/namespace/1.0',
+    }
+
+    def __init__(self, cache_directory):
+        self.cache_directory = Path(cache_directory).resolve()
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        self.used_keys = set()
+
+    def get(self, key):
+        self.used_keys.add(key)
+
+        try:
+            with open(str(self._build_fragment_path(key)), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, fragment):
+        self.used_keys.add(key)
+
+        fragment_path = self._build_fragment_path(key)
+        temporary_path = fragment_path.with_suffix('.tmp')
+
+        with open(str(temporary_path), 'wb') as file:
+            file.write(fragment)
+
+        os.replace(str(temporary_path), str(fragment_path))
+
+    def reset(self):
+        # Only the fragments used since then are kept by `prune`, e.g. the ones of the latest render
+        self.used_keys = set()
+
+    def prune(self):
+        for fragment_path in self.cache_directory.glob(f'*{self.FRAGMENT_FILE_EXTENSION}'):
+            if fragment_path.stem not in self.used_keys:
+                os.remove(str(fragment_path))
+
+    def _build_fragment_path(self, key):
+        return self.cache_directory / f'{key}{self.FRAGMENT_FILE_EXTENSION}'
+
+    @classmethod
+    def build_key(cls, feed_format, episode_fields, config_fields):
+        serialized = json.dumps(
+            [cls.FRAGMENT_FORMAT_VERSION, feed_format, episode_fields, config_fields],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def render_fragment(cls, item, parent_tags=('rss', 'channel'), namespaces=None):
+        # Only needed on a cache miss, when feedgen has loaded lxml already anyway
+        from lxml import etree
+
+        namespaces = namespaces or cls.NAMESPACES
+
+        # Rendering the item within a document shaped like the feed yields the same prefixes and indentation as the feed
+        root = etree.Element(parent_tags[0], nsmap=namespaces)
+        parent = root
+        for parent_tag in parent_tags[1:]:
+            parent = etree.SubElement(parent, parent_tag)
+        parent.append(item)
+        etree.cleanup_namespaces(root, top_nsmap=namespaces)
+
+        document = etree.tostring(root, pretty_print=True, encoding='UTF-8')
+        item_tag = etree.QName(item).localname.encode('utf-8')
+
+        fragment_start = document.rfind(b'\n', 0, document.index(b'<' + item_tag)) + 1
+        fragment_end = document.index(b'\n', document.rindex(b'</' + item_tag + b'>')) + 1
+
+        return document[fragment_start:fragment_end]
+
+    @classmethod
+    def split_document(cls, document, closing_tag=CHANNEL_CLOSING_TAG):
+        # The items are written in between, at the line of the closing tag of the channel
+        insert_position = document.rindex(closing_tag)
+        line_start = document.rfind(b'\n', 0, insert_position) + 1
+
+        return document[:line_start], document[line_start:]
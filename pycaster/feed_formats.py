@@ -0,0 +1,207 @@
+import json
+from xml.sax.saxutils import quoteattr
+
+from database import Episode
+from feed_cache import FeedFragmentCache
+
+
+class FeedItem:
+    """
+    An episode as it is rendered into every format of the feed. Its feedgen entry is created at most once,
+    and only if one of the formats misses its fragment in the cache.
+    """
+
+    def __init__(self, episode_fields, config_fields, create_entry):
+        self.episode_fields = episode_fields
+        self.config_fields = config_fields
+        self.create_entry = create_entry
+        self._entry = None
+
+    @property
+    def entry(self):
+        if self._entry is None:
+            self._entry = self.create_entry()
+        return self._entry
+
+
+class FeedFormat:
+    """
+    A single document of the feed in one format, e.g. the RSS subscription feed or an Atom archive page.
+    The channel is written first, followed by the items in the order they are handed in, and the closing tail.
+    """
+    NAME = None
+    FILE_EXTENSION = None
+    MIME_TYPE = None
+    SUBSCRIPTION_FILE_STEM = 'feed'
+    HISTORY_NAMESPACE = 'http://purl.org/syndication/history/1.0'
+
+    def __init__(self, file, fragment_cache, feed_uri, links=(), is_archive=False):
+        self.file = file
+        self.fragment_cache = fragment_cache
+        self.feed_uri = feed_uri
+        self.links = links
+        self.is_archive = is_archive
+        self.tail = b''
+
+    def write_channel(self, channel):
+        raise NotImplementedError
+
+    def write_item(self, item: FeedItem):
+        key = FeedFragmentCache.build_key(self.NAME, item.episode_fields, item.config_fields)
+        fragment = self.fragment_cache.get(key)
+
+        if fragment is None:
+            fragment = self.render_fragment(item.entry)
+            self.fragment_cache.put(key, fragment)
+
+        self.file.write(fragment)
+
+    def render_fragment(self, entry):
+        raise NotImplementedError
+
+    def close(self):
+        self.file.write(self.tail)
+
+    @classmethod
+    def build_subscription_file_name(cls):
+        return f'{cls.SUBSCRIPTION_FILE_STEM}{cls.FILE_EXTENSION}'
+
+    @classmethod
+    def find(cls, name):
+        for feed_format in cls.__subclasses__():
+            if feed_format.NAME == name:
+                return feed_format
+
+        raise ValueError(f"The feed format '{name}' is not supported")
+
+
+class RssFormat(FeedFormat):
+    NAME = 'rss'
+    FILE_EXTENSION = '.xml'
+    MIME_TYPE = 'text/xml'
+    LINK_TEMPLATE = '    <atom:link rel={rel} href={href}/>\n'
+
+    def write_channel(self, channel):
+        head, self.tail = FeedFragmentCache.split_document(channel.rss_str(pretty=True))
+
+        self.file.write(head)
+
+        if self.is_archive:
+            self.file.write(f'    <fh:archive xmlns:fh="{self.HISTORY_NAMESPACE}"/>\n'.encode('utf-8'))
+
+        for rel, href in self.links:
+            self.file.write(self.LINK_TEMPLATE.format(rel=quoteattr(rel), href=quoteattr(href)).encode('utf-8'))
+
+    def render_fragment(self, entry):
+        return FeedFragmentCache.render_fragment(entry.rss_entry())
+
+
+class AtomFormat(FeedFormat):
+    NAME = 'atom'
+    FILE_EXTENSION = '.atom'
+    MIME_TYPE = 'application/atom+xml'
+    FEED_CLOSING_TAG = b'</feed>'
+    LINK_TEMPLATE = '  <link rel={rel} href={href}/>\n'
+    SELF_REL = 'self'
+    # Just like feedgen's feed element, the entries are in Atom's default namespace
+    NAMESPACES = {
+        None: FeedFragmentCache.NAMESPACES['atom'],
+        'itunes': FeedFragmentCache.NAMESPACES['itunes'],
+    }
+
+    def write_channel(self, channel):
+        head, self.tail = FeedFragmentCache.split_document(channel.atom_str(pretty=True), self.FEED_CLOSING_TAG)
+
+        self.file.write(head)
+
+        if self.is_archive:
+            self.file.write(f'  <fh:archive xmlns:fh="{self.HISTORY_NAMESPACE}"/>\n'.encode('utf-8'))
+
+        for rel, href in [(self.SELF_REL, self.feed_uri), *self.links]:
+            self.file.write(self.LINK_TEMPLATE.format(rel=quoteattr(rel), href=quoteattr(href)).encode('utf-8'))
+
+    def render_fragment(self, entry):
+        atom_entry = entry.atom_entry()
+
+        # feedgen only marks the content as HTML if the RSS items get a `content:encoded` copy of it as well
+        content = atom_entry.find('content')
+        if content is not None:
+            content.set('type', 'html')
+
+        return FeedFragmentCache.render_fragment(atom_entry, parent_tags=('feed',), namespaces=self.NAMESPACES)
+
+
+class JsonFeedFormat(FeedFormat):
+    """
+    A JSON Feed as per https://www.jsonfeed.org/version/1.1/, written with one item per line.
+    """
+    NAME = 'json'
+    FILE_EXTENSION = '.json'
+    MIME_TYPE = 'application/feed+json'
+    VERSION = 'https://jsonfeed.org/version/1.1'
+    # JSON Feed only links to the next page of older items, archive pages are identified by their subscription feed
+    NEXT_REL = 'next'
+    CURRENT_REL = 'current'
+    ALTERNATE_REL = 'alternate'
+    ITEM_INDENTATION = b'    '
+    ITEM_SEPARATOR = b',\n'
+
+    def __init__(self, file, fragment_cache, feed_uri, links=(), is_archive=False):
+        super().__init__(file, fragment_cache, feed_uri, links, is_archive)
+        self.item_count = 0
+
+    def write_channel(self, channel):
+        document = {
+            'version': self.VERSION,
+            'title': channel.title(),
+            'home_page_url': self._find_alternate_link(channel.link()),
+            'feed_url': dict(self.links).get(self.CURRENT_REL, self.feed_uri),
+            # feedgen keeps the description and the subtitle in the same field, unlike the iTunes summary
+            'description': channel.podcast.itunes_summary(),
+            'icon': channel.podcast.itunes_image(),
+            'authors': [{'name': author['name']} for author in channel.author()],
+            'language': channel.language(),
+        }
+
+        if self.NEXT_REL in dict(self.links):
+            document['next_url'] = dict(self.links)[self.NEXT_REL]
+
+        # Without its closing brace, so that the items can be streamed into the document
+        head = json.dumps(document, indent=2, ensure_ascii=False)[:-2]
+
+        self.file.write(f'{head},\n  "items": [\n'.encode('utf-8'))
+        self.tail = b'\n  ]\n}\n'
+
+    def write_item(self, item: FeedItem):
+        if self.item_count:
+            self.file.write(self.ITEM_SEPARATOR)
+        self.item_count += 1
+
+        super().write_item(item)
+
+    def render_fragment(self, entry):
+        enclosure = entry.enclosure()
+        json_item = {
+            'id': entry.id(),
+            'url': self._find_alternate_link(entry.link()),
+            'title': entry.title(),
+            'content_html': entry.description(),
+            'summary': entry.summary()['summary'],
+            'date_published': entry.published().isoformat(),
+            'image': entry.podcast.itunes_image(),
+            'attachments': [
+                {
+                    'url': enclosure['url'],
+                    'mime_type': enclosure['type'],
+                    'size_in_bytes': int(enclosure['length']),
+                    'duration_in_seconds': Episode.parse_duration(entry.podcast.itunes_duration()),
+                },
+            ],
+        }
+
+        return self.ITEM_INDENTATION + json.dumps(json_item, ensure_ascii=False).encode('utf-8')
+
+    @classmethod
+    def _find_alternate_link(cls, links):
+        # Entries link to their enclosure as well
+        return next((link['href'] for link in links if link.get('rel') == cls.ALTERNATE_REL), None)
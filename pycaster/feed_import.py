@@ -0,0 +1,102 @@
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from database import Episode
+from feed_cache import FeedFragmentCache
+
+
+class FeedImport:
+    """
+    Reads the episodes of an existing RSS feed, e.g. of a show that is migrated to pycaster.
+    The feed is parsed incrementally and every item is discarded once it was read,
+    so that memory stays constant even for feeds with thousands of episodes.
+    """
+    ITEM_TAG = 'item'
+    TITLE_TAG = 'title'
+    DESCRIPTION_TAG = 'description'
+    ENCLOSURE_TAG = 'enclosure'
+    PUBLISHED_TAG = 'pubDate'
+    CONTENT_ENCODED_TAG = f'{{{FeedFragmentCache.NAMESPACES["content"]}}}encoded'
+    ITUNES_SUMMARY_TAG = f'{{{FeedFragmentCache.NAMESPACES["itunes"]}}}summary'
+    ITUNES_DURATION_TAG = f'{{{FeedFragmentCache.NAMESPACES["itunes"]}}}duration'
+    ITUNES_EXPLICIT_TAG = f'{{{FeedFragmentCache.NAMESPACES["itunes"]}}}explicit'
+    PODCAST_CHAPTERS_TAG = f'{{{FeedFragmentCache.NAMESPACES["podcast"]}}}chapters'
+    URL_ATTRIBUTE = 'url'
+    TYPE_ATTRIBUTE = 'type'
+    LENGTH_ATTRIBUTE = 'length'
+    DEFAULT_FILE_TYPE = 'audio/mpeg'
+    EXPLICIT_VALUES = ('yes', 'true', 'explicit')
+
+    def __init__(self, feed_location):
+        self.feed_path = Path(feed_location).resolve()
+        self.skipped_items = []
+        self.oldest_published = None
+
+        if not self.feed_path.is_file():
+            raise ValueError(f"The feed could not be found at '{self.feed_path}'")
+
+    def iterate_episodes(self):
+        from lxml import etree
+
+        for _, item in etree.iterparse(str(self.feed_path), events=('end',), tag=self.ITEM_TAG):
+            try:
+                episode = self._parse_item(item)
+
+                # The archive pages of the feed change from the one of the oldest imported episode onward
+                if self.oldest_published is None or episode.published < self.oldest_published:
+                    self.oldest_published = episode.published
+
+                yield episode
+            except ValueError as exception:
+                # Items that cannot be mapped, e.g. without an enclosure, are reported instead of failing the import
+                self.skipped_items.append((item.findtext(self.TITLE_TAG), exception))
+            finally:
+                item.clear()
+
+                # The already parsed items would otherwise still be referenced by the channel
+                while item.getprevious() is not None:
+                    del item.getparent()[0]
+
+    def _parse_item(self, item):
+        title = (item.findtext(self.TITLE_TAG) or '').strip()
+        enclosure = item.find(self.ENCLOSURE_TAG)
+        published = item.findtext(self.PUBLISHED_TAG)
+        chapters = item.find(self.PODCAST_CHAPTERS_TAG)
+
+        if not title:
+            raise ValueError('The item has no title')
+        if enclosure is None or not enclosure.get(self.URL_ATTRIBUTE):
+            raise ValueError('The item has no enclosure')
+        if not published:
+            raise ValueError('The item has no publishing date')
+
+        description = (
+            item.findtext(self.DESCRIPTION_TAG) or
+            item.findtext(self.CONTENT_ENCODED_TAG) or
+            item.findtext(self.ITUNES_SUMMARY_TAG) or
+            ''
+        )
+
+        try:
+            published = parsedate_to_datetime(published)
+            duration = Episode.parse_duration(item.findtext(self.ITUNES_DURATION_TAG) or 0)
+            file_size = int(enclosure.get(self.LENGTH_ATTRIBUTE) or 0)
+        except (TypeError, ValueError) as exception:
+            raise ValueError(f"The item '{title}' is malformed: '{exception}'")
+
+        if published.tzinfo is None:
+            # RFC 2822 dates with an offset of -0000 lack a timezone, but are meant in UTC
+            published = published.replace(tzinfo=timezone.utc)
+
+        return Episode(
+            title=title,
+            description=description.strip(),
+            duration=duration,
+            file_uri=enclosure.get(self.URL_ATTRIBUTE),
+            file_type=enclosure.get(self.TYPE_ATTRIBUTE) or self.DEFAULT_FILE_TYPE,
+            file_size=file_size,
+            is_explicit=(item.findtext(self.ITUNES_EXPLICIT_TAG) or '').strip().lower() in self.EXPLICIT_VALUES,
+            published=published,
+            chapters_uri=None if chapters is None else chapters.get(self.URL_ATTRIBUTE),
+        )
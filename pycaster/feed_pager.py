@@ -0,0 +1,58 @@
+class FeedPager:
+    ARCHIVE_FILE_NAME_TEMPLATE = 'feed-archive-{page}{extension}'
+    DEFAULT_FILE_EXTENSION = '.xml'
+
+    # Link relations as per RFC 5005
+    CURRENT_REL = 'current'
+    NEXT_REL = 'next'
+    PREV_ARCHIVE_REL = 'prev-archive'
+
+    def __init__(self, page_size, episode_count, first_changed_index=None):
+        self.page_size = page_size
+        self.episode_count = episode_count
+        # Position of the oldest episode that was inserted or changed since the archive pages were published
+        self.first_changed_index = first_changed_index
+
+    def count_archive_pages(self):
+        # Only complete pages are archived, the remaining episodes are solely part of the subscription feed
+        return self.episode_count // self.page_size
+
+    def archive_range(self, page):
+        return (page - 1) * self.page_size, page * self.page_size
+
+    def is_archive_page_changed(self, page):
+        # Every later page changes as well, as the episodes after an inserted one shift by one position
+        return self.first_changed_index is not None and page > self.first_changed_index // self.page_size
+
+    def latest_range(self):
+        return max(0, self.episode_count - self.page_size), self.episode_count
+
+    def build_subscription_links(self, build_feed_uri, file_extension=DEFAULT_FILE_EXTENSION):
+        newest_archive_page = self.count_archive_pages()
+
+        if newest_archive_page == 0:
+            return []
+
+        newest_archive_uri = build_feed_uri(self.build_archive_file_name(newest_archive_page, file_extension))
+
+        return [
+            (self.PREV_ARCHIVE_REL, newest_archive_uri),
+            (self.NEXT_REL, newest_archive_uri),
+        ]
+
+    def build_archive_links(
+            self, page, build_feed_uri, subscription_file_name, file_extension=DEFAULT_FILE_EXTENSION,
+    ):
+        # Archive pages only link to older pages, so that they do not change along with the newer ones
+        links = [(self.CURRENT_REL, build_feed_uri(subscription_file_name))]
+
+        if page > 1:
+            previous_archive_uri = build_feed_uri(self.build_archive_file_name(page - 1, file_extension))
+            links.append((self.PREV_ARCHIVE_REL, previous_archive_uri))
+            links.append((self.NEXT_REL, previous_archive_uri))
+
+        return links
+
+    @classmethod
+    def build_archive_file_name(cls, page, file_extension=DEFAULT_FILE_EXTENSION):
+        return cls.ARCHIVE_FILE_NAME_TEMPLATE.format(page=page, extension=file_extension)
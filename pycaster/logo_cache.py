@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import requests
+
+
+class LogoCache:
+    DEFAULT_TIMEOUT = 10
+    NOT_MODIFIED_STATUS_CODE = 304
+    IMAGE_FILE_EXTENSION = '.img'
+    METADATA_FILE_EXTENSION = '.json'
+
+    CONTENT_TYPE_HEADER = 'content-type'
+    ETAG_HEADER = 'ETag'
+    LAST_MODIFIED_HEADER = 'Last-Modified'
+    IF_NONE_MATCH_HEADER = 'If-None-Match'
+    IF_MODIFIED_SINCE_HEADER = 'If-Modified-Since'
+
+    def __init__(self, cache_directory, timeout=DEFAULT_TIMEOUT):
+        self.cache_directory = Path(cache_directory).resolve()
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.logos = {}
+        self.lock = threading.Lock()
+
+    def retrieve(self, uri):
+        # Concurrent callers wait for the first one, hence one process revalidates every logo at most once
+        with self.lock:
+            if uri not in self.logos:
+                self.logos[uri] = self._revalidate(uri)
+            return self.logos[uri]
+
+    def _revalidate(self, uri):
+        cached_logo, metadata = self._load(uri)
+
+        headers = {}
+        if cached_logo is not None:
+            if metadata.get(self.ETAG_HEADER):
+                headers[self.IF_NONE_MATCH_HEADER] = metadata[self.ETAG_HEADER]
+            if metadata.get(self.LAST_MODIFIED_HEADER):
+                headers[self.IF_MODIFIED_SINCE_HEADER] = metadata[self.LAST_MODIFIED_HEADER]
+
+        try:
+            response = self.session.get(uri, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            # An unreachable logo host does not have to stop a publish as long as a copy is at hand
+            if cached_logo is None:
+                raise
+            return cached_logo, metadata[self.CONTENT_TYPE_HEADER]
+
+        if cached_logo is not None and response.status_code == self.NOT_MODIFIED_STATUS_CODE:
+            return cached_logo, metadata[self.CONTENT_TYPE_HEADER]
+
+        response.raise_for_status()
+
+        metadata = {
+            self.CONTENT_TYPE_HEADER: response.headers[self.CONTENT_TYPE_HEADER],
+            self.ETAG_HEADER: response.headers.get(self.ETAG_HEADER),
+            self.LAST_MODIFIED_HEADER: response.headers.get(self.LAST_MODIFIED_HEADER),
+        }
+        self._store(uri, response.content, metadata)
+
+        return response.content, metadata[self.CONTENT_TYPE_HEADER]
+
+    def _load(self, uri):
+        image_path, metadata_path = self._build_paths(uri)
+
+        try:
+            with open(str(metadata_path)) as metadata_file:
+                metadata = json.load(metadata_file)
+            with open(str(image_path), 'rb') as image_file:
+                return image_file.read(), metadata
+        except (FileNotFoundError, ValueError):
+            return None, {}
+
+    def _store(self, uri, logo, metadata):
+        image_path, metadata_path = self._build_paths(uri)
+
+        # The image is replaced before its metadata, so new validators are never paired with an outdated image
+        for path, content, mode in ((image_path, logo, 'wb'), (metadata_path, json.dumps(metadata), 'w')):
+            temporary_path = path.with_name(f'{path.name}.tmp')
+
+            with open(str(temporary_path), mode) as file:
+                file.write(content)
+
+            os.replace(str(temporary_path), str(path))
+
+    def _build_paths(self, uri):
+        key = hashlib.sha256(uri.encode('utf-8')).hexdigest()
+        return (
+            self.cache_directory / f'{key}{self.IMAGE_FILE_EXTENSION}',
+            self.cache_directory / f'{key}{self.METADATA_FILE_EXTENSION}',
+        )
@@ -0,0 +1,107 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+
+class ManifestEntry:
+    def __init__(
+            self, title, description, duration, file_location, file_uri, is_explicit, release=None, chapters_uri=None,
+    ):
+        self.title = title
+        self.description = description
+        self.duration = duration
+        self.file_location = file_location
+        self.file_uri = file_uri
+        self.is_explicit = is_explicit
+        self.release = release
+        self.chapters_uri = chapters_uri
+
+
+class Manifest:
+    CSV_FILE_EXTENSION = '.csv'
+    JSON_FILE_EXTENSION = '.json'
+
+    # Manifest keys
+    TITLE_KEY = 'title'
+    DESCRIPTION_KEY = 'description'
+    DURATION_KEY = 'duration'
+    FILE_KEY = 'file'
+    FILE_URI_KEY = 'fileuri'
+    IS_EXPLICIT_KEY = 'explicit'
+    RELEASE_KEY = 'release'
+    CHAPTERS_KEY = 'chapters'
+
+    DEFAULT_IS_EXPLICIT = 'no'
+
+    def __init__(self, manifest_location):
+        self.manifest_path = Path(manifest_location).resolve()
+        self.entries = self._load_entries()
+
+    def _load_entries(self):
+        if not self.manifest_path.is_file():
+            raise ValueError(f"The manifest file could not be found at '{self.manifest_path}'")
+
+        if self.manifest_path.suffix.lower() == self.CSV_FILE_EXTENSION:
+            rows = self._read_csv_rows()
+        elif self.manifest_path.suffix.lower() == self.JSON_FILE_EXTENSION:
+            rows = self._read_json_rows()
+        else:
+            raise ValueError(f"The manifest file has to be either a CSV or a JSON file: '{self.manifest_path}'")
+
+        if not rows:
+            raise ValueError(f"The manifest file does not contain any episodes: '{self.manifest_path}'")
+
+        return [self._deserialize_entry(row) for row in rows]
+
+    def _read_csv_rows(self):
+        with open(str(self.manifest_path), 'r', newline='') as file:
+            return list(csv.DictReader(file))
+
+    def _read_json_rows(self):
+        with open(str(self.manifest_path), 'r') as file:
+            return json.loads(file.read())
+
+    def _deserialize_entry(self, row):
+        return ManifestEntry(
+            title=row.get(self.TITLE_KEY),
+            description=row.get(self.DESCRIPTION_KEY),
+            duration=row.get(self.DURATION_KEY),
+            file_location=self._resolve_file_location(row.get(self.FILE_KEY)),
+            file_uri=row.get(self.FILE_URI_KEY) or None,
+            is_explicit=row.get(self.IS_EXPLICIT_KEY) or self.DEFAULT_IS_EXPLICIT,
+            release=row.get(self.RELEASE_KEY) or None,
+            chapters_uri=row.get(self.CHAPTERS_KEY) or None,
+        )
+
+    def _resolve_file_location(self, file_location):
+        if not file_location:
+            return file_location
+        # Relative paths in a manifest are relative to the manifest itself, not to the working directory
+        return os.path.abspath(str(self.manifest_path.parent / file_location))
+
+
+class Sidecar(Manifest):
+    """
+    The metadata of a single episode, stored in a JSON file next to the episode file, e.g. `episode-1.json`
+    for `episode-1.mp3`. It uses the keys of a manifest, but the `file` key defaults to the episode file.
+    """
+
+    def __init__(self, sidecar_location, file_location):
+        self.file_location = file_location
+        super().__init__(sidecar_location)
+
+    @property
+    def entry(self):
+        return self.entries[0]
+
+    def _load_entries(self):
+        if not self.manifest_path.is_file():
+            raise ValueError(f"The sidecar file could not be found at '{self.manifest_path}'")
+
+        row = self._read_json_rows()
+
+        if not isinstance(row, dict):
+            raise ValueError(f"The sidecar file has to contain a single JSON object: '{self.manifest_path}'")
+
+        return [self._deserialize_entry({self.FILE_KEY: str(self.file_location), **row})]
@@ -0,0 +1,164 @@
+import hashlib
+from pathlib import Path
+
+import eyed3
+from eyed3.id3.tag import Tag
+
+
+class PaddedTag(Tag):
+    # Leaves room for a re-tag, e.g. a new title or logo, to be written in place instead of copying the whole file
+    RESERVED_PADDING_SIZE = 64 * 1024
+    # `Tag._render` is private to eyed3, its arguments and result are the ones of this release series
+    EYED3_VERSION_PREFIX = '0.9.'
+
+    def __init__(self, *args, **kwargs):
+        if not eyed3.version.startswith(self.EYED3_VERSION_PREFIX):
+            raise RuntimeError(f"Tags are padded for eyed3 {self.EYED3_VERSION_PREFIX}x, not for eyed3 {eyed3.version}")
+
+        super().__init__(*args, **kwargs)
+
+    def _render(self, version, curr_tag_size, max_padding_size):
+        rewrite_required, tag_data, padding = super()._render(version, curr_tag_size, max_padding_size)
+
+        if rewrite_required and len(padding) < self.RESERVED_PADDING_SIZE:
+            # The file is copied anyway, so the tag is rendered again as if the current one had room for its frames
+            # and the reserved padding. eyed3 fills that difference with padding, its rewrite flag is ignored.
+            _, tag_data, padding = super()._render(version, len(tag_data) + self.RESERVED_PADDING_SIZE, None)
+
+        return rewrite_required, tag_data, padding
+
+
+class MediaFile:
+    READ_CHUNK_SIZE = 1024 * 1024
+
+    ID3V2_IDENTIFIER = b'ID3'
+    ID3V2_HEADER_SIZE = 10
+    ID3V2_FOOTER_FLAG = 0x10
+    XING_IDENTIFIERS = (b'Xing', b'Info')
+    # Large enough for a frame header, its side information and a Xing identifier
+    FRAME_LOOKAHEAD_SIZE = 4 + 32 + 4
+
+    MPEG_VERSION_1 = 3
+    MPEG_VERSION_2 = 2
+    MPEG_VERSION_2_5 = 0
+    LAYER_1 = 3
+    LAYER_2 = 2
+    LAYER_3 = 1
+    MONO_CHANNEL_MODE = 3
+
+    BITRATES = {
+        (MPEG_VERSION_1, LAYER_1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        (MPEG_VERSION_1, LAYER_2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        (MPEG_VERSION_1, LAYER_3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+        (MPEG_VERSION_2, LAYER_1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        (MPEG_VERSION_2, LAYER_2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        (MPEG_VERSION_2, LAYER_3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    }
+    SAMPLE_RATES = {
+        MPEG_VERSION_1: (44100, 48000, 32000),
+        MPEG_VERSION_2: (22050, 24000, 16000),
+        MPEG_VERSION_2_5: (11025, 12000, 8000),
+    }
+
+    def __init__(self, content_hash, duration, size):
+        self.content_hash = content_hash
+        self.duration = duration
+        self.size = size
+
+    @classmethod
+    def ingest(cls, file_location):
+        content_hash = hashlib.sha256()
+        size = 0
+        seconds = 0.0
+
+        pending = b''
+        skip_size = 0
+        is_first_frame = True
+
+        with open(str(Path(file_location).resolve()), 'rb') as file:
+            for chunk in iter(lambda: file.read(cls.READ_CHUNK_SIZE), b''):
+                content_hash.update(chunk)
+                size += len(chunk)
+
+                # Frames are walked header by header, the bytes in between are skipped without being inspected
+                data = pending + chunk
+                position = min(skip_size, len(data))
+                skip_size -= position
+
+                while len(data) - position >= cls.FRAME_LOOKAHEAD_SIZE:
+                    if size - len(data) + position == 0 and data.startswith(cls.ID3V2_IDENTIFIER):
+                        frame_size, frame_seconds = cls._parse_id3v2_tag_size(data), 0.0
+                    else:
+                        frame_size, frame_seconds = cls._parse_frame(data, position, is_first_frame)
+
+                        if frame_size is None:
+                            # Out of sync, e.g. because of trailing tags, so continued at the next possible frame
+                            next_position = data.find(b'\xff', position + 1)
+                            position = len(data) if next_position == -1 else next_position
+                            continue
+
+                        is_first_frame = False
+
+                    seconds += frame_seconds
+                    skip_size = max(0, position + frame_size - len(data))
+                    position = min(position + frame_size, len(data))
+
+                pending = data[position:]
+
+        return cls(content_hash=content_hash.hexdigest(), duration=round(seconds), size=size)
+
+    @classmethod
+    def _parse_id3v2_tag_size(cls, data):
+        # The tag size is stored as a syncsafe integer, only seven bits of each byte are used
+        tag_size = 0
+        for byte in data[6:10]:
+            tag_size = (tag_size << 7) | (byte & 0x7F)
+
+        footer_size = cls.ID3V2_HEADER_SIZE if data[5] & cls.ID3V2_FOOTER_FLAG else 0
+
+        return cls.ID3V2_HEADER_SIZE + tag_size + footer_size
+
+    @classmethod
+    def _parse_frame(cls, data, position, is_first_frame):
+        if data[position] != 0xFF or data[position + 1] & 0xE0 != 0xE0:
+            return None, 0.0
+
+        version = (data[position + 1] >> 3) & 0x03
+        layer = (data[position + 1] >> 1) & 0x03
+        bitrate_index = data[position + 2] >> 4
+        sample_rate_index = (data[position + 2] >> 2) & 0x03
+        padding = (data[position + 2] >> 1) & 0x01
+        channel_mode = data[position + 3] >> 6
+
+        if version not in cls.SAMPLE_RATES or layer == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+            return None, 0.0
+
+        # MPEG 2.5 shares the bitrates of MPEG 2
+        bitrate_version = cls.MPEG_VERSION_1 if version == cls.MPEG_VERSION_1 else cls.MPEG_VERSION_2
+        bitrate = cls.BITRATES[(bitrate_version, layer)][bitrate_index] * 1000
+        sample_rate = cls.SAMPLE_RATES[version][sample_rate_index]
+
+        if layer == cls.LAYER_1:
+            samples = 384
+            frame_size = (12 * bitrate // sample_rate + padding) * 4
+        elif layer == cls.LAYER_2 or version == cls.MPEG_VERSION_1:
+            samples = 1152
+            frame_size = 144 * bitrate // sample_rate + padding
+        else:
+            samples = 576
+            frame_size = 72 * bitrate // sample_rate + padding
+
+        if is_first_frame and layer == cls.LAYER_3:
+            # The first frame of a VBR file might only carry the Xing header instead of audio
+            is_mono = channel_mode == cls.MONO_CHANNEL_MODE
+            if version == cls.MPEG_VERSION_1:
+                side_information_size = 17 if is_mono else 32
+            else:
+                side_information_size = 9 if is_mono else 17
+
+            identifier_position = position + 4 + side_information_size
+            if data[identifier_position:identifier_position + 4] in cls.XING_IDENTIFIERS:
+                # Not counted as audio, but still in sync with the frames that follow
+                return frame_size, 0.0
+
+        return frame_size, samples / sample_rate
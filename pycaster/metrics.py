@@ -0,0 +1,194 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class Metrics:
+    STDERR_LOG_FILE = '-'
+    PROMETHEUS_PREFIX = 'pycaster'
+
+    # Counters
+    UPLOADED_BYTES = 'uploaded_bytes'
+    UPLOADED_FILES = 'uploaded_files'
+    SKIPPED_UPLOADS = 'skipped_uploads'
+    RETRIES = 'retries'
+
+    def __init__(self, command, log_file=None, prometheus_textfile=None, show=None, lock=None):
+        self.command = command
+        self.log_file = log_file
+        self.prometheus_textfile = prometheus_textfile
+        self.show = show
+        self.started = time.time()
+        self.started_monotonic = time.monotonic()
+        self.stage_durations = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.failed_stage = None
+        self.lock = lock or threading.Lock()
+
+    def for_show(self, show):
+        # Every show of a network is reported as a run of its own, with a textfile of its own for the node exporter
+        prometheus_textfile = None
+        if self.prometheus_textfile:
+            textfile_path = Path(self.prometheus_textfile)
+            prometheus_textfile = str(textfile_path.with_name(f'{textfile_path.stem}-{show}{textfile_path.suffix}'))
+
+        # Shares the lock, as the shows of a network are run concurrently and append to the same log file
+        return Metrics(self.command, self.log_file, prometheus_textfile, show=show, lock=self.lock)
+
+    def restart(self):
+        # A long-running process, like the watch daemon, reports every batch it publishes as a run of its own
+        with self.lock:
+            self.started = time.time()
+            self.started_monotonic = time.monotonic()
+            self.stage_durations.clear()
+            self.counters.clear()
+            self.failed_stage = None
+
+    @contextmanager
+    def stage(self, name, **details):
+        # The body may add details that are only known at the end of the stage, e.g. the number of bytes sent
+        started = time.monotonic()
+
+        try:
+            yield details
+        except BaseException as exception:
+            with self.lock:
+                # Nested stages fail from the inside out, so the innermost one is the actual culprit
+                if self.failed_stage is None:
+                    self.failed_stage = name
+
+            self._record_stage(name, started, details, exception)
+            raise
+
+        self._record_stage(name, started, details)
+
+    def timed_iterator(self, name, iterable):
+        # Measures the time spent producing the items only, not the time the consumer spends on them
+        iterator = iter(iterable)
+        duration = 0.0
+        count = 0
+
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    duration += time.monotonic() - started
+
+                count += 1
+                yield item
+        finally:
+            with self.lock:
+                self.stage_durations[name] += duration
+
+            self._write_event({'event': 'stage', 'stage': name, 'duration_seconds': duration, 'items': count})
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def finish(self, exception=None):
+        duration = time.monotonic() - self.started_monotonic
+
+        event = {
+            'event': 'run',
+            'status': 'error' if exception else 'success',
+            'duration_seconds': duration,
+            'stage_durations_seconds': dict(self.stage_durations),
+            **self.counters,
+        }
+        if exception is not None:
+            event.update(self._describe_exception(exception))
+            event['failed_stage'] = self.failed_stage
+
+        self._write_event(event)
+
+        if self.prometheus_textfile:
+            self._write_prometheus_textfile(duration, exception is None)
+
+    def _record_stage(self, name, started, details, exception=None):
+        duration = time.monotonic() - started
+
+        with self.lock:
+            self.stage_durations[name] += duration
+
+        event = {'event': 'stage', 'stage': name, 'duration_seconds': duration, **details}
+        if exception is not None:
+            event.update(self._describe_exception(exception))
+
+        self._write_event(event)
+
+    def _write_event(self, event):
+        if not self.log_file:
+            return
+
+        if self.show is not None:
+            event = {'show': self.show, **event}
+
+        line = json.dumps(
+            {'timestamp': time.time(), 'command': self.command, **event},
+            sort_keys=True,
+            default=str,
+        )
+
+        with self.lock:
+            if self.log_file == self.STDERR_LOG_FILE:
+                sys.stderr.write(f'{line}\n')
+                sys.stderr.flush()
+            else:
+                with open(self.log_file, 'a') as log_file:
+                    log_file.write(f'{line}\n')
+
+    def _write_prometheus_textfile(self, duration, succeeded):
+        labels = f'command="{self.command}"'
+        if self.show is not None:
+            labels += f',show="{self.show}"'
+        lines = [
+            f'# HELP {self.PROMETHEUS_PREFIX}_last_run_success Whether the last run succeeded.',
+            f'# TYPE {self.PROMETHEUS_PREFIX}_last_run_success gauge',
+            f'{self.PROMETHEUS_PREFIX}_last_run_success{{{labels}}} {int(succeeded)}',
+            f'# HELP {self.PROMETHEUS_PREFIX}_last_run_timestamp_seconds When the last run started.',
+            f'# TYPE {self.PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge',
+            f'{self.PROMETHEUS_PREFIX}_last_run_timestamp_seconds{{{labels}}} {self.started}',
+            f'# HELP {self.PROMETHEUS_PREFIX}_last_run_duration_seconds How long the last run took.',
+            f'# TYPE {self.PROMETHEUS_PREFIX}_last_run_duration_seconds gauge',
+            f'{self.PROMETHEUS_PREFIX}_last_run_duration_seconds{{{labels}}} {duration}',
+            f'# HELP {self.PROMETHEUS_PREFIX}_last_run_stage_duration_seconds Time spent per stage in the last run.',
+            f'# TYPE {self.PROMETHEUS_PREFIX}_last_run_stage_duration_seconds gauge',
+        ]
+
+        with self.lock:
+            stage_durations = sorted(self.stage_durations.items())
+            counters = sorted(self.counters.items())
+
+        lines.extend(
+            f'{self.PROMETHEUS_PREFIX}_last_run_stage_duration_seconds{{{labels},stage="{stage}"}} {stage_duration}'
+            for stage, stage_duration in stage_durations
+        )
+
+        for counter, value in counters:
+            lines.extend([
+                f'# TYPE {self.PROMETHEUS_PREFIX}_last_run_{counter} gauge',
+                f'{self.PROMETHEUS_PREFIX}_last_run_{counter}{{{labels}}} {value}',
+            ])
+
+        # Written to a temporary file first, so that the node exporter never collects a partially written file
+        textfile_path = Path(self.prometheus_textfile)
+        temporary_path = textfile_path.with_name(f'.{textfile_path.name}.tmp')
+
+        with open(str(temporary_path), 'w') as textfile:
+            textfile.write('\n'.join(lines) + '\n')
+
+        os.replace(str(temporary_path), str(textfile_path))
+
+    @staticmethod
+    def _describe_exception(exception):
+        return {'error_type': type(exception).__name__, 'error': str(exception)}
@@ -0,0 +1,62 @@
+import threading
+from collections import defaultdict
+
+
+class IndexedObject:
+    def __init__(self, key, size, etag, content_hash=None):
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.content_hash = content_hash
+
+
+class ObjectIndex:
+    def __init__(self):
+        self.objects = {}
+        self.objects_by_size = defaultdict(dict)
+        self.indexed_paths = set()
+        # Re-entrant, so that callers can hold it while checking for and filling in a missing upload path
+        self.lock = threading.RLock()
+
+    def clear(self):
+        with self.lock:
+            self.objects.clear()
+            self.objects_by_size.clear()
+            self.indexed_paths.clear()
+
+    def is_indexed(self, bucket, file_path):
+        with self.lock:
+            return any(
+                indexed_bucket == bucket and file_path.startswith(f'{indexed_path}/')
+                for indexed_bucket, indexed_path in self.indexed_paths
+            )
+
+    def index(self, bucket, upload_path, remote_objects):
+        with self.lock:
+            for key, size, etag in remote_objects:
+                self.add(bucket, key, size, etag)
+
+            self.indexed_paths.add((bucket, upload_path))
+
+    def lookup(self, bucket, file_path):
+        with self.lock:
+            return self.objects.get((bucket, file_path))
+
+    def find_by_size(self, bucket, size):
+        with self.lock:
+            return list(self.objects_by_size[(bucket, size)].values())
+
+    def add(self, bucket, file_path, size, etag=None, content_hash=None):
+        with self.lock:
+            self.remove(bucket, file_path)
+
+            indexed_object = IndexedObject(file_path, size, etag, content_hash)
+            self.objects[(bucket, file_path)] = indexed_object
+            self.objects_by_size[(bucket, size)][file_path] = indexed_object
+
+    def remove(self, bucket, file_path):
+        with self.lock:
+            indexed_object = self.objects.pop((bucket, file_path), None)
+
+            if indexed_object is not None:
+                self.objects_by_size[(bucket, indexed_object.size)].pop(file_path, None)
@@ -0,0 +1,301 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+
+class ServedDocument:
+    """
+    A rendered document of the feed, along with its gzip-compressed variant and the validators of both.
+    """
+    GZIP_ETAG_SUFFIX = '-gzip'
+
+    def __init__(self, body, mime_type, last_modified):
+        self.body = body
+        self.mime_type = mime_type
+        self.last_modified = last_modified
+        # Compressed once per rebuild instead of on every request, a fixed modification time keeps it reproducible
+        self.compressed_body = gzip.compress(body, mtime=0)
+
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Both variants differ in their bytes, hence they need distinct strong validators
+        self.etag = f'"{digest}"'
+        self.compressed_etag = f'"{digest}{self.GZIP_ETAG_SUFFIX}"'
+
+
+class OriginServer(ThreadingHTTPServer):
+    """
+    Serves the documents of the feed from memory and the episode files from a local directory, laid out under the
+    same paths as in the bucket. The documents are only rendered again once `is_feed_stale` reports a change.
+    """
+    daemon_threads = True
+
+    def __init__(
+            self,
+            server_address,
+            feed_path,
+            episode_path,
+            episode_directory,
+            render_documents,
+            is_feed_stale,
+            cache_control=None,
+    ):
+        self.feed_path = feed_path.strip('/')
+        self.episode_path = episode_path.strip('/')
+        self.episode_directory = Path(episode_directory).resolve()
+        self.render_documents = render_documents
+        self.is_feed_stale = is_feed_stale
+        self.cache_control = cache_control
+        self.documents = None
+        # Also serializes every access to the database, which the rendering shares with the staleness check
+        self.documents_lock = threading.Lock()
+
+        if not self.episode_directory.is_dir():
+            raise ValueError(f"The episode directory could not be found at '{self.episode_directory}'")
+
+        super().__init__(server_address, OriginRequestHandler)
+
+    def find_document(self, file_name):
+        with self.documents_lock:
+            if self.documents is None or self.is_feed_stale():
+                self._rebuild_documents()
+
+            return self.documents.get(file_name)
+
+    def refresh_documents(self):
+        with self.documents_lock:
+            self._rebuild_documents()
+
+    def find_episode_file(self, file_name):
+        # Only plain file names within the episode directory, never a way out of it
+        if file_name in ('', '.', '..') or '\\' in file_name:
+            return None
+
+        episode_file = self.episode_directory / file_name
+
+        return episode_file if episode_file.is_file() else None
+
+    def _rebuild_documents(self):
+        # HTTP dates have a resolution of seconds
+        rendered_at = datetime.now(timezone.utc).replace(microsecond=0)
+        previous_documents = self.documents or {}
+        documents = {}
+
+        for file_name, (body, mime_type) in self.render_documents().items():
+            previous_document = previous_documents.get(file_name)
+
+            # Documents whose bytes did not change keep their validators, so that clients keep getting a 304
+            if previous_document is not None and previous_document.body == body:
+                documents[file_name] = previous_document
+            else:
+                documents[file_name] = ServedDocument(body, mime_type, rendered_at)
+
+        self.documents = documents
+
+
+class OriginRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'pycaster'
+    # Keeps the connections of a CDN alive, every response states its length
+    protocol_version = 'HTTP/1.1'
+    # A single range of bytes, several ranges at once are answered with the whole file
+    RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+    GZIP_CODINGS = ('gzip', 'x-gzip', '*')
+    DEFAULT_MIME_TYPE = 'application/octet-stream'
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        directory, _, file_name = unquote(urlsplit(self.path).path).strip('/').rpartition('/')
+
+        if directory == self.server.feed_path:
+            document = self.server.find_document(file_name)
+
+            if document is not None:
+                return self._send_document(document, send_body)
+
+        if directory == self.server.episode_path:
+            episode_file = self.server.find_episode_file(file_name)
+
+            if episode_file is not None:
+                return self._send_episode_file(episode_file, send_body)
+
+        self._send_empty_response(HTTPStatus.NOT_FOUND)
+
+    def _send_document(self, document: ServedDocument, send_body):
+        compressed = self._accepts_gzip()
+        etag = document.compressed_etag if compressed else document.etag
+        headers = {
+            'ETag': etag,
+            'Last-Modified': format_datetime(document.last_modified, usegmt=True),
+            'Vary': 'Accept-Encoding',
+        }
+
+        if self.server.cache_control:
+            headers['Cache-Control'] = self.server.cache_control
+
+        if self._is_not_modified(etag, document.last_modified):
+            return self._send_empty_response(HTTPStatus.NOT_MODIFIED, headers)
+
+        body = document.compressed_body if compressed else document.body
+        headers['Content-Type'] = document.mime_type
+        headers['Content-Length'] = str(len(body))
+
+        if compressed:
+            headers['Content-Encoding'] = 'gzip'
+
+        self._send_headers(HTTPStatus.OK, headers)
+
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_episode_file(self, episode_file, send_body):
+        stat = episode_file.stat()
+        file_size = stat.st_size
+        last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        etag = f'"{stat.st_mtime_ns:x}-{file_size:x}"'
+        headers = {
+            'Accept-Ranges': 'bytes',
+            'ETag': etag,
+            'Last-Modified': format_datetime(last_modified, usegmt=True),
+        }
+
+        if self._is_not_modified(etag, last_modified):
+            return self._send_empty_response(HTTPStatus.NOT_MODIFIED, headers)
+
+        try:
+            byte_range = self._parse_range(file_size, etag, last_modified)
+        except ValueError:
+            headers['Content-Range'] = f'bytes */{file_size}'
+            return self._send_empty_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers)
+
+        status = HTTPStatus.OK
+        offset, count = 0, file_size
+
+        if byte_range is not None:
+            status = HTTPStatus.PARTIAL_CONTENT
+            offset, last_byte = byte_range
+            count = last_byte - offset + 1
+            headers['Content-Range'] = f'bytes {offset}-{last_byte}/{file_size}'
+
+        headers['Content-Type'] = mimetypes.guess_type(episode_file.name)[0] or self.DEFAULT_MIME_TYPE
+        headers['Content-Length'] = str(count)
+
+        self._send_headers(status, headers)
+
+        if send_body and count:
+            with open(str(episode_file), 'rb') as file:
+                try:
+                    # Zero-copy through sendfile(2) where the platform offers it, otherwise copied in chunks
+                    self.connection.sendfile(file, offset=offset, count=count)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Players regularly abort a download to seek elsewhere in the episode
+                    self.close_connection = True
+
+    def _parse_range(self, file_size, etag, last_modified):
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+
+        if not range_header:
+            return None
+
+        # A range of a file that changed meanwhile would be spliced into an outdated copy, hence it is sent in full
+        if if_range and if_range not in (etag, format_datetime(last_modified, usegmt=True)):
+            return None
+
+        match = self.RANGE_PATTERN.match(range_header.replace(' ', ''))
+
+        if match is None or match.groups() == ('', ''):
+            return None
+
+        first_byte, last_byte = match.groups()
+
+        if not first_byte:
+            suffix_length = int(last_byte)
+
+            if suffix_length == 0 or file_size == 0:
+                raise ValueError('The range is not satisfiable')
+
+            return max(0, file_size - suffix_length), file_size - 1
+
+        first_byte = int(first_byte)
+
+        if last_byte and int(last_byte) < first_byte:
+            # Syntactically invalid, which is ignored as if there was no range
+            return None
+
+        if first_byte >= file_size:
+            raise ValueError('The range is not satisfiable')
+
+        return first_byte, min(int(last_byte), file_size - 1) if last_byte else file_size - 1
+
+    def _accepts_gzip(self):
+        for coding in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, parameters = coding.partition(';')
+
+            if name.strip().lower() not in self.GZIP_CODINGS:
+                continue
+
+            quality = parameters.strip()
+            if quality.startswith('q='):
+                try:
+                    return float(quality[2:]) > 0
+                except ValueError:
+                    return False
+
+            return True
+
+        return False
+
+    def _is_not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get('If-None-Match')
+
+        if if_none_match is not None:
+            # Compared weakly as per RFC 7232, and If-Modified-Since is ignored along with it
+            entity_tags = [entity_tag.strip() for entity_tag in if_none_match.split(',')]
+            return '*' in entity_tags or any(
+                (entity_tag[2:] if entity_tag.startswith('W/') else entity_tag) == etag
+                for entity_tag in entity_tags
+            )
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+
+        if if_modified_since is None:
+            return False
+
+        try:
+            modified_since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        if modified_since is None or modified_since.tzinfo is None:
+            return False
+
+        return last_modified <= modified_since
+
+    def _send_empty_response(self, status, headers=None):
+        headers = dict(headers or {})
+
+        # A 304 never has a body, its length would rather be taken for the one of the cached representation
+        if status != HTTPStatus.NOT_MODIFIED:
+            headers['Content-Length'] = '0'
+
+        self._send_headers(status, headers)
+
+    def _send_headers(self, status, headers):
+        self.send_response(status)
+
+        for name, value in headers.items():
+            self.send_header(name, value)
+
+        self.end_headers()
@@ -0,0 +1,65 @@
+import uuid
+
+from feedgen.ext.base import BaseEntryExtension, BaseExtension
+from feedgen.util import xml_elem
+
+from feed_cache import FeedFragmentCache
+
+
+class PodcastIndexExtension(BaseExtension):
+    """
+    The channel tags of the Podcasting 2.0 namespace, as per https://podcastindex.org/namespace/1.0.
+    Registered with feedgen under the name `podcastindex`, as the `podcast` extension is the iTunes one.
+    """
+    NAME = 'podcastindex'
+    NAMESPACE = FeedFragmentCache.NAMESPACES['podcast']
+    # The namespace UUID of podcast GUIDs, as defined by the specification
+    GUID_NAMESPACE = uuid.UUID('ead4c236-bf58-58c6-a2c6-a6b28d128cb6')
+
+    def __init__(self):
+        self.__guid = None
+
+    def extend_ns(self):
+        return {'podcast': self.NAMESPACE}
+
+    def extend_rss(self, feed):
+        channel = feed[0]
+
+        if self.__guid:
+            guid = xml_elem(f'{{{self.NAMESPACE}}}guid', channel)
+            guid.text = self.__guid
+
+        return feed
+
+    def guid(self, guid=None):
+        if guid is not None:
+            self.__guid = guid
+        return self.__guid
+
+    @classmethod
+    def build_guid(cls, feed_uri):
+        # Derived from the feed URI without its scheme and trailing slashes, so every app computes the same GUID
+        return str(uuid.uuid5(cls.GUID_NAMESPACE, feed_uri.split('://', 1)[-1].rstrip('/')))
+
+
+class PodcastIndexEntryExtension(BaseEntryExtension):
+    CHAPTERS_MIME_TYPE = 'application/json+chapters'
+
+    def __init__(self):
+        self.__chapters = None
+
+    def extend_rss(self, entry):
+        if self.__chapters:
+            xml_elem(
+                f'{{{PodcastIndexExtension.NAMESPACE}}}chapters',
+                entry,
+                url=self.__chapters,
+                type=self.CHAPTERS_MIME_TYPE,
+            )
+
+        return entry
+
+    def chapters(self, chapters_uri=None):
+        if chapters_uri is not None:
+            self.__chapters = chapters_uri
+        return self.__chapters
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class PublishJournal:
+    """
+    A write-ahead journal of the stages each episode completed while being published, along with their outputs.
+    Every change of an episode's state is appended and synced to its journal file before the run moves on,
+    so that a rerun after a failure or a crash resumes each episode from its first incomplete stage.
+    The journal file is removed once the whole publication, including the feed and the backup, succeeded.
+    """
+    JOURNAL_FILE_EXTENSION = '.jsonl'
+    STAGES_KEY = 'stages'
+
+    # Stages
+    INGESTED_STAGE = 'ingested'
+    UPLOADED_STAGE = 'uploaded'
+    INSERTED_STAGE = 'inserted'
+
+    def __init__(self, journal_directory):
+        self.journal_directory = Path(journal_directory).resolve()
+        self.journal_directory.mkdir(parents=True, exist_ok=True)
+        self.states = {}
+        # The stages of one episode are recorded by different threads of the publish pipeline
+        self.lock = threading.Lock()
+
+    def load(self, file_uri):
+        with self.lock:
+            return dict(self._load_state(file_uri))
+
+    def has_completed(self, file_uri, stage):
+        return stage in self.load(file_uri).get(self.STAGES_KEY, [])
+
+    def record(self, file_uri, stage, restart=False, **outputs):
+        with self.lock:
+            state = {} if restart else dict(self._load_state(file_uri))
+            stages = [completed for completed in state.get(self.STAGES_KEY, []) if completed != stage]
+
+            state.update(outputs)
+            state[self.STAGES_KEY] = stages + [stage]
+
+            self._append_state(file_uri, state)
+
+    def revert(self, file_uri, stage):
+        with self.lock:
+            state = dict(self._load_state(file_uri))
+            stages = state.get(self.STAGES_KEY, [])
+
+            if stage in stages:
+                state[self.STAGES_KEY] = [completed for completed in stages if completed != stage]
+                self._append_state(file_uri, state)
+
+    def complete(self, file_uris):
+        with self.lock:
+            for file_uri in file_uris:
+                self.states.pop(file_uri, None)
+
+                try:
+                    os.remove(str(self._build_journal_path(file_uri)))
+                except FileNotFoundError:
+                    pass
+
+    def _load_state(self, file_uri):
+        if file_uri not in self.states:
+            self.states[file_uri] = self._read_latest_state(file_uri)
+
+        return self.states[file_uri]
+
+    def _read_latest_state(self, file_uri):
+        state = {}
+        intact_size = 0
+
+        try:
+            with open(str(self._build_journal_path(file_uri)), 'r+b') as journal_file:
+                for line in journal_file:
+                    if not line.endswith(b'\n'):
+                        # Torn by a crash while being appended, cut off so that the next state starts on a line
+                        # of its own, while the state before it is still intact
+                        journal_file.truncate(intact_size)
+                        break
+
+                    intact_size += len(line)
+                    state = json.loads(line.decode())
+        except FileNotFoundError:
+            pass
+
+        return state
+
+    def _append_state(self, file_uri, state):
+        # Every line holds the complete state, so that the latest intact line is all a rerun has to read
+        with open(str(self._build_journal_path(file_uri)), 'a') as journal_file:
+            journal_file.write(json.dumps(state, sort_keys=True) + '\n')
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+        self.states[file_uri] = state
+
+    def _build_journal_path(self, file_uri):
+        file_name = hashlib.sha256(file_uri.encode()).hexdigest()
+        return self.journal_directory / f'{file_name}{self.JOURNAL_FILE_EXTENSION}'
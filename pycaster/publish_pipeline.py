@@ -0,0 +1,57 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PublishPipeline:
+    def __init__(self, ingest, upload, prepare, discard, publish, workers):
+        self.ingest = ingest
+        self.upload = upload
+        self.prepare = prepare
+        self.discard = discard
+        self.publish = publish
+        self.workers = workers
+
+    def run(self, entries):
+        return asyncio.run(self._run(entries))
+
+    async def _run(self, entries):
+        # The blocking boto3, eyed3 and SQLite calls are offloaded to threads, the event loop only orchestrates them
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, ThreadPoolExecutor(max_workers=1) as preparer:
+            ingests = [asyncio.ensure_future(self._offload(executor, self.ingest, entry)) for entry in entries]
+            uploads = [
+                asyncio.ensure_future(self._upload_once_ingested(executor, entry, ingest))
+                for entry, ingest in zip(entries, ingests)
+            ]
+
+            try:
+                media_files = await asyncio.gather(*ingests)
+
+                # The feed and the database snapshot are prepared while the episodes are still being uploaded
+                publication = await self._offload(preparer, self.prepare, entries, media_files)
+            except BaseException:
+                # Uploads that did not start yet would put audio into the bucket without an episode in the database,
+                # hence they are cancelled. The ones that already run in a thread cannot be interrupted.
+                for task in [*ingests, *uploads]:
+                    task.cancel()
+
+                await asyncio.gather(*ingests, *uploads, return_exceptions=True)
+                raise
+
+            try:
+                await asyncio.gather(*uploads)
+            except BaseException:
+                # Uploads that are still running have to finish before the prepared publication can be rolled back
+                await asyncio.gather(*uploads, return_exceptions=True)
+                await self._offload(preparer, self.discard, publication)
+                raise
+
+            # Only published once every episode is confirmed, so the feed never links to a file that is missing
+            return await self._offload(preparer, self.publish, publication)
+
+    async def _upload_once_ingested(self, executor, entry, ingest):
+        media_file = await ingest
+        return await self._offload(executor, self.upload, entry, media_file)
+
+    @staticmethod
+    async def _offload(executor, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
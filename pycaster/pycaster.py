@@ -1,29 +1,76 @@
-import html
+import contextlib
+import functools
+import gzip
+import itertools
 import json
 import os
-import re
-from datetime import datetime
+import sys
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import click
-import pytz
-import requests
+from backup import DatabaseBackup
 from database import Database, Episode
-from eyed3.id3.tag import Tag
-from feedgen.feed import FeedGenerator
-from uploader import Uploader
+from database_sync import DatabaseSync
+from feed_cache import FeedFragmentCache
+from feed_formats import FeedFormat, FeedItem, RssFormat
+from manifest import Manifest, ManifestEntry
+from metrics import Metrics
+from publish_journal import PublishJournal
+
+# Heavy dependencies (boto3, eyed3, feedgen, lxml, pytz and requests) are imported by the methods that first need them,
+# so that commands which never touch the bucket or the feed, like listing the episodes, start fast
 
 
 class Pycaster:
     # General
     CONFIG_PATH = '../config.json'
     DATABASE_FILE = '../pycaster.db'
+    CACHE_DIRECTORY = '../.pycaster-cache'
+    # Within the cache directory
+    UPLOAD_CHECKPOINT_DIRECTORY = 'uploads'
+    FEED_FRAGMENT_CACHE_DIRECTORY = 'feed'
+    LOGO_CACHE_DIRECTORY = 'logos'
+    PUBLISH_JOURNAL_DIRECTORY = 'journal'
     MP3_MIME_TYPE = 'audio/mpeg'
-    XML_MIME_TYPE = 'text/xml'
     JPG_FILE_EXTENSION = 'jpg'
-    FEED_XML_FILE = 'feed.xml'
+    GZIP_CONTENT_ENCODING = 'gzip'
+    FEED_SPOOL_MAX_SIZE = 8 * 1024 * 1024
     DEFAULT_TIMEZONE_KEY = 'Europe/Amsterdam'
-    HTML_TAG_REGEX = r'(<!--.*?-->|<[^>]*>)'
+    # Predates every episode, hence every archive page of the feed is rendered again
+    EARLIEST_PUBLISHED = datetime.min.replace(tzinfo=timezone.utc)
+    DEFAULT_UPLOAD_WORKERS = 4
+    DEFAULT_WATCH_SETTLE_SECONDS = 2.0
+    DEFAULT_WATCH_POLL_INTERVAL = 1.0
+    DEFAULT_RELEASE_COALESCE_SECONDS = 60.0
+    DEFAULT_RELEASE_RECHECK_INTERVAL = 60.0
+    DEFAULT_RECONCILE_WORKERS = 8
+    DEFAULT_SHOW_WORKERS = 4
+    # boto3 transfers a single file over up to this many connections, unless `maxConcurrency` is configured
+    DEFAULT_TRANSFER_CONCURRENCY = 10
+    DEFAULT_SERVE_HOST = '127.0.0.1'
+    DEFAULT_SERVE_PORT = 8080
+    BYTES_PER_MEGABYTE = 1024 * 1024
+
+    # Metric stages
+    CONFIG_LOAD_STAGE = 'config_load'
+    DATABASE_SYNC_STAGE = 'database_sync'
+    DATABASE_OPEN_STAGE = 'database_open'
+    DATABASE_READ_STAGE = 'database_read'
+    DATABASE_WRITE_STAGE = 'database_write'
+    FEED_IMPORT_STAGE = 'feed_import'
+    RECONCILE_SCAN_STAGE = 'reconcile_scan'
+    RECONCILE_REPAIR_STAGE = 'reconcile_repair'
+    LOGO_FETCH_STAGE = 'logo_fetch'
+    TAGGING_STAGE = 'tagging'
+    INGEST_STAGE = 'ingest'
+    FEED_RENDER_STAGE = 'feed_render'
+    FEED_UPLOAD_STAGE = 'feed_upload'
+    DATABASE_SNAPSHOT_STAGE = 'database_snapshot'
+    DATABASE_BACKUP_STAGE = 'database_backup'
 
     # Configuration keys
     HOSTING_KEY = 'hosting'
@@ -37,11 +84,23 @@ class Pycaster:
     HOSTING_REGION_NAME_KEY = 'regionName'
     HOSTING_SECRET_KEY = 'secret'
     HOSTING_BUCKET_NAME_KEY = 'bucketName'
+    HOSTING_MULTIPART_THRESHOLD_KEY = 'multipartThreshold'
+    HOSTING_MULTIPART_CHUNK_SIZE_KEY = 'multipartChunkSize'
+    HOSTING_MAX_CONCURRENCY_KEY = 'maxConcurrency'
+    HOSTING_MAX_BANDWIDTH_KEY = 'maxBandwidth'
+    HOSTING_RESUMABLE_UPLOADS_KEY = 'resumableUploads'
+    HOSTING_FEED_PAGE_SIZE_KEY = 'feedPageSize'
+    HOSTING_COMPRESS_FEED_KEY = 'compressFeed'
+    HOSTING_FEED_CACHE_CONTROL_KEY = 'feedCacheControl'
+    HOSTING_FEED_FORMATS_KEY = 'feedFormats'
+    HOSTING_DATABASE_BACKUP_RETENTION_KEY = 'databaseBackupRetention'
+    HOSTING_SYNC_DATABASE_KEY = 'syncDatabase'
 
     AUTHOR_KEY = 'author'
     CATEGORY_KEY = 'category'
     DESCRIPTION_KEY = 'description'
     EMAIL_KEY = 'email'
+    GUID_KEY = 'guid'
     IS_EXPLICIT_KEY = 'explicit'
     LANGUAGE_KEY = 'language'
     LOGO_URI_KEY = 'logoUri'
@@ -52,167 +111,1047 @@ class Pycaster:
     def __init__(
             self,
             republish,
-            episode_title,
-            episode_description,
-            episode_duration,
-            episode_file_location,
-            episode_file_uri,
-            episode_is_explicit,
+            episode_title=None,
+            episode_description=None,
+            episode_duration=None,
+            episode_file_location=None,
+            episode_file_uri=None,
+            episode_is_explicit=None,
+            episode_release=None,
+            manifest_location=None,
+            upload_workers=DEFAULT_UPLOAD_WORKERS,
+            metrics=None,
+            read_only=False,
+            sync_database=True,
+            config_location=CONFIG_PATH,
+            database_file=DATABASE_FILE,
+            cache_directory=CACHE_DIRECTORY,
+            client=None,
     ):
-        self._load_settings(
-            republish=republish,
-            episode_title=episode_title,
-            episode_description=episode_description,
-            episode_duration=episode_duration,
-            episode_file_location=episode_file_location,
-            episode_file_uri=episode_file_uri,
-            episode_is_explicit=episode_is_explicit,
-        )
-        self.feed = self._generate_feed()
-        self.db = self._init_db()
+        self.metrics = metrics or Metrics(command=None)
+        self.lazy_dependencies = {}
+        self.lazy_dependencies_lock = threading.RLock()
+        self.config_location = config_location
+        self.database_file = database_file
+        self.cache_directory = cache_directory
+        self.client = client
+        # Set while serving, the feed then links to the server instead of the bucket
+        self.origin_url = None
+        self.served_data_version = None
+        self.served_next_release = None
+
+        try:
+            with self.metrics.stage(self.CONFIG_LOAD_STAGE):
+                self._load_settings(
+                    republish=republish,
+                    episode_title=episode_title,
+                    episode_description=episode_description,
+                    episode_duration=episode_duration,
+                    episode_file_location=episode_file_location,
+                    episode_file_uri=episode_file_uri,
+                    episode_is_explicit=episode_is_explicit,
+                    episode_release=episode_release,
+                    manifest_location=manifest_location,
+                    read_only=read_only,
+                )
+        except Exception as exception:
+            self._exit_with_error('loading the configuration', exception)
+
+        self.upload_workers = upload_workers
+        self.sync_database = sync_database
+
+    @property
+    def logo_cache(self):
+        return self._get_lazily('logo_cache', self._init_logo_cache)
+
+    @property
+    def feed(self):
+        return self._get_lazily('feed', self._generate_feed)
+
+    @property
+    def feed_cache(self):
+        return self._get_lazily('feed_cache', self._init_feed_cache)
+
+    @property
+    def uploader(self):
+        return self._get_lazily('uploader', self._init_uploader)
+
+    @property
+    def database_sync(self):
+        return self._get_lazily('database_sync', self._init_database_sync)
+
+    @property
+    def db(self):
+        return self._get_lazily('db', self._init_db)
+
+    @property
+    def database_backup(self):
+        return self._get_lazily('database_backup', self._init_database_backup)
+
+    @property
+    def publish_journal(self):
+        return self._get_lazily('publish_journal', self._init_publish_journal)
 
     def publish_new_episode(self):
         try:
-            uploader = self._init_uploader()
+            self._publish_episodes(
+                [
+                    ManifestEntry(
+                        title=self.episode_title,
+                        description=self.episode_description,
+                        duration=self.episode_duration,
+                        file_location=self.episode_file_location,
+                        file_uri=self.episode_file_uri,
+                        is_explicit=self.episode_is_explicit,
+                        release=self.episode_release,
+                    ),
+                ],
+            )
+        except Exception as exception:
+            self._exit_with_error('uploading the new episode', exception)
 
-            self._set_id3_tags()
+        self.metrics.finish()
 
-            uploader.upload_file_publicly(
-                file_location=self.episode_file_location,
-                upload_path=self.hosting_episode_path,
-                bucket=self.hosting_bucket,
-                extra_args={Uploader.CONTENT_TYPE_KEY: self.MP3_MIME_TYPE},
-                overwrite=False,
+        print('\nFinished!')
+
+    def publish_episode_batch(self):
+        try:
+            self._publish_episodes(self.manifest_entries)
+        except Exception as exception:
+            self._exit_with_error('uploading the batch of episodes', exception)
+
+        self.metrics.finish()
+
+        print('\nFinished!')
+
+    def republish_episodes(self):
+        try:
+            self._upload_publication(self._prepare_publication(entries=[], media_files=[]))
+        except Exception as exception:
+            self._exit_with_error('re-publishing the episodes', exception)
+
+        self.metrics.finish()
+
+        print('\nFinished!')
+
+    @classmethod
+    def republish_shows(cls, config_locations, workers=DEFAULT_SHOW_WORKERS, metrics=None):
+        from concurrent.futures import ThreadPoolExecutor
+        from show_network import ShowNetwork
+
+        metrics = metrics or Metrics(command=None)
+
+        try:
+            network = ShowNetwork(config_locations)
+        except Exception as exception:
+            print(f"\nAn error occurred while loading the shows: '{repr(exception)}'")
+            metrics.finish(exception)
+            sys.exit(1)
+
+        # Loaded up front, so that a broken configuration fails the run before any show is re-published
+        pycasters = [
+            cls(
+                republish=True,
+                metrics=metrics.for_show(show.name),
+                config_location=str(show.config_path),
+                database_file=show.database_file,
+                cache_directory=show.cache_directory,
             )
+            for show in network.shows
+        ]
+        cls._share_clients(pycasters, workers, metrics)
 
-            print('\nEpisode successfully uploaded!')
+        # Bounded, so that a large network neither exhausts the connection pool nor the local resources
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            succeeded = list(executor.map(cls._republish_show, pycasters))
 
-            self._append_previous_episodes_to_feed()
+        failed_shows = [show.name for show, show_succeeded in zip(network.shows, succeeded) if not show_succeeded]
 
-            self._create_new_episode_entry(
-                description=self.episode_description,
-                duration=self.episode_duration,
-                file_uri=self.episode_file_uri,
-                file_type=self.MP3_MIME_TYPE,
-                file_size=str(self.calculate_file_size(self.episode_file_location)),
-                is_explicit=self.episode_is_explicit,
-                published=datetime.now(pytz.timezone(self.DEFAULT_TIMEZONE_KEY)),
-                title=self.episode_title,
+        if failed_shows:
+            exception = RuntimeError(f"Re-publishing failed for the show(s) {', '.join(failed_shows)}")
+            print(f'\n{exception}')
+            metrics.finish(exception)
+            sys.exit(1)
+
+        metrics.finish()
+
+        print(f'\nRe-published {len(pycasters)} show(s)!')
+
+    def list_episodes(self, limit=None):
+        try:
+            # Ranges are counted from the oldest episode on, hence the newest ones start that far from the end
+            offset = 0 if limit is None else max(0, self.db.count_episodes() - limit)
+
+            episodes = self.metrics.timed_iterator(
+                self.DATABASE_READ_STAGE,
+                self.db.iterate_episodes(limit=limit, offset=offset, newest_first=True),
             )
 
-            self._upload_feed_backup_database(uploader)
+            now = datetime.now(timezone.utc)
+
+            for episode in episodes:
+                print(
+                    f'{episode.published:%Y-%m-%d %H:%M}  '
+                    f'{Episode.format_duration(episode.duration):>8}  '
+                    f'{"E" if episode.is_explicit else " "}  '
+                    f'{episode.title}'
+                    f'{"  (scheduled)" if episode.published > now else ""}',
+                )
+        except Exception as exception:
+            self._exit_with_error('listing the episodes', exception)
+
+        self.metrics.finish()
+
+    def recompute_itunes_summaries(self):
+        try:
+            with self.metrics.stage(self.DATABASE_WRITE_STAGE) as details:
+                details['episodes'] = self.db.recompute_itunes_summaries()
+
+            print(f"\nRecomputed the iTunes summaries, {details['episodes']} of them changed!")
+
+            # Otherwise the feed and the backup would only pick up the new summaries with the next episode.
+            # Any episode may have changed, hence the archive pages are rendered again as well.
+            if details['episodes']:
+                self._upload_publication(
+                    self._prepare_publication(entries=[], media_files=[], changed_since=self.EARLIEST_PUBLISHED),
+                )
         except Exception as exception:
-            print(f"\nAn error occurred while uploading the new episode: '{repr(exception)}'")
-            exit()
+            self._exit_with_error('recomputing the iTunes summaries', exception)
+
+        self.metrics.finish()
 
         print('\nFinished!')
 
-    def republish_episodes(self):
+    def import_feed(self, feed_location, conflict_resolution=Database.ABORT_ON_CONFLICTS):
+        from feed_import import FeedImport
+
         try:
-            uploader = self._init_uploader()
+            feed_import = FeedImport(feed_location)
+
+            with self.metrics.stage(self.FEED_IMPORT_STAGE, feed=feed_location) as details:
+                details['episodes'] = self.db.import_episodes(feed_import.iterate_episodes(), conflict_resolution)
+                details['skipped_items'] = len(feed_import.skipped_items)
+
+            for title, exception in feed_import.skipped_items:
+                print(f"\nSkipped the item '{title}': '{exception}'")
 
-            self._append_previous_episodes_to_feed()
+            print(f"\nImported {details['episodes']} episode(s) from the feed!")
 
-            self._upload_feed_backup_database(uploader)
+            # Replaced episodes leave their former position behind, which may predate every imported episode
+            changed_since = feed_import.oldest_published
+            if conflict_resolution == Database.REPLACE_CONFLICTS:
+                changed_since = self.EARLIEST_PUBLISHED
+
+            # Otherwise the feed and the backup would only pick up the imported episodes with the next episode
+            if details['episodes']:
+                self._upload_publication(
+                    self._prepare_publication(entries=[], media_files=[], changed_since=changed_since),
+                )
         except Exception as exception:
-            print(f"\nAn error occurred while re-publishing the episodes: '{repr(exception)}'")
-            exit()
+            self._exit_with_error('importing the feed', exception)
+
+        self.metrics.finish()
 
         print('\nFinished!')
 
-    def _upload_feed_backup_database(self, uploader):
-        self.feed.rss_file(self.FEED_XML_FILE, pretty=True)
+    def reconcile_bucket(self, workers=DEFAULT_RECONCILE_WORKERS, dry_run=False):
+        from bucket_reconciliation import BucketReconciliation, EpisodeDrift
 
-        uploader.upload_file_publicly(
-            file_location=self.FEED_XML_FILE,
-            upload_path=self.hosting_feed_path,
-            bucket=self.hosting_bucket,
-            extra_args={Uploader.CONTENT_TYPE_KEY: self.XML_MIME_TYPE},
-            overwrite=True,
+        try:
+            reconciliation = BucketReconciliation(
+                uploader=self.uploader,
+                bucket=self.hosting_bucket,
+                upload_path=self.hosting_episode_path,
+                build_object_uri=self._build_hosted_object_uri,
+                workers=workers,
+            )
+
+            with self.metrics.stage(self.RECONCILE_SCAN_STAGE) as details:
+                drifts = reconciliation.find_drift(self.db.iterate_episodes())
+                details.update(drifted_episodes=len(drifts), orphaned_files=len(reconciliation.orphaned_keys))
+
+            self._report_drift(reconciliation, drifts)
+
+            if dry_run:
+                print('\nDry run, nothing was repaired!')
+            elif drifts:
+                # Missing files cannot be repaired without uploading them again, hence they are only reported
+                file_sizes = {
+                    drift.episode.file_uri: drift.problems[EpisodeDrift.FILE_SIZE][0]
+                    for drift in drifts if EpisodeDrift.FILE_SIZE in drift.problems
+                }
+
+                with self.metrics.stage(self.RECONCILE_REPAIR_STAGE) as details:
+                    details['rewritten_files'] = reconciliation.repair(drifts)
+
+                    if file_sizes:
+                        self.db.update_file_sizes(file_sizes)
+
+                print(
+                    f"\nRewrote the metadata of {details['rewritten_files']} file(s) "
+                    f'and corrected the size of {len(file_sizes)} episode(s)!',
+                )
+
+                # Otherwise the enclosures in the feed would only be corrected with the next episode. The archive pages
+                # from the one of the oldest corrected episode onward are rendered again, but only the ones that
+                # contain a corrected episode differ, hence only they are uploaded.
+                if file_sizes:
+                    corrected_since = min(
+                        drift.episode.published for drift in drifts if EpisodeDrift.FILE_SIZE in drift.problems
+                    )
+                    self._upload_publication(
+                        self._prepare_publication(entries=[], media_files=[], changed_since=corrected_since),
+                    )
+        except Exception as exception:
+            self._exit_with_error('reconciling the bucket', exception)
+
+        self.metrics.finish()
+
+        print('\nFinished!')
+
+    @classmethod
+    def _share_clients(cls, pycasters, workers, metrics):
+        from uploader import Uploader
+
+        show_groups = defaultdict(list)
+
+        for pycaster in pycasters:
+            # Clients carry their credentials, hence only shows with the very same ones can share a client
+            client_key = (
+                pycaster.hosting_region,
+                pycaster.hosting_endpoint_url,
+                pycaster.hosting_access_key,
+                pycaster.hosting_secret,
+            )
+            show_groups[client_key].append(pycaster)
+
+        for (region_name, endpoint_url, access_key, secret), group in show_groups.items():
+            # Sized for the transfers of all shows that may run at once, so that none of them waits for a connection
+            concurrency = max(
+                pycaster.hosting_max_concurrency or cls.DEFAULT_TRANSFER_CONCURRENCY for pycaster in group
+            )
+            client = Uploader.init_shared_client(
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                access_key=access_key,
+                secret=secret,
+                max_pool_connections=min(workers, len(group)) * concurrency,
+                metrics=metrics,
+            )
+
+            for pycaster in group:
+                pycaster.client = client
+
+    @staticmethod
+    def _republish_show(pycaster):
+        try:
+            pycaster.republish_episodes()
+        except SystemExit:
+            # Already reported by the failing show itself, the other shows carry on nevertheless
+            return False
+
+        return True
+
+    def _report_drift(self, reconciliation, drifts):
+        for drift in drifts:
+            for problem, (expected, actual) in drift.problems.items():
+                print(f"\nEpisode '{drift.episode.title}' drifted in {problem}: {actual!r} instead of {expected!r}")
+
+        for key in reconciliation.orphaned_keys:
+            print(f"\nThe file '{key}' does not belong to any episode!")
+
+        print(
+            f'\nFound {len(drifts)} drifted episode(s) and {len(reconciliation.orphaned_keys)} orphaned file(s), '
+            f'{reconciliation.unhosted_episodes} episode(s) are hosted elsewhere and were not checked!',
         )
 
-        self._delete_local_feed_file()
+    def watch_drop_directory(self, drop_directory_location, settle_seconds, poll_interval, force_polling=False):
+        from drop_directory import DropDirectory
 
-        print('\nFeed successfully updated!')
+        try:
+            drop_directory = DropDirectory(drop_directory_location, settle_seconds, poll_interval, force_polling)
 
-        uploader.upload_file_privately(
-            file_location=self.DATABASE_FILE,
-            upload_path=self.hosting_database_path,
+            # Built up front and kept for the lifetime of the daemon, so that arrivals are published with low latency
+            self.db
+            self.uploader
+            self.feed
+        except Exception as exception:
+            self._exit_with_error('starting to watch the drop directory', exception)
+
+        try:
+            for arrivals in drop_directory.watch():
+                self._publish_arrivals(drop_directory, arrivals)
+        except KeyboardInterrupt:
+            print('\nStopped watching the drop directory!')
+
+    def run_release_schedule(self, coalesce_seconds, recheck_interval):
+        from release_scheduler import ReleaseScheduler
+
+        try:
+            scheduler = ReleaseScheduler(
+                # Looked up on every call, as the database is replaced whenever a newer one is synced
+                find_next_release=lambda after: self.db.find_next_release(after=after),
+                refresh_schedule=self._refresh_release_schedule,
+                coalesce_seconds=coalesce_seconds,
+                recheck_interval=recheck_interval,
+            )
+            self.uploader
+        except Exception as exception:
+            self._exit_with_error('starting the release schedule', exception)
+
+        try:
+            # Catches up on the episodes that became due while the schedule was not running
+            self._release_due_episodes()
+
+            for release_time in scheduler.wait_for_releases():
+                print(f'\nReleasing the episodes scheduled until {release_time:%Y-%m-%d %H:%M:%S %Z}...')
+                self._release_due_episodes()
+        except KeyboardInterrupt:
+            print('\nStopped the release schedule!')
+
+    def serve_origin(self, episode_directory_location, host, port, base_url=None):
+        from origin_server import OriginServer
+
+        self.origin_url = (base_url or f'http://{host}:{port}').rstrip('/')
+
+        try:
+            server = OriginServer(
+                (host, port),
+                feed_path=self.hosting_feed_path,
+                episode_path=self.hosting_episode_path,
+                episode_directory=episode_directory_location,
+                render_documents=self._render_served_documents,
+                is_feed_stale=self._is_served_feed_stale,
+                cache_control=self.hosting_feed_cache_control,
+            )
+            # Rendered up front, so that the first request does not have to wait for it
+            server.refresh_documents()
+        except Exception as exception:
+            self._exit_with_error('starting the server', exception)
+
+        for feed_format in self.hosting_feed_formats:
+            print(f'Serving the feed at {self._build_feed_file_uri(feed_format.build_subscription_file_name())}')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('\nStopped the server!')
+        finally:
+            server.server_close()
+
+    def _render_served_documents(self):
+        # Looked up before rendering, so that changes committed meanwhile cause another rebuild
+        self.served_data_version = self.db.retrieve_data_version()
+        self.served_next_release = self.db.find_next_release(after=datetime.now(timezone.utc))
+        documents = {}
+
+        with self.metrics.stage(self.FEED_RENDER_STAGE):
+            # The server compresses the documents itself, as not every client accepts gzip
+            pager, feed_files = self._prepare_feed(compress=False)
+            documents.update(self._read_feed_files(
+                feed_files, lambda feed_format: feed_format.build_subscription_file_name(),
+            ))
+
+            if pager is not None:
+                # Unlike in the bucket, archive pages do not persist, but they are rendered from cached fragments
+                for page in range(1, pager.count_archive_pages() + 1):
+                    archive_feed_files = self._spool_feed_archive_page(
+                        pager, page, self.hosting_feed_formats, compress=False,
+                    )
+                    documents.update(self._read_feed_files(
+                        archive_feed_files,
+                        lambda feed_format: pager.build_archive_file_name(page, feed_format.FILE_EXTENSION),
+                    ))
+
+        return documents
+
+    def _read_feed_files(self, feed_files, build_file_name):
+        try:
+            return {
+                build_file_name(feed_format): (feed_file.read(), feed_format.MIME_TYPE)
+                for feed_format, feed_file in feed_files.items()
+            }
+        finally:
+            self._close_feed_files(feed_files)
+
+    def _is_served_feed_stale(self):
+        # Moves with every commit of another run, e.g. a batch that published new episodes meanwhile
+        if self.db.retrieve_data_version() != self.served_data_version:
+            return True
+
+        # Scheduled episodes are released without any change to the database
+        return self.served_next_release is not None and self.served_next_release <= datetime.now(timezone.utc)
+
+    def _release_due_episodes(self):
+        self.metrics.restart()
+        self.uploader.refresh_index()
+
+        try:
+            self._resync_database()
+            # The audio files were uploaded ahead of time, hence only the feed and the backup are written
+            self._upload_publication(self._prepare_publication(entries=[], media_files=[]))
+        except Exception as exception:
+            self._report_error('releasing the scheduled episodes', exception)
+            return
+
+        self.metrics.finish()
+
+    def _refresh_release_schedule(self):
+        try:
+            self._resync_database()
+        except Exception as exception:
+            # The schedule of the current database is kept, the next lookup tries again
+            print(f"\nAn error occurred while syncing the release schedule: '{repr(exception)}'")
+
+    def _publish_arrivals(self, drop_directory, arrivals):
+        self.metrics.restart()
+        # Other runs may have changed the bucket since the previous arrivals, e.g. a batch or a reconciliation
+        self.uploader.refresh_index()
+
+        entries = []
+        published_arrivals = []
+
+        for arrival in arrivals:
+            try:
+                entries.extend(self._verify_manifest_entries([arrival.load_entry()]))
+                published_arrivals.append(arrival)
+            except Exception as exception:
+                print(f"\nThe episode '{arrival.file_path.name}' is invalid: '{repr(exception)}'")
+                arrival.move_to(drop_directory.failed_path, error=exception)
+
+        if not entries:
+            return
+
+        try:
+            self._resync_database()
+            # A whole burst of arrivals is published at once, hence the feed is only rebuilt and uploaded once
+            self._publish_episodes(self.verify_manifest_entries_unique(entries))
+        except Exception as exception:
+            self._report_error('publishing the dropped episodes', exception)
+
+            for arrival in published_arrivals:
+                arrival.move_to(drop_directory.failed_path, error=exception)
+
+            return
+
+        self.metrics.finish()
+
+        for arrival in published_arrivals:
+            arrival.move_to(drop_directory.published_path)
+
+        print(f'\nPublished {len(entries)} dropped episode(s)!')
+
+    def _publish_episodes(self, entries):
+        from publish_pipeline import PublishPipeline
+
+        # Opened up front, so that a failing database sync aborts the run before any episode is uploaded
+        self.db
+
+        PublishPipeline(
+            ingest=self._ingest_episode,
+            upload=self._upload_episode,
+            prepare=self._prepare_publication,
+            discard=self._discard_publication,
+            publish=self._upload_publication,
+            workers=self.upload_workers,
+        ).run(entries)
+
+        # Only forgotten once the feed and the backup are uploaded, so that a rerun resumes any earlier failure
+        self.publish_journal.complete(entry.file_uri for entry in entries)
+
+    def _ingest_episode(self, entry):
+        from media import MediaFile
+
+        state = self.publish_journal.load(entry.file_uri)
+
+        if self._is_ingestion_resumable(entry, state):
+            print(f"\nResuming the publication of episode '{entry.title}'...")
+            return MediaFile(content_hash=state['content_hash'], duration=state['duration'], size=state['size'])
+
+        # Tagging comes first, as it changes the bytes that are hashed and uploaded afterwards
+        with self.metrics.stage(self.TAGGING_STAGE, file=entry.file_location):
+            self._set_id3_tags(file_location=entry.file_location, title=entry.title)
+
+        with self.metrics.stage(self.INGEST_STAGE, file=entry.file_location) as details:
+            media_file = MediaFile.ingest(entry.file_location)
+            details.update(size=media_file.size, duration=media_file.duration)
+
+        file_path = Path(entry.file_location).resolve()
+
+        # Starts the journal of the episode over, as the stages of an earlier run were based on other bytes
+        self.publish_journal.record(
+            entry.file_uri,
+            PublishJournal.INGESTED_STAGE,
+            restart=True,
+            file=str(file_path),
+            modified=file_path.stat().st_mtime_ns,
+            content_hash=media_file.content_hash,
+            duration=media_file.duration,
+            size=media_file.size,
+        )
+
+        return media_file
+
+    def _is_ingestion_resumable(self, entry, state):
+        if PublishJournal.INGESTED_STAGE not in state.get(PublishJournal.STAGES_KEY, []):
+            return False
+
+        file_path = Path(entry.file_location).resolve()
+        file_stat = file_path.stat()
+
+        # Compared by its size and modification time only, so that the file is not read again to be hashed
+        return (
+            state['file'] == str(file_path) and
+            state['size'] == file_stat.st_size and
+            state['modified'] == file_stat.st_mtime_ns
+        )
+
+    def _upload_episode(self, entry, media_file):
+        from uploader import Uploader
+
+        file_upload_path = f'{self.hosting_episode_path}/{Path(entry.file_location).name}'
+
+        if self._is_upload_resumable(entry, file_upload_path):
+            self.metrics.count(Metrics.SKIPPED_UPLOADS)
+            print(f"\nEpisode '{entry.title}' was already uploaded by an earlier run, skipped its upload!")
+            return
+
+        self.uploader.upload_file_publicly(
+            file_location=entry.file_location,
+            upload_path=self.hosting_episode_path,
             bucket=self.hosting_bucket,
-            overwrite=True,
+            extra_args={Uploader.CONTENT_TYPE_KEY: self.MP3_MIME_TYPE},
+            overwrite=False,
+            content_hash=media_file.content_hash,
+        )
+
+        remote_file = self.uploader.describe_file(file_upload_path, self.hosting_bucket)
+        self.publish_journal.record(
+            entry.file_uri, PublishJournal.UPLOADED_STAGE, key=remote_file.key, etag=remote_file.etag,
         )
 
-        print('\nDatabase successfully backed-up!')
+        print(f"\nEpisode '{entry.title}' successfully uploaded!")
 
-    def _create_new_episode_entry(
-            self, title, description, duration, file_uri, file_type, file_size, is_explicit, published,
-    ):
-        episode = self._create_episode_entry(
-            description=description,
-            duration=duration,
-            file_size=file_size,
-            file_type=file_type,
-            file_uri=file_uri,
-            is_explicit=is_explicit,
-            published=published,
-            title=title,
-        )
-
-        self._insert_new_episode_into_database(
+    def _is_upload_resumable(self, entry, file_upload_path):
+        state = self.publish_journal.load(entry.file_uri)
+
+        if PublishJournal.UPLOADED_STAGE not in state.get(PublishJournal.STAGES_KEY, []):
+            return False
+
+        # Answered from the listing of the episode path, the object may have been removed since the earlier run
+        if state['key'] != file_upload_path or not self.uploader.file_exists(file_upload_path, self.hosting_bucket):
+            return False
+
+        return self.uploader.describe_file(file_upload_path, self.hosting_bucket).etag == state['etag']
+
+    def _prepare_publication(self, entries, media_files, changed_since=None):
+        import pytz
+
+        published = datetime.now(pytz.timezone(self.DEFAULT_TIMEZONE_KEY))
+
+        # Keeps the order of the manifest intact in podcast clients that sort by publishing date. Staggered backwards,
+        # as episodes dated after the rendering of the feed would be taken for scheduled ones.
+        staggered_dates = [published - timedelta(seconds=seconds) for seconds in reversed(range(len(entries)))]
+        latest_release = self.db.find_latest_release(before=published)
+
+        if latest_release is not None:
+            # Never dated in between the episodes of a batch that was published seconds earlier,
+            # episodes of the same second are ordered as they were inserted
+            staggered_dates = [max(staggered_date, latest_release) for staggered_date in staggered_dates]
+
+        episodes = [
             Episode(
-                title=title,
-                description=description,
-                duration=duration,
-                file_uri=file_uri,
-                file_type=file_type,
-                file_size=file_size,
-                is_explicit=is_explicit,
-                published=published,
-            ),
+                title=entry.title,
+                description=entry.description,
+                duration=self._resolve_episode_duration(entry.duration, media_file),
+                file_uri=entry.file_uri,
+                file_type=self.MP3_MIME_TYPE,
+                file_size=media_file.size,
+                is_explicit=Episode.parse_is_explicit(entry.is_explicit),
+                published=entry.release or staggered_dates[index],
+                content_hash=media_file.content_hash,
+                chapters_uri=entry.chapters_uri,
+            )
+            for index, (entry, media_file) in enumerate(zip(entries, media_files))
+        ]
+
+        # Episodes that an earlier, failed run already inserted are part of the publication, but not inserted again
+        inserted_file_uris = self._find_inserted_file_uris(entries)
+        new_episodes = [episode for episode in episodes if episode.file_uri not in inserted_file_uris]
+
+        if new_episodes:
+            with self.metrics.stage(self.DATABASE_WRITE_STAGE, episodes=len(new_episodes)):
+                self._insert_new_episodes_into_database(new_episodes)
+
+            for episode in new_episodes:
+                self.publish_journal.record(episode.file_uri, PublishJournal.INSERTED_STAGE)
+
+            # Episodes released in the past, e.g. of a backfilled season, are inserted in between the archived ones
+            oldest_published = min(episode.published for episode in new_episodes)
+            changed_since = oldest_published if changed_since is None else min(changed_since, oldest_published)
+
+        try:
+            with self.metrics.stage(self.FEED_RENDER_STAGE):
+                pager, feed_files = self._prepare_feed(changed_since=changed_since)
+
+            with self.metrics.stage(self.DATABASE_SNAPSHOT_STAGE):
+                database_snapshot = self.database_backup.prepare()
+
+            return episodes, pager, feed_files, database_snapshot
+        except Exception:
+            self._delete_episodes_from_database(episodes)
+            raise
+
+    def _discard_publication(self, publication):
+        episodes, _, feed_files, (compressed_snapshot, _, _) = publication
+
+        self._close_feed_files(feed_files)
+        compressed_snapshot.close()
+
+        # Rows that an earlier run inserted are removed as well, the journal has them inserted again by the rerun
+        self._delete_episodes_from_database(episodes)
+
+    def _upload_publication(self, publication):
+        _, pager, feed_files, database_snapshot = publication
+
+        with self.metrics.stage(self.FEED_UPLOAD_STAGE):
+            self._upload_feed(pager, feed_files)
+
+        with self.metrics.stage(self.DATABASE_BACKUP_STAGE) as details:
+            details['uploaded'] = self.database_backup.upload(database_snapshot)
+
+        if details['uploaded']:
+            if self.hosting_sync_database:
+                self.database_sync.record(self.database_backup.latest_etag)
+
+            print('\nDatabase successfully backed-up!')
+        else:
+            print('\nDatabase is unchanged, skipped its back-up!')
+
+    def _prepare_feed(self, changed_since=None, compress=None):
+        from feed_pager import FeedPager
+
+        pager = None
+        # Episodes that are scheduled for a later release are left out until then
+        released_before = datetime.now(timezone.utc)
+
+        # Fragments that went unused by earlier renders of a long-running process are pruned afterwards
+        self.feed_cache.reset()
+
+        if self.hosting_feed_page_size:
+            pager = FeedPager(
+                self.hosting_feed_page_size,
+                self.db.count_episodes(released_before),
+                None if changed_since is None else self.db.count_episodes_published_before(changed_since),
+            )
+
+            def build_links(feed_format):
+                return pager.build_subscription_links(self._build_feed_file_uri, feed_format.FILE_EXTENSION)
+
+            episodes = self._retrieve_episode_range(*pager.latest_range(), released_before=released_before)
+        else:
+            build_links = None
+            episodes = self._retrieve_previous_episodes(released_before)
+
+        return pager, self._spool_feeds(self.hosting_feed_formats, episodes, build_links, compress=compress)
+
+    def _upload_feed(self, pager, feed_files):
+        try:
+            if pager is not None:
+                self._upload_feed_archive_pages(pager)
+
+            # Every format is only rewritten if its bytes changed, e.g. a new format is uploaded once
+            for feed_format, feed_file in feed_files.items():
+                file_name = feed_format.build_subscription_file_name()
+                feed_uploaded = self.uploader.upload_fileobj_publicly(
+                    fileobj=feed_file,
+                    file_name=file_name,
+                    upload_path=self.hosting_feed_path,
+                    bucket=self.hosting_bucket,
+                    extra_args=self._build_feed_extra_args(feed_format),
+                    overwrite=True,
+                    skip_unchanged=True,
+                )
+
+                if feed_uploaded:
+                    print(f"\nFeed '{file_name}' successfully updated!")
+                else:
+                    print(f"\nFeed '{file_name}' is unchanged, skipped its upload!")
+        finally:
+            self._close_feed_files(feed_files)
+
+        self.feed_cache.prune()
+
+    def _upload_feed_archive_pages(self, pager):
+        # Archive pages are created in order and only change along with the episodes up to their range,
+        # so only the newest ones can be missing or outdated.
+        # Unreleased episodes are always the newest ones, hence they never fall into the range of an archive page.
+        for page in reversed(range(1, pager.count_archive_pages() + 1)):
+            is_changed = pager.is_archive_page_changed(page)
+
+            if is_changed:
+                # Rendered in every format, but only uploaded where it differs from the page in the bucket
+                feed_formats = self.hosting_feed_formats
+            else:
+                # Formats that were enabled later on lack the older pages, which are rendered for them alone
+                feed_formats = [
+                    feed_format for feed_format in self.hosting_feed_formats
+                    if not self.uploader.file_exists(
+                        f'{self.hosting_feed_path}/{pager.build_archive_file_name(page, feed_format.FILE_EXTENSION)}',
+                        self.hosting_bucket,
+                    )
+                ]
+
+            if not feed_formats:
+                break
+
+            archive_feed_files = self._spool_feed_archive_page(pager, page, feed_formats)
+
+            try:
+                uploaded = [
+                    self.uploader.upload_fileobj_publicly(
+                        fileobj=archive_feed_file,
+                        file_name=pager.build_archive_file_name(page, feed_format.FILE_EXTENSION),
+                        upload_path=self.hosting_feed_path,
+                        bucket=self.hosting_bucket,
+                        extra_args=self._build_feed_extra_args(feed_format),
+                        overwrite=True,
+                        skip_unchanged=is_changed,
+                    )
+                    for feed_format, archive_feed_file in archive_feed_files.items()
+                ]
+            finally:
+                self._close_feed_files(archive_feed_files)
+
+            if any(uploaded):
+                print(f'\nFeed archive page {page} successfully uploaded!')
+            else:
+                print(f'\nFeed archive page {page} is unchanged, skipped its upload!')
+
+    def _spool_feed_archive_page(self, pager, page, feed_formats, compress=None):
+        def build_file_name(feed_format):
+            return pager.build_archive_file_name(page, feed_format.FILE_EXTENSION)
+
+        def build_links(feed_format):
+            return pager.build_archive_links(
+                page,
+                self._build_feed_file_uri,
+                feed_format.build_subscription_file_name(),
+                feed_format.FILE_EXTENSION,
+            )
+
+        archive_episodes = self._retrieve_episode_range(*pager.archive_range(page))
+
+        return self._spool_feeds(
+            feed_formats, archive_episodes, build_links, build_file_name, is_archive=True, compress=compress,
         )
 
-        return episode
+    def _spool_feeds(
+            self, feed_formats, episodes, build_links=None, build_file_name=None, is_archive=False, compress=None,
+    ):
+        feed_files = {}
+        documents = []
+        compress = self.hosting_compress_feed if compress is None else compress
+
+        try:
+            with contextlib.ExitStack() as compressed_feeds:
+                for feed_format in feed_formats:
+                    # Small feeds stay in memory, only large ones are spilled into an anonymous temporary file
+                    spooled_feed = tempfile.SpooledTemporaryFile(max_size=self.FEED_SPOOL_MAX_SIZE)
+                    feed_files[feed_format] = spooled_feed
+
+                    if compress:
+                        # A fixed modification time keeps the compressed bytes of an unchanged feed identical
+                        spooled_feed = compressed_feeds.enter_context(
+                            gzip.GzipFile(fileobj=spooled_feed, mode='wb', mtime=0),
+                        )
+
+                    documents.append(
+                        feed_format(
+                            file=spooled_feed,
+                            fragment_cache=self.feed_cache,
+                            feed_uri=self._build_feed_file_uri(
+                                build_file_name(feed_format) if build_file_name
+                                else feed_format.build_subscription_file_name(),
+                            ),
+                            links=build_links(feed_format) if build_links else [],
+                            is_archive=is_archive,
+                        ),
+                    )
+
+                self._render_feeds(documents, episodes)
+        except Exception:
+            self._close_feed_files(feed_files)
+            raise
+
+        for spooled_feed in feed_files.values():
+            spooled_feed.seek(0)
+
+        return feed_files
+
+    def _close_feed_files(self, feed_files):
+        for feed_file in feed_files.values():
+            feed_file.close()
+
+    def _build_feed_extra_args(self, feed_format):
+        from uploader import Uploader
+
+        extra_args = {Uploader.CONTENT_TYPE_KEY: feed_format.MIME_TYPE}
+
+        if self.hosting_compress_feed:
+            extra_args[Uploader.CONTENT_ENCODING_KEY] = self.GZIP_CONTENT_ENCODING
+
+        if self.hosting_feed_cache_control:
+            extra_args[Uploader.CACHE_CONTROL_KEY] = self.hosting_feed_cache_control
+
+        return extra_args
+
+    def _resolve_episode_duration(self, duration, media_file):
+        # A duration that was given explicitly takes precedence over the one measured from the frames
+        if duration:
+            return Episode.parse_duration(duration)
+        return media_file.duration
 
     def _create_episode_entry(
-            self, description, duration, file_size, file_type, file_uri, is_explicit, published, title,
+            self, description, duration, file_size, file_type, file_uri, is_explicit, published, title, itunes_summary,
+            chapters_uri=None, enclosure_uri=None,
     ):
-        episode = self.feed.add_entry()
+        import pytz
+        from feedgen.entry import FeedEntry
+        from podcast_index import PodcastIndexEntryExtension, PodcastIndexExtension
+
+        episode = FeedEntry()
+        episode.load_extension('podcast')
+        episode.register_extension(PodcastIndexExtension.NAME, PodcastIndexEntryExtension, atom=False)
 
         episode.podcast.itunes_author(self.author)
         episode.podcast.itunes_image(f'{self.logo_uri}.{self.JPG_FILE_EXTENSION}')
-        episode.podcast.itunes_explicit(is_explicit)
-        episode.podcast.itunes_duration(duration)
-        episode.podcast.itunes_summary(self._convert_episode_itunes_summary(description))
+        episode.podcast.itunes_explicit('yes' if is_explicit else 'no')
+        episode.podcast.itunes_duration(Episode.format_duration(duration))
+        episode.podcast.itunes_summary(itunes_summary)
+
+        if chapters_uri:
+            episode.podcastindex.chapters(chapters_uri)
 
         episode.description(description)
-        episode.enclosure(file_uri, file_size, file_type)
+        episode.summary(itunes_summary)
+        # The file URI remains the ID of the episode, even where the file is served from elsewhere
+        episode.enclosure(enclosure_uri or file_uri, str(file_size), file_type)
         episode.id(file_uri)
-        episode.published(published)
+        episode.published(published.astimezone(pytz.timezone(self.DEFAULT_TIMEZONE_KEY)))
+        # Otherwise feedgen dates the Atom entry to the time of rendering
+        episode.updated(published)
         episode.title(title)
         episode.link({'href': self.website})
 
         return episode
 
-    def _append_previous_episodes_to_feed(self):
-        for previous_episode in self._retrieve_previous_episodes():
-            self._create_episode_entry(
-                description=previous_episode.description,
-                duration=previous_episode.duration,
-                file_size=previous_episode.file_size,
-                file_type=previous_episode.file_type,
-                file_uri=previous_episode.file_uri,
-                is_explicit=previous_episode.is_explicit,
-                published=previous_episode.published,
-                title=previous_episode.title,
-            )
+    def _render_feeds(self, documents, episodes):
+        # Newest episodes first, just like entries prepended to the feed
+        episodes = iter(episodes)
+        newest_episode = next(episodes, None)
+
+        if newest_episode is not None:
+            # Unlike the time of rendering, the newest episode keeps the feed identical as long as nothing changed
+            self.feed.lastBuildDate(newest_episode.published)
+            self.feed.updated(newest_episode.published)
+            episodes = itertools.chain([newest_episode], episodes)
+
+        for document in documents:
+            document.write_channel(self.feed)
+
+        # Every episode is read from the database once and written into all formats right away
+        for episode in episodes:
+            item = self._build_feed_item(episode)
+
+            for document in documents:
+                document.write_item(item)
+
+        for document in documents:
+            document.close()
+
+    def _build_feed_item(self, episode: Episode):
+        return FeedItem(
+            episode_fields=[
+                episode.title,
+                episode.description,
+                episode.duration,
+                episode.file_uri,
+                episode.file_type,
+                episode.file_size,
+                episode.is_explicit,
+                episode.published,
+                episode.itunes_summary,
+                episode.chapters_uri,
+            ],
+            config_fields=[self.author, self.logo_uri, self.website, self.origin_url],
+            create_entry=functools.partial(
+                self._create_episode_entry,
+                description=episode.description,
+                duration=episode.duration,
+                file_size=episode.file_size,
+                file_type=episode.file_type,
+                file_uri=episode.file_uri,
+                is_explicit=episode.is_explicit,
+                published=episode.published,
+                title=episode.title,
+                itunes_summary=episode.itunes_summary,
+                chapters_uri=episode.chapters_uri,
+                enclosure_uri=self._build_enclosure_uri(episode.file_uri),
+            ),
+        )
 
-    def _insert_new_episode_into_database(self, episode: Episode):
-        self.db.insert_new_episode(episode)
+    def _build_enclosure_uri(self, file_uri):
+        if self.origin_url is None:
+            return file_uri
 
-    def _retrieve_previous_episodes(self):
-        return self.db.retrieve_all_episodes()
+        hosted_file_uri_prefix = self._build_hosted_file_uri(self.hosting_episode_path, '')
+
+        # Episodes hosted elsewhere, e.g. imported ones, are not served
+        if not file_uri.startswith(hosted_file_uri_prefix):
+            return file_uri
+
+        return f'{self.origin_url}/{self.hosting_episode_path}/{file_uri[len(hosted_file_uri_prefix):]}'
+
+    def _insert_new_episodes_into_database(self, episodes):
+        self.db.insert_new_episodes(episodes)
+
+    def _delete_episodes_from_database(self, episodes):
+        self.db.delete_episodes([episode.file_uri for episode in episodes])
+
+        for episode in episodes:
+            self.publish_journal.revert(episode.file_uri, PublishJournal.INSERTED_STAGE)
+
+    def _find_inserted_file_uris(self, entries):
+        journaled_file_uris = [
+            entry.file_uri for entry in entries
+            if self.publish_journal.has_completed(entry.file_uri, PublishJournal.INSERTED_STAGE)
+        ]
+
+        if not journaled_file_uris:
+            return set()
+
+        # The rows may be gone meanwhile, e.g. when a newer database was synced from the bucket
+        return self.db.find_existing_file_uris(journaled_file_uris)
+
+    def _retrieve_previous_episodes(self, released_before=None):
+        return self.metrics.timed_iterator(
+            self.DATABASE_READ_STAGE,
+            self.db.iterate_episodes(newest_first=True, released_before=released_before),
+        )
+
+    def _retrieve_episode_range(self, start, end, released_before=None):
+        return self.metrics.timed_iterator(
+            self.DATABASE_READ_STAGE,
+            self.db.iterate_episodes(
+                limit=end - start, offset=start, newest_first=True, released_before=released_before,
+            ),
+        )
 
     def _generate_feed(self):
+        from feedgen.feed import FeedGenerator
+        from podcast_index import PodcastIndexEntryExtension, PodcastIndexExtension
+
         feed = FeedGenerator()
 
         feed.load_extension('podcast')
@@ -224,8 +1163,20 @@ class Pycaster:
         feed.podcast.itunes_subtitle(self.subtitle)
         feed.podcast.itunes_summary(self.description)
 
+        # A configured GUID keeps the identity of the show when its feed moves to another URI
+        feed.register_extension(
+            PodcastIndexExtension.NAME, PodcastIndexExtension, PodcastIndexEntryExtension, atom=False,
+        )
+        feed.podcastindex.guid(
+            # Of the feed in the bucket, even while it is served from elsewhere
+            self.guid or PodcastIndexExtension.build_guid(
+                self._build_hosted_file_uri(self.hosting_feed_path, RssFormat.build_subscription_file_name()),
+            ),
+        )
+
         feed.author(name=self.author, email=self.email)
         feed.description(self.description)
+        feed.id(self.website)
         feed.language(self.language)
         feed.link(href=self.website, rel='alternate')
         feed.logo(self.logo_uri)
@@ -234,21 +1185,97 @@ class Pycaster:
 
         return feed
 
+    def _get_lazily(self, name, factory):
+        # Re-entrant, as opening the database syncs it through the uploader, and locked, as the threads of the
+        # publish pipeline may reach for the same dependency at once
+        with self.lazy_dependencies_lock:
+            if name not in self.lazy_dependencies:
+                self.lazy_dependencies[name] = factory()
+
+            return self.lazy_dependencies[name]
+
+    def _init_logo_cache(self):
+        from logo_cache import LogoCache
+
+        return LogoCache(self._build_cache_path(self.LOGO_CACHE_DIRECTORY))
+
+    def _init_feed_cache(self):
+        return FeedFragmentCache(self._build_cache_path(self.FEED_FRAGMENT_CACHE_DIRECTORY))
+
     def _init_uploader(self):
+        from uploader import Uploader
+
         return Uploader(
             region_name=self.hosting_region,
             endpoint_url=self.hosting_endpoint_url,
             access_key=self.hosting_access_key,
             secret=self.hosting_secret,
+            multipart_threshold=self.hosting_multipart_threshold,
+            multipart_chunk_size=self.hosting_multipart_chunk_size,
+            max_concurrency=self.hosting_max_concurrency,
+            max_bandwidth=self.hosting_max_bandwidth,
+            resumable=self.hosting_resumable_uploads,
+            checkpoint_directory=self._build_cache_path(self.UPLOAD_CHECKPOINT_DIRECTORY),
+            metrics=self.metrics,
+            client=self.client,
+        )
+
+    def _init_database_sync(self):
+        return DatabaseSync(
+            uploader=self.uploader,
+            bucket=self.hosting_bucket,
+            upload_path=self.hosting_database_path,
+            database_file=self.database_file,
         )
 
+    def _sync_database(self, before_replace=None):
+        if not self.hosting_sync_database or not self.sync_database:
+            return False
+
+        with self.metrics.stage(self.DATABASE_SYNC_STAGE):
+            if not self.database_sync.pull(before_replace):
+                return False
+
+            print('\nDatabase successfully synced from the bucket!')
+            return True
+
+    def _resync_database(self):
+        # Daemons keep the database open between their publish cycles. Meanwhile another run, e.g. a batch on another
+        # host, may have backed up a newer one, which the next backup of the daemon would otherwise overwrite.
+        with self.lazy_dependencies_lock:
+            if 'db' in self.lazy_dependencies and self._sync_database(before_replace=self._close_db):
+                self.lazy_dependencies['db'] = self._open_db()
+
+    def _close_db(self):
+        with self.lazy_dependencies_lock:
+            self.lazy_dependencies.pop('db').close()
+            # Built on top of the closed database
+            self.lazy_dependencies.pop('database_backup', None)
+
+    def _init_database_backup(self):
+        return DatabaseBackup(
+            db=self.db,
+            uploader=self.uploader,
+            bucket=self.hosting_bucket,
+            upload_path=self.hosting_database_path,
+            retention=self.hosting_database_backup_retention,
+        )
+
+    def _init_publish_journal(self):
+        return PublishJournal(self._build_cache_path(self.PUBLISH_JOURNAL_DIRECTORY))
+
+    def _build_cache_path(self, directory):
+        return f'{self.cache_directory}/{directory}'
+
     def _init_db(self):
-        db = Database(self.DATABASE_FILE)
-        db.create_episode_database()
-        return db
+        self._sync_database()
+        return self._open_db()
 
-    def _delete_local_feed_file(self):
-        os.remove(f'./{self.FEED_XML_FILE}')
+    def _open_db(self):
+        with self.metrics.stage(self.DATABASE_OPEN_STAGE):
+            db = Database(self.database_file)
+            db.create_episode_database()
+        return db
 
     def _load_settings(
             self,
@@ -259,43 +1286,73 @@ class Pycaster:
             episode_file_location,
             episode_file_uri,
             episode_is_explicit,
+            episode_release,
+            manifest_location,
+            read_only,
     ):
-        try:
-            self.config = self._load_config()
-
-            self.hosting_access_key = self._load_generic_hosting_config_field(self.HOSTING_ACCESS_KEY_KEY)
-            self.hosting_database_path = self._load_generic_hosting_config_field(self.HOSTING_DATABASE_PATH_KEY)
-            self.hosting_endpoint_url = self._load_generic_hosting_config_field(self.HOSTING_ENDPOINT_URL_KEY)
-            self.hosting_episode_path = self._load_generic_hosting_config_field(self.HOSTING_EPISODE_PATH_KEY)
-            self.hosting_feed_path = self._load_generic_hosting_config_field(self.HOSTING_FEED_PATH_KEY)
-            self.hosting_region = self._load_generic_hosting_config_field(self.HOSTING_REGION_NAME_KEY)
-            self.hosting_secret = self._load_generic_hosting_config_field(self.HOSTING_SECRET_KEY)
-            self.hosting_bucket = self._load_generic_hosting_config_field(self.HOSTING_BUCKET_NAME_KEY)
-
-            self.author = self._load_generic_podcast_config_field(self.AUTHOR_KEY)
-            self.category = self._load_generic_podcast_config_field(self.CATEGORY_KEY)
-            self.description = self._load_generic_podcast_config_field(self.DESCRIPTION_KEY)
-            self.email = self._load_generic_podcast_config_field(self.EMAIL_KEY)
-            self.is_explicit = self._load_generic_podcast_config_field(self.IS_EXPLICIT_KEY)
-            self.language = self._load_generic_podcast_config_field(self.LANGUAGE_KEY)
-            self.logo_uri = self._load_generic_podcast_config_field(self.LOGO_URI_KEY)
-            self.name = self._load_generic_podcast_config_field(self.NAME_KEY)
-            self.subtitle = self._load_generic_podcast_config_field(self.SUBTITLE_KEY)
-            self.website = self._load_generic_podcast_config_field(self.WEBSITE_KEY)
-
-            if not republish:
-                self.episode_title = self.verify_episode_title(episode_title)
-                self.episode_description = self._extract_episode_description(episode_description)
-                self.episode_duration = self.verify_episode_duration(episode_duration)
-                self.episode_file_location = self.verify_episode_file_location(episode_file_location)
-                self.episode_file_uri = self.verify_episode_file_uri(episode_file_uri)
-                self.episode_is_explicit = self.verify_episode_is_explicit(episode_is_explicit)
-
-                if not self.episode_file_uri:
-                    self.episode_file_uri = self._build_episode_file_uri()
-        except Exception as exception:
-            print(f"\nAn error occurred while loading the configuration: '{repr(exception)}'")
-            exit()
+        self.config = self._load_config()
+
+        self.hosting_access_key = self._load_generic_hosting_config_field(self.HOSTING_ACCESS_KEY_KEY)
+        self.hosting_database_path = self._load_generic_hosting_config_field(self.HOSTING_DATABASE_PATH_KEY)
+        self.hosting_endpoint_url = self._load_generic_hosting_config_field(self.HOSTING_ENDPOINT_URL_KEY)
+        self.hosting_episode_path = self._load_generic_hosting_config_field(self.HOSTING_EPISODE_PATH_KEY)
+        self.hosting_feed_path = self._load_generic_hosting_config_field(self.HOSTING_FEED_PATH_KEY)
+        self.hosting_region = self._load_generic_hosting_config_field(self.HOSTING_REGION_NAME_KEY)
+        self.hosting_secret = self._load_generic_hosting_config_field(self.HOSTING_SECRET_KEY)
+        self.hosting_bucket = self._load_generic_hosting_config_field(self.HOSTING_BUCKET_NAME_KEY)
+        self.hosting_multipart_threshold = self._load_megabytes_hosting_config_field(
+            self.HOSTING_MULTIPART_THRESHOLD_KEY,
+        )
+        self.hosting_multipart_chunk_size = self._load_megabytes_hosting_config_field(
+            self.HOSTING_MULTIPART_CHUNK_SIZE_KEY,
+        )
+        self.hosting_max_concurrency = self._load_optional_hosting_config_field(self.HOSTING_MAX_CONCURRENCY_KEY)
+        self.hosting_max_bandwidth = self._load_megabytes_hosting_config_field(self.HOSTING_MAX_BANDWIDTH_KEY)
+        self.hosting_resumable_uploads = bool(
+            self._load_optional_hosting_config_field(self.HOSTING_RESUMABLE_UPLOADS_KEY, default=False),
+        )
+        self.hosting_feed_page_size = self._load_positive_integer_hosting_config_field(
+            self.HOSTING_FEED_PAGE_SIZE_KEY,
+        )
+        self.hosting_compress_feed = bool(
+            self._load_optional_hosting_config_field(self.HOSTING_COMPRESS_FEED_KEY, default=False),
+        )
+        self.hosting_feed_cache_control = self._load_optional_hosting_config_field(
+            self.HOSTING_FEED_CACHE_CONTROL_KEY,
+        )
+        self.hosting_feed_formats = self._load_feed_formats_hosting_config_field(self.HOSTING_FEED_FORMATS_KEY)
+        self.hosting_database_backup_retention = self._load_positive_integer_hosting_config_field(
+            self.HOSTING_DATABASE_BACKUP_RETENTION_KEY,
+        ) or DatabaseBackup.DEFAULT_RETENTION
+        self.hosting_sync_database = bool(
+            self._load_optional_hosting_config_field(self.HOSTING_SYNC_DATABASE_KEY, default=True),
+        )
+
+        self.author = self._load_generic_podcast_config_field(self.AUTHOR_KEY)
+        self.category = self._load_generic_podcast_config_field(self.CATEGORY_KEY)
+        self.description = self._load_generic_podcast_config_field(self.DESCRIPTION_KEY)
+        self.email = self._load_generic_podcast_config_field(self.EMAIL_KEY)
+        self.guid = self._load_optional_podcast_config_field(self.GUID_KEY)
+        self.is_explicit = self._load_generic_podcast_config_field(self.IS_EXPLICIT_KEY)
+        self.language = self._load_generic_podcast_config_field(self.LANGUAGE_KEY)
+        self.logo_uri = self._load_generic_podcast_config_field(self.LOGO_URI_KEY)
+        self.name = self._load_generic_podcast_config_field(self.NAME_KEY)
+        self.subtitle = self._load_generic_podcast_config_field(self.SUBTITLE_KEY)
+        self.website = self._load_generic_podcast_config_field(self.WEBSITE_KEY)
+
+        if manifest_location:
+            self.manifest_entries = self._load_manifest_entries(manifest_location)
+        elif not republish and not read_only:
+            self.episode_title = self.verify_episode_title(episode_title)
+            self.episode_description = self._extract_episode_description(episode_description)
+            self.episode_duration = self.verify_episode_duration(episode_duration)
+            self.episode_file_location = self.verify_episode_file_location(episode_file_location)
+            self.episode_file_uri = self.verify_episode_file_uri(episode_file_uri)
+            self.episode_is_explicit = self.verify_episode_is_explicit(episode_is_explicit)
+            self.episode_release = self.verify_episode_release(episode_release)
+
+            if not self.episode_file_uri:
+                self.episode_file_uri = self._build_episode_file_uri(self.episode_file_location)
 
     def _load_generic_hosting_config_field(self, field_key):
         field = self.config.get(self.HOSTING_KEY, {}).get(field_key)
@@ -305,6 +1362,48 @@ class Pycaster:
 
         return field
 
+    def _load_optional_hosting_config_field(self, field_key, default=None):
+        field = self.config.get(self.HOSTING_KEY, {}).get(field_key)
+
+        if field is None:
+            return default
+
+        return field
+
+    def _load_megabytes_hosting_config_field(self, field_key):
+        megabytes = self._load_optional_hosting_config_field(field_key)
+
+        if megabytes is None:
+            return None
+
+        if not isinstance(megabytes, (int, float)) or megabytes <= 0:
+            raise self.build_illegal_configuration_exception(f'{self.HOSTING_KEY}.{field_key}')
+
+        return int(megabytes * self.BYTES_PER_MEGABYTE)
+
+    def _load_positive_integer_hosting_config_field(self, field_key):
+        value = self._load_optional_hosting_config_field(field_key)
+
+        if value is None:
+            return None
+
+        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+            raise self.build_illegal_configuration_exception(f'{self.HOSTING_KEY}.{field_key}')
+
+        return value
+
+    def _load_feed_formats_hosting_config_field(self, field_key):
+        names = self._load_optional_hosting_config_field(field_key, default=[RssFormat.NAME])
+
+        if not isinstance(names, list) or not names:
+            raise self.build_illegal_configuration_exception(f'{self.HOSTING_KEY}.{field_key}')
+
+        try:
+            # Duplicates are dropped, as every format is rendered and uploaded once
+            return [FeedFormat.find(name) for name in dict.fromkeys(names)]
+        except (TypeError, ValueError):
+            raise self.build_illegal_configuration_exception(f'{self.HOSTING_KEY}.{field_key}')
+
     def _load_generic_podcast_config_field(self, field_key):
         field = self.config.get(self.PODCAST_KEY, {}).get(field_key)
 
@@ -313,15 +1412,43 @@ class Pycaster:
 
         return field
 
+    def _load_optional_podcast_config_field(self, field_key, default=None):
+        field = self.config.get(self.PODCAST_KEY, {}).get(field_key)
+
+        if field is None:
+            return default
+
+        return field
+
     def _load_config(self):
-        with open(os.path.abspath(Path(self.CONFIG_PATH).resolve()), 'r') as file:
+        with open(os.path.abspath(Path(self.config_location).resolve()), 'r') as file:
             config = json.loads(file.read())
 
             if not config:
-                raise ImportError(f"A configuration file could not be found at the default path '{self.CONFIG_PATH}'")
+                raise ImportError(f"A configuration file could not be found at the path '{self.config_location}'")
 
             return config
 
+    def _load_manifest_entries(self, manifest_location):
+        return self._verify_manifest_entries(Manifest(manifest_location).entries)
+
+    def _verify_manifest_entries(self, entries):
+        for entry in entries:
+            entry.title = self.verify_episode_title(entry.title)
+            entry.description = self._extract_episode_description(entry.description)
+            entry.duration = self.verify_episode_duration(entry.duration)
+            entry.file_location = self.verify_episode_file_location(entry.file_location)
+            entry.file_uri = self.verify_episode_file_uri(entry.file_uri)
+            entry.is_explicit = self.verify_episode_is_explicit(entry.is_explicit)
+            entry.release = self.verify_episode_release(entry.release)
+
+            if not entry.file_uri:
+                entry.file_uri = self._build_episode_file_uri(entry.file_location)
+
+        self.verify_manifest_entries_unique(entries)
+
+        return entries
+
     def _extract_episode_description(self, description_input):
         description_input = self.verify_episode_description(description_input)
 
@@ -331,45 +1458,58 @@ class Pycaster:
         else:
             return description_input
 
-    def _convert_episode_itunes_summary(self, summary):
-        summary = str(html.unescape(summary)) \
-            .replace('<br>', '  |  \r\n\r\n') \
-            .replace('</h1>', '  |  \r\n\r\n') \
-            .replace('</h2>', '  |  \r\n\r\n') \
-            .replace('</h3>', '  |  \r\n\r\n') \
-            .replace('</p>', '  \r\n') \
-            .replace('<li>', ' • ') \
-            .replace('</li>', '  \r\n')
-        return re.compile(self.HTML_TAG_REGEX).sub('', summary)
-
-    def _build_episode_file_uri(self):
+    def _build_episode_file_uri(self, file_location):
+        return self._build_hosted_file_uri(self.hosting_episode_path, Path(file_location).resolve().name)
+
+    def _build_feed_file_uri(self, file_name):
+        if self.origin_url is not None:
+            return f'{self.origin_url}/{self.hosting_feed_path}/{file_name}'
+        return self._build_hosted_file_uri(self.hosting_feed_path, file_name)
+
+    def _build_hosted_file_uri(self, upload_path, file_name):
+        return self._build_hosted_object_uri(f'{upload_path}/{file_name}')
+
+    def _build_hosted_object_uri(self, key):
         endpoint_protocol, raw_endpoint_url = self.remove_http_from_url(self.hosting_endpoint_url)
         return (
                 f'{endpoint_protocol}://' +
                 f'{self.hosting_bucket}.' +
                 f'{raw_endpoint_url}/' +
-                f'{self.hosting_episode_path}/' +
-                f'{Path(self.episode_file_location).resolve().name}'
+                f'{key}'
         )
 
-    def _set_id3_tags(self):
-        tag = Tag()
-        tag.parse(str(Path(self.episode_file_location).resolve().absolute()))
+    def _set_id3_tags(self, file_location, title):
+        from media import PaddedTag
+
+        tag = PaddedTag()
+        tag.parse(str(Path(file_location).resolve().absolute()))
 
         logo_data, logo_mimetype = self._retrieve_logo()
 
         tag.album = self.name
         tag.artist = self.author
         tag.images.set(3, logo_data, logo_mimetype, 'Logo')
-        tag.title = self.episode_title
+        tag.title = title
         tag.year = datetime.today().year
 
         tag.save()
 
     def _retrieve_logo(self):
-        response = requests.get(self.logo_uri)
-        mime_type = response.headers['content-type']
-        return response.content, mime_type
+        with self.metrics.stage(self.LOGO_FETCH_STAGE):
+            return self.logo_cache.retrieve(self.logo_uri)
+
+    def _report_error(self, action, exception):
+        stage = f" in the '{self.metrics.failed_stage}' stage" if self.metrics.failed_stage else ''
+        show = f" of the show '{self.metrics.show}'" if self.metrics.show else ''
+        print(f"\nAn error occurred while {action}{show}{stage}: '{repr(exception)}'")
+
+        self.metrics.finish(exception)
+
+    def _exit_with_error(self, action, exception):
+        self._report_error(action, exception)
+
+        # A non-zero exit status lets schedulers like cron notice the failure
+        sys.exit(1)
 
     @staticmethod
     def verify_episode_title(episode_title):
@@ -385,8 +1525,11 @@ class Pycaster:
 
     @staticmethod
     def verify_episode_duration(episode_duration):
-        if not episode_duration or ':' not in episode_duration:
-            raise ValueError("The episode duration is missing")
+        if not episode_duration:
+            # Measured from the MPEG frames of the episode file instead
+            return None
+        if ':' not in episode_duration:
+            raise ValueError("The episode duration is malformed")
         return episode_duration
 
     @staticmethod
@@ -407,6 +1550,34 @@ class Pycaster:
             raise ValueError("The information if the episode contains explicit content is missing")
         return episode_is_explicit
 
+    @classmethod
+    def verify_episode_release(cls, episode_release):
+        if not episode_release:
+            # Released right away
+            return None
+
+        import pytz
+
+        try:
+            release = datetime.fromisoformat(str(episode_release).strip())
+        except ValueError:
+            raise ValueError("The episode release time is malformed")
+
+        if release.tzinfo is None:
+            # Times without an offset are meant in the timezone the episodes are published in
+            release = pytz.timezone(cls.DEFAULT_TIMEZONE_KEY).localize(release)
+
+        return release
+
+    @staticmethod
+    def verify_manifest_entries_unique(entries):
+        for attribute, name in (('title', 'title'), ('file_uri', 'file URI')):
+            values = [getattr(entry, attribute) for entry in entries]
+            duplicates = sorted({value for value in values if values.count(value) > 1})
+            if duplicates:
+                raise ValueError(f"The manifest contains episodes with the same {name}: {duplicates}")
+        return entries
+
     @staticmethod
     def build_missing_config_exception(json_path):
         return ValueError(f"The configuration file is missing information in the path: '{json_path}'")
@@ -419,10 +1590,6 @@ class Pycaster:
     def convert_to_character_data(content):
         return f"<![CDATA[{content}]]>"
 
-    @staticmethod
-    def calculate_file_size(file_location):
-        return Path(file_location).resolve().stat().st_size
-
     @staticmethod
     def remove_http_from_url(url):
         if 'http://' in url:
@@ -434,15 +1601,46 @@ class Pycaster:
         return protocol, url
 
     @staticmethod
-    @click.command()
+    @click.group(invoke_without_command=True)
     @click.option('--republish', default=False)
-    @click.option('--title', prompt='Enter the title of this episode', default='')
-    @click.option('--description', prompt='Enter the description of this episode (can be path to a file)', default='')
-    @click.option('--explicit', prompt='Enter "yes" or "no" regarding the the episode being explicit', default='no')
-    @click.option('--duration', prompt='Enter the duration (mm:ss) of this episode', default='00:00')
-    @click.option('--file', prompt='Enter the file location of this episode', default='')
-    @click.option('--fileuri', prompt='[Optional] Enter the final file URI after the upload', default='')
-    def read_arguments(republish, title, description, explicit, duration, file, fileuri):
+    @click.option('--title', default=None)
+    @click.option('--description', default=None)
+    @click.option('--explicit', default=None)
+    @click.option('--duration', default=None)
+    @click.option('--file', default=None)
+    @click.option('--fileuri', default=None)
+    @click.option('--release', default=None, help='Time the episode is released in the feed, e.g. 2020-06-01T06:00')
+    @click.option('--metrics-file', default=None, help='File the stage metrics are appended to, - for stderr')
+    @click.option('--prometheus-textfile', default=None, help='File the metrics of the run are written to')
+    @click.pass_context
+    def read_arguments(
+            context, republish, title, description, explicit, duration, file, fileuri, release, metrics_file,
+            prometheus_textfile,
+    ):
+        # Named after the sub-command, so that the metrics of different kinds of runs can be told apart
+        command = context.invoked_subcommand or ('republish' if republish else 'publish')
+        context.obj = Metrics(command=command, log_file=metrics_file, prometheus_textfile=prometheus_textfile)
+
+        if context.invoked_subcommand is not None:
+            return
+
+        if not republish:
+            # Prompting happens here instead of on the options so that sub-commands are not prompted as well
+            if title is None:
+                title = click.prompt('Enter the title of this episode', default='')
+            if description is None:
+                description = click.prompt('Enter the description of this episode (can be path to a file)', default='')
+            if explicit is None:
+                explicit = click.prompt('Enter "yes" or "no" regarding the the episode being explicit', default='no')
+            if duration is None:
+                duration = click.prompt('[Optional] Enter the duration (mm:ss) of this episode', default='')
+            if file is None:
+                file = click.prompt('Enter the file location of this episode', default='')
+            if fileuri is None:
+                fileuri = click.prompt('[Optional] Enter the final file URI after the upload', default='')
+            if release is None:
+                release = click.prompt('[Optional] Enter the release time (YYYY-MM-DD HH:MM)', default='')
+
         pycaster = Pycaster(
             republish=republish,
             episode_title=title,
@@ -451,6 +1649,8 @@ class Pycaster:
             episode_file_location=file,
             episode_file_uri=fileuri,
             episode_is_explicit=explicit,
+            episode_release=release,
+            metrics=context.obj,
         )
 
         if republish:
@@ -458,6 +1658,163 @@ class Pycaster:
         else:
             pycaster.publish_new_episode()
 
+    @staticmethod
+    @click.command('batch')
+    @click.argument('manifest')
+    @click.option('--workers', default=DEFAULT_UPLOAD_WORKERS, help='Number of episodes uploaded concurrently')
+    @click.pass_obj
+    def read_batch_arguments(metrics, manifest, workers):
+        pycaster = Pycaster(
+            republish=False,
+            manifest_location=manifest,
+            upload_workers=workers,
+            metrics=metrics,
+        )
+
+        pycaster.publish_episode_batch()
+
+    @staticmethod
+    @click.command('list')
+    @click.option('--limit', default=None, type=int, help='Number of the newest episodes that are listed')
+    @click.option('--sync', is_flag=True, help='Syncs the database from the bucket before listing')
+    @click.pass_obj
+    def read_list_arguments(metrics, limit, sync):
+        pycaster = Pycaster(
+            republish=False,
+            metrics=metrics,
+            read_only=True,
+            sync_database=sync,
+        )
+
+        pycaster.list_episodes(limit=limit)
+
+    @staticmethod
+    @click.command('recompute-summaries')
+    @click.pass_obj
+    def read_recompute_summaries_arguments(metrics):
+        pycaster = Pycaster(
+            republish=False,
+            metrics=metrics,
+            read_only=True,
+        )
+
+        pycaster.recompute_itunes_summaries()
+
+    @staticmethod
+    @click.command('import')
+    @click.argument('feed')
+    @click.option('--on-conflict', default=Database.ABORT_ON_CONFLICTS,
+                  type=click.Choice(list(Database.CONFLICT_INSERT_CLAUSES)),
+                  help='Resolution of episodes whose title or file URI already exists in the database')
+    @click.pass_obj
+    def read_import_arguments(metrics, feed, on_conflict):
+        pycaster = Pycaster(
+            republish=False,
+            metrics=metrics,
+            read_only=True,
+        )
+
+        pycaster.import_feed(feed_location=feed, conflict_resolution=on_conflict)
+
+    @staticmethod
+    @click.command('reconcile')
+    @click.option('--workers', default=DEFAULT_RECONCILE_WORKERS,
+                  help='Number of episode files that are inspected or repaired concurrently')
+    @click.option('--dry-run', is_flag=True, help='Only reports the drift between the bucket and the database')
+    @click.pass_obj
+    def read_reconcile_arguments(metrics, workers, dry_run):
+        pycaster = Pycaster(
+            republish=False,
+            metrics=metrics,
+            read_only=True,
+        )
+
+        pycaster.reconcile_bucket(workers=workers, dry_run=dry_run)
+
+    @staticmethod
+    @click.command('shows')
+    @click.argument('configs', nargs=-1, required=True)
+    @click.option('--workers', default=DEFAULT_SHOW_WORKERS, help='Number of shows re-published concurrently')
+    @click.pass_obj
+    def read_shows_arguments(metrics, configs, workers):
+        Pycaster.republish_shows(config_locations=configs, workers=workers, metrics=metrics)
+
+    @staticmethod
+    @click.command('watch')
+    @click.argument('drop_directory')
+    @click.option('--settle', default=DEFAULT_WATCH_SETTLE_SECONDS,
+                  help='Seconds the drop directory has to be quiet before its new episodes are published')
+    @click.option('--poll-interval', default=DEFAULT_WATCH_POLL_INTERVAL,
+                  help='Seconds between two scans of the drop directory, if inotify is not available')
+    @click.option('--polling', is_flag=True, help='Scans the drop directory periodically instead of using inotify')
+    @click.option('--workers', default=DEFAULT_UPLOAD_WORKERS, help='Number of episodes uploaded concurrently')
+    @click.pass_obj
+    def read_watch_arguments(metrics, drop_directory, settle, poll_interval, polling, workers):
+        pycaster = Pycaster(
+            republish=False,
+            upload_workers=workers,
+            metrics=metrics,
+            read_only=True,
+        )
+
+        pycaster.watch_drop_directory(
+            drop_directory_location=drop_directory,
+            settle_seconds=settle,
+            poll_interval=poll_interval,
+            force_polling=polling,
+        )
+
+    @staticmethod
+    @click.command('schedule')
+    @click.option('--coalesce', default=DEFAULT_RELEASE_COALESCE_SECONDS,
+                  help='Seconds within which releases are published together with a single update of the feed')
+    @click.option('--recheck-interval', default=DEFAULT_RELEASE_RECHECK_INTERVAL,
+                  help='Seconds after which the schedule is looked up again for newly scheduled episodes')
+    @click.pass_obj
+    def read_schedule_arguments(metrics, coalesce, recheck_interval):
+        pycaster = Pycaster(
+            republish=False,
+            metrics=metrics,
+            read_only=True,
+        )
+
+        pycaster.run_release_schedule(coalesce_seconds=coalesce, recheck_interval=recheck_interval)
+
+    @staticmethod
+    @click.command('serve')
+    @click.argument('episode_directory')
+    @click.option('--host', default=DEFAULT_SERVE_HOST, help='Address the server listens on')
+    @click.option('--port', default=DEFAULT_SERVE_PORT, help='Port the server listens on')
+    @click.option('--base-url', default=None,
+                  help='URL the server is reached at, e.g. of a CDN in front of it, which the feed links to')
+    @click.option('--sync', is_flag=True, help='Restores the database from the bucket before serving')
+    @click.pass_obj
+    def read_serve_arguments(metrics, episode_directory, host, port, base_url, sync):
+        pycaster = Pycaster(
+            republish=False,
+            metrics=metrics,
+            read_only=True,
+            sync_database=sync,
+        )
+
+        pycaster.serve_origin(
+            episode_directory_location=episode_directory,
+            host=host,
+            port=port,
+            base_url=base_url,
+        )
+
+
+Pycaster.read_arguments.add_command(Pycaster.read_batch_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_list_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_recompute_summaries_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_import_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_reconcile_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_shows_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_watch_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_schedule_arguments)
+Pycaster.read_arguments.add_command(Pycaster.read_serve_arguments)
+
 
 if __name__ == '__main__':
     Pycaster.read_arguments()
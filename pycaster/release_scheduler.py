@@ -0,0 +1,54 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class ReleaseScheduler:
+    """
+    Waits for the release times of scheduled episodes. Releases that fall within the coalesce time of the first one
+    are handed out together once the last of them is due, so that they only cause a single update of the feed.
+    """
+
+    def __init__(self, find_next_release, refresh_schedule, coalesce_seconds, recheck_interval):
+        self.find_next_release = find_next_release
+        self.refresh_schedule = refresh_schedule
+        self.coalesce_time = timedelta(seconds=coalesce_seconds)
+        self.recheck_interval = recheck_interval
+
+    def wait_for_releases(self):
+        released_until = datetime.now(timezone.utc)
+
+        while True:
+            # Picks up the episodes that were scheduled by runs on other hosts
+            self.refresh_schedule()
+            release_time = self._find_coalesced_release(released_until)
+            now = datetime.now(timezone.utc)
+
+            if release_time is None or release_time > now:
+                # Other runs may schedule further episodes meanwhile, hence the schedule is looked up again regularly
+                delay = self.recheck_interval
+                if release_time is not None:
+                    delay = min(delay, (release_time - now).total_seconds())
+
+                time.sleep(delay)
+                continue
+
+            released_until = now
+
+            yield release_time
+
+    def _find_coalesced_release(self, released_until):
+        first_release = self.find_next_release(after=released_until)
+
+        if first_release is None:
+            return None
+
+        last_release = first_release
+
+        # Bounded by the first release, so that a steady trickle of releases cannot postpone it indefinitely
+        while True:
+            next_release = self.find_next_release(after=last_release)
+
+            if next_release is None or next_release - first_release > self.coalesce_time:
+                return last_release
+
+            last_release = next_release
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from database_sync import DatabaseSync
+
+
+class Show:
+    CACHE_DIRECTORY = '.pycaster-cache'
+    DATABASE_FILE_EXTENSION = '.db'
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+
+    @property
+    def name(self):
+        return self.config_path.stem
+
+    @property
+    def database_file(self):
+        # Kept next to the configuration, so that the shows of a network never share a database
+        return str(self.config_path.with_suffix(self.DATABASE_FILE_EXTENSION))
+
+    @property
+    def cache_directory(self):
+        return str(self.config_path.parent / self.CACHE_DIRECTORY / self.name)
+
+
+class ShowNetwork:
+    """
+    The shows of a network, each with a configuration file of its own, e.g. `shows/gist-of-it.json`.
+    Every show keeps its own database and caches next to its configuration, named after the configuration file.
+    """
+    CONFIG_FILE_EXTENSION = '.json'
+
+    def __init__(self, config_locations):
+        self.shows = self._find_shows(config_locations)
+
+    def _find_shows(self, config_locations):
+        shows = {}
+
+        for config_location in config_locations:
+            config_path = Path(config_location).resolve()
+
+            if config_path.is_dir():
+                # The sync states of the databases next to the configurations are JSON files as well
+                config_paths = sorted(
+                    path for path in config_path.glob(f'*{self.CONFIG_FILE_EXTENSION}')
+                    if not path.name.endswith(DatabaseSync.SYNC_STATE_FILE_EXTENSION)
+                )
+            elif config_path.is_file():
+                config_paths = [config_path]
+            else:
+                raise ValueError(f"No show configuration could be found at '{config_location}'")
+
+            for show_config_path in config_paths:
+                show = Show(show_config_path)
+
+                # Shows of the same name would share their database and caches
+                if show.name in shows and shows[show.name].config_path != show_config_path:
+                    raise ValueError(f"There is more than one show named '{show.name}'")
+
+                shows[show.name] = show
+
+        if not shows:
+            raise ValueError('No show configurations were given')
+
+        return list(shows.values())
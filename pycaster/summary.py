@@ -0,0 +1,27 @@
+import html
+import re
+
+
+class ItunesSummary:
+    PARAGRAPH_BREAK = '  |  \r\n\r\n'
+    LINE_BREAK = '  \r\n'
+    LIST_ITEM_BULLET = ' • '
+    TAG_PATTERN = re.compile(r'(<!--.*?-->|<[^>]*>)')
+    # Tags that are not listed here, as well as comments, are removed without a replacement
+    TAG_REPLACEMENTS = {
+        '<br>': PARAGRAPH_BREAK,
+        '</h1>': PARAGRAPH_BREAK,
+        '</h2>': PARAGRAPH_BREAK,
+        '</h3>': PARAGRAPH_BREAK,
+        '</p>': LINE_BREAK,
+        '<li>': LIST_ITEM_BULLET,
+        '</li>': LINE_BREAK,
+    }
+
+    @classmethod
+    def convert(cls, description):
+        # Scanned once instead of once per tag, splitting by the captured tags puts every tag at an odd index
+        parts = cls.TAG_PATTERN.split(html.unescape(str(description)))
+        parts[1::2] = [cls.TAG_REPLACEMENTS.get(tag, '') for tag in parts[1::2]]
+
+        return ''.join(parts)
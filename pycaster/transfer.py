@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+
+class TransferProgress:
+    BYTES_PER_MEGABYTE = 1024 * 1024
+    REPORT_INTERVAL_SECONDS = 0.5
+
+    def __init__(self, label, total_bytes):
+        self.label = label
+        self.total_bytes = total_bytes
+        self.transferred_bytes = 0
+        self.skipped_bytes = 0
+        self.started = time.monotonic()
+        self.last_report = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, bytes_amount):
+        with self.lock:
+            self.transferred_bytes += bytes_amount
+            now = time.monotonic()
+
+            if now - self.last_report >= self.REPORT_INTERVAL_SECONDS:
+                self.last_report = now
+                self._report(now)
+
+    def skip(self, bytes_amount):
+        # Bytes that did not have to be transferred count towards the progress, but not towards the throughput
+        with self.lock:
+            self.transferred_bytes += bytes_amount
+            self.skipped_bytes += bytes_amount
+
+    def finish(self):
+        with self.lock:
+            self._report(time.monotonic())
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+
+    def throughput(self, now=None):
+        elapsed = (now or time.monotonic()) - self.started
+        if elapsed <= 0:
+            return 0.0
+        return (self.transferred_bytes - self.skipped_bytes) / self.BYTES_PER_MEGABYTE / elapsed
+
+    def _report(self, now):
+        percentage = (self.transferred_bytes / self.total_bytes) * 100 if self.total_bytes else 100.0
+        sys.stdout.write(f'\r{self.label}: {percentage:.1f}% ({self.throughput(now):.2f} MB/s)')
+        sys.stdout.flush()
+
+
+class BandwidthLimiter:
+    def __init__(self, max_bandwidth):
+        self.max_bandwidth = max_bandwidth
+        self.started = time.monotonic()
+        self.consumed_bytes = 0
+        self.lock = threading.Lock()
+
+    def consume(self, bytes_amount):
+        if not self.max_bandwidth:
+            return
+
+        with self.lock:
+            self.consumed_bytes += bytes_amount
+            ahead = self.consumed_bytes / self.max_bandwidth - (time.monotonic() - self.started)
+
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+class ResumableUpload:
+    CHECKPOINT_FILE_EXTENSION = '.json'
+    NO_SUCH_UPLOAD_ERROR_CODE = 'NoSuchUpload'
+
+    def __init__(
+            self, client, file_path, bucket, key, extra_args, transfer_config, checkpoint_directory, progress=None,
+    ):
+        self.client = client
+        self.file_path = Path(file_path)
+        self.bucket = bucket
+        self.key = key
+        self.extra_args = extra_args
+        self.chunk_size = transfer_config.multipart_chunksize
+        self.max_concurrency = transfer_config.max_request_concurrency
+        self.bandwidth_limiter = BandwidthLimiter(getattr(transfer_config, 'max_bandwidth', None))
+        self.checkpoint_path = self._build_checkpoint_path(checkpoint_directory, bucket, key)
+        self.progress = progress
+        self.file_size = self.file_path.stat().st_size
+        self.lock = threading.Lock()
+
+    def upload(self):
+        checkpoint = self._load_checkpoint()
+
+        if checkpoint is None:
+            checkpoint = self._start_upload()
+        else:
+            print(f"\nResuming the upload of '{self.key}' with {len(checkpoint['parts'])} part(s) already sent")
+
+        missing_part_numbers = [
+            part_number for part_number in range(1, self._count_parts() + 1)
+            if not self._part_already_uploaded(checkpoint, part_number)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for _ in executor.map(lambda part_number: self._upload_part(checkpoint, part_number), missing_part_numbers):
+                pass
+
+        response = self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=checkpoint['upload_id'],
+            MultipartUpload={
+                'Parts': [
+                    {'PartNumber': int(part_number), 'ETag': etag}
+                    for part_number, etag in sorted(checkpoint['parts'].items(), key=lambda part: int(part[0]))
+                ],
+            },
+        )
+
+        self._delete_checkpoint()
+
+        return response
+
+    def _start_upload(self):
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key, **self.extra_args)
+
+        checkpoint = {
+            'bucket': self.bucket,
+            'key': self.key,
+            'file_size': self.file_size,
+            'chunk_size': self.chunk_size,
+            'upload_id': response['UploadId'],
+            'parts': {},
+        }
+        self._save_checkpoint(checkpoint)
+
+        return checkpoint
+
+    def _upload_part(self, checkpoint, part_number):
+        data = self._read_part(part_number)
+
+        self.bandwidth_limiter.consume(len(data))
+
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=checkpoint['upload_id'],
+            PartNumber=part_number,
+            Body=data,
+        )
+
+        with self.lock:
+            checkpoint['parts'][str(part_number)] = response['ETag']
+            self._save_checkpoint(checkpoint)
+
+        if self.progress:
+            self.progress(len(data))
+
+    def _part_already_uploaded(self, checkpoint, part_number):
+        etag = checkpoint['parts'].get(str(part_number))
+
+        if etag is None:
+            return False
+
+        # The file might have been re-tagged since the interrupted run, so the part is only skipped if it is unchanged
+        data = self._read_part(part_number)
+        if etag.strip('"') != hashlib.md5(data).hexdigest():
+            return False
+
+        if self.progress:
+            self.progress.skip(len(data))
+
+        return True
+
+    def _read_part(self, part_number):
+        with open(str(self.file_path), 'rb') as file:
+            file.seek((part_number - 1) * self.chunk_size)
+            return file.read(self.chunk_size)
+
+    def _count_parts(self):
+        return max(1, -(-self.file_size // self.chunk_size))
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path.is_file():
+            return None
+
+        with open(str(self.checkpoint_path), 'r') as file:
+            checkpoint = json.loads(file.read())
+
+        if checkpoint.get('file_size') != self.file_size or checkpoint.get('chunk_size') != self.chunk_size:
+            self._abort_upload(checkpoint['upload_id'])
+            self._delete_checkpoint()
+            return None
+
+        try:
+            uploaded_parts = self._list_uploaded_parts(checkpoint['upload_id'])
+        except ClientError as exception:
+            if exception.response.get('Error', {}).get('Code') != self.NO_SUCH_UPLOAD_ERROR_CODE:
+                raise
+            self._delete_checkpoint()
+            return None
+
+        # Only parts the storage provider actually knows about can be skipped
+        checkpoint['parts'] = {
+            part_number: etag for part_number, etag in checkpoint['parts'].items()
+            if uploaded_parts.get(int(part_number)) == etag
+        }
+
+        return checkpoint
+
+    def _list_uploaded_parts(self, upload_id):
+        uploaded_parts = {}
+        paginator = self.client.get_paginator('list_parts')
+
+        for page in paginator.paginate(Bucket=self.bucket, Key=self.key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                uploaded_parts[part['PartNumber']] = part['ETag']
+
+        return uploaded_parts
+
+    def _abort_upload(self, upload_id):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=upload_id)
+        except ClientError:
+            pass
+
+    def _save_checkpoint(self, checkpoint):
+        temporary_path = self.checkpoint_path.with_suffix('.tmp')
+
+        with open(str(temporary_path), 'w') as file:
+            file.write(json.dumps(checkpoint))
+
+        os.replace(str(temporary_path), str(self.checkpoint_path))
+
+    def _delete_checkpoint(self):
+        if self.checkpoint_path.is_file():
+            os.remove(str(self.checkpoint_path))
+
+    def _build_checkpoint_path(self, checkpoint_directory, bucket, key):
+        checkpoint_directory = Path(checkpoint_directory).resolve()
+        checkpoint_directory.mkdir(parents=True, exist_ok=True)
+        checkpoint_name = hashlib.sha1(f'{bucket}/{key}'.encode()).hexdigest()
+        return checkpoint_directory / f'{checkpoint_name}{self.CHECKPOINT_FILE_EXTENSION}'
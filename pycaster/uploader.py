@@ -1,57 +1,458 @@
+import functools
+import hashlib
+import os
+import shutil
 from pathlib import Path
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
+from metrics import Metrics
+from object_index import ObjectIndex
+from transfer import ResumableUpload, TransferProgress
 
 
 class Uploader:
     S3_KEY = 's3'
     CONTENT_TYPE_KEY = 'ContentType'
+    CONTENT_ENCODING_KEY = 'ContentEncoding'
+    CACHE_CONTROL_KEY = 'CacheControl'
+    METADATA_KEY = 'Metadata'
+    ETAG_KEY = 'ETag'
+    CONTENT_MD5_METADATA_KEY = 'content-md5'
+    CONTENT_SHA256_METADATA_KEY = 'content-sha256'
+    COMPARED_EXTRA_ARGS_KEYS = (CONTENT_TYPE_KEY, CONTENT_ENCODING_KEY, CACHE_CONTROL_KEY)
+    HASH_CHUNK_SIZE = 1024 * 1024
+    LIST_OBJECTS_OPERATION = 'list_objects_v2'
+    CONTENTS_KEY = 'Contents'
+    KEY_KEY = 'Key'
+    SIZE_KEY = 'Size'
+    DELETE_BATCH_SIZE = 1000
+    BODY_KEY = 'Body'
+    COPY_OBJECT_RESULT_KEY = 'CopyObjectResult'
+    NOT_MODIFIED_STATUS_CODE = 304
+    NOT_FOUND_STATUS_CODE = 404
     PUBLIC_EXTRA_ARGS = {'ACL': 'public-read'}
+    GRANTS_KEY = 'Grants'
+    GRANTEE_KEY = 'Grantee'
+    PERMISSION_KEY = 'Permission'
+    URI_KEY = 'URI'
+    ALL_USERS_GROUP_URI = 'http://acs.amazonaws.com/groups/global/AllUsers'
+    PUBLIC_READ_PERMISSIONS = ('READ', 'FULL_CONTROL')
+    REPLACE_METADATA_DIRECTIVE = 'REPLACE'
+    RESPONSE_METADATA_KEY = 'ResponseMetadata'
+    RETRY_ATTEMPTS_KEY = 'RetryAttempts'
+    AFTER_CALL_EVENT = 'after-call.s3'
+    UPLOAD_STAGE = 'upload'
 
-    def __init__(self, region_name, endpoint_url, access_key, secret):
-        self.session = self.init_session()
-        self.client = self._init_client(region_name, endpoint_url, access_key, secret)
+    def __init__(
+            self,
+            region_name,
+            endpoint_url,
+            access_key,
+            secret,
+            multipart_threshold=None,
+            multipart_chunk_size=None,
+            max_concurrency=None,
+            max_bandwidth=None,
+            resumable=False,
+            checkpoint_directory=None,
+            metrics=None,
+            client=None,
+    ):
+        self.metrics = metrics or Metrics(command=None)
 
-    def upload_file_publicly(self, file_location, upload_path, bucket, extra_args={}, overwrite=False):
+        if client is None:
+            self.session = self.init_session()
+            self.client = self._init_client(region_name, endpoint_url, access_key, secret)
+            self.client.meta.events.register(self.AFTER_CALL_EVENT, self._count_retries)
+        else:
+            # A client shared by several uploaders counts its retries for all of them, see `init_shared_client`
+            self.client = client
+
+        self.transfer_config = self.init_transfer_config(
+            multipart_threshold=multipart_threshold,
+            multipart_chunk_size=multipart_chunk_size,
+            max_concurrency=max_concurrency,
+            max_bandwidth=max_bandwidth,
+        )
+        self.resumable = resumable
+        self.checkpoint_directory = checkpoint_directory
+        self.object_index = ObjectIndex()
+
+    def upload_file_publicly(
+            self, file_location, upload_path, bucket, extra_args={}, overwrite=False, skip_unchanged=False,
+            content_hash=None,
+    ):
         return self._upload_file(
             file_location=file_location,
             upload_path=upload_path,
             bucket=bucket,
             extra_args={**self.PUBLIC_EXTRA_ARGS, **extra_args},
             overwrite=overwrite,
+            skip_unchanged=skip_unchanged,
+            content_hash=content_hash,
         )
 
-    def upload_file_privately(self, file_location, upload_path, bucket, extra_args={}, overwrite=False):
+    def upload_file_privately(
+            self, file_location, upload_path, bucket, extra_args={}, overwrite=False, skip_unchanged=False,
+    ):
         return self._upload_file(
             file_location=file_location,
             upload_path=upload_path,
             bucket=bucket,
             extra_args=extra_args,
             overwrite=overwrite,
+            skip_unchanged=skip_unchanged,
+        )
+
+    def upload_fileobj_publicly(
+            self, fileobj, file_name, upload_path, bucket, extra_args={}, overwrite=False, skip_unchanged=False,
+    ):
+        return self._upload_fileobj(
+            fileobj=fileobj,
+            file_name=file_name,
+            upload_path=upload_path,
+            bucket=bucket,
+            extra_args={**self.PUBLIC_EXTRA_ARGS, **extra_args},
+            overwrite=overwrite,
+            skip_unchanged=skip_unchanged,
+        )
+
+    def upload_fileobj_privately(
+            self, fileobj, file_name, upload_path, bucket, extra_args={}, overwrite=False, skip_unchanged=False,
+    ):
+        return self._upload_fileobj(
+            fileobj=fileobj,
+            file_name=file_name,
+            upload_path=upload_path,
+            bucket=bucket,
+            extra_args=extra_args,
+            overwrite=overwrite,
+            skip_unchanged=skip_unchanged,
+        )
+
+    def list_files(self, upload_path, bucket):
+        for key, _, _ in self.list_objects(upload_path, bucket):
+            yield key
+
+    def list_objects(self, upload_path, bucket):
+        paginator = self.client.get_paginator(self.LIST_OBJECTS_OPERATION)
+
+        for page in paginator.paginate(Bucket=bucket, Prefix=f'{upload_path}/'):
+            for remote_file in page.get(self.CONTENTS_KEY, []):
+                yield remote_file[self.KEY_KEY], remote_file[self.SIZE_KEY], remote_file[self.ETAG_KEY].strip('"')
+
+    def delete_files(self, file_paths, bucket):
+        file_paths = list(file_paths)
+
+        for batch_start in range(0, len(file_paths), self.DELETE_BATCH_SIZE):
+            batch = file_paths[batch_start:batch_start + self.DELETE_BATCH_SIZE]
+            self.client.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{self.KEY_KEY: file_path} for file_path in batch], 'Quiet': True},
+            )
+
+            for file_path in batch:
+                self.object_index.remove(bucket, file_path)
+
+    def download_file_if_changed(self, file_path, bucket, target_fileobj, etag=None):
+        conditions = {'IfNoneMatch': etag} if etag else {}
+
+        try:
+            remote_file = self.client.get_object(Key=file_path, Bucket=bucket, **conditions)
+        except ClientError as exception:
+            status_code = self.extract_status_code(exception)
+
+            if status_code == self.NOT_MODIFIED_STATUS_CODE:
+                return None
+            if status_code == self.NOT_FOUND_STATUS_CODE:
+                raise FileNotFoundError(f"The file at path '{file_path}' does not exist")
+            raise
+
+        shutil.copyfileobj(remote_file[self.BODY_KEY], target_fileobj)
+
+        return remote_file[self.ETAG_KEY]
+
+    def copy_file(self, source_file_path, target_file_path, bucket):
+        response = self.client.copy_object(
+            Bucket=bucket,
+            Key=target_file_path,
+            CopySource={'Bucket': bucket, self.KEY_KEY: source_file_path},
         )
+        etag = response[self.COPY_OBJECT_RESULT_KEY][self.ETAG_KEY]
 
-    def _upload_file(self, file_location, upload_path, bucket, extra_args={}, overwrite=False):
+        source_object = self.object_index.lookup(bucket, source_file_path)
+        if source_object is not None:
+            self.object_index.add(
+                bucket, target_file_path, source_object.size, etag.strip('"'), source_object.content_hash,
+            )
+
+        return etag
+
+    def describe_file_metadata(self, file_path, bucket):
+        return self.client.head_object(Key=file_path, Bucket=bucket)
+
+    def is_publicly_readable(self, file_path, bucket):
+        grants = self.client.get_object_acl(Key=file_path, Bucket=bucket).get(self.GRANTS_KEY, [])
+
+        return any(
+            grant.get(self.GRANTEE_KEY, {}).get(self.URI_KEY) == self.ALL_USERS_GROUP_URI and
+            grant.get(self.PERMISSION_KEY) in self.PUBLIC_READ_PERMISSIONS
+            for grant in grants
+        )
+
+    def rewrite_file_metadata_publicly(self, file_path, bucket, extra_args):
+        # Copied onto itself within the bucket, which replaces the metadata and the ACL without sending the file again
+        response = self.client.copy_object(
+            Bucket=bucket,
+            Key=file_path,
+            CopySource={'Bucket': bucket, self.KEY_KEY: file_path},
+            MetadataDirective=self.REPLACE_METADATA_DIRECTIVE,
+            **{**self.PUBLIC_EXTRA_ARGS, **extra_args},
+        )
+        etag = response[self.COPY_OBJECT_RESULT_KEY][self.ETAG_KEY]
+
+        indexed_object = self.object_index.lookup(bucket, file_path)
+        if indexed_object is not None:
+            self.object_index.add(bucket, file_path, indexed_object.size, etag.strip('"'), indexed_object.content_hash)
+
+        return etag
+
+    def refresh_index(self):
+        # Upload paths are listed again when next looked up, which picks up changes made by other runs meanwhile
+        self.object_index.clear()
+
+    def file_exists(self, file_path, bucket):
+        self._index_upload_path(file_path, bucket)
+        return self.object_index.lookup(bucket, file_path) is not None
+
+    def describe_file(self, file_path, bucket):
+        self._index_upload_path(file_path, bucket)
+        indexed_object = self.object_index.lookup(bucket, file_path)
+
+        if indexed_object is None:
+            raise FileNotFoundError(f"The file at path '{file_path}' does not exist")
+
+        # Objects that were uploaded by this run are indexed without the ETag the bucket assigned to them
+        if indexed_object.etag is None:
+            remote_file = self.client.head_object(Key=file_path, Bucket=bucket)
+            etag = remote_file[self.ETAG_KEY].strip('"')
+            self.object_index.add(bucket, file_path, indexed_object.size, etag, indexed_object.content_hash)
+            indexed_object = self.object_index.lookup(bucket, file_path)
+
+        return indexed_object
+
+    def _upload_file(
+            self, file_location, upload_path, bucket, extra_args={}, overwrite=False, skip_unchanged=False,
+            content_hash=None,
+    ):
         path = Path(file_location).resolve()
         file_upload_path = f'{upload_path}/{str(path.name)}'
 
-        if overwrite is False and self._file_already_exists(file_upload_path, bucket):
+        if overwrite is False and self._already_uploaded(path, file_upload_path, bucket, content_hash):
+            self.metrics.count(Metrics.SKIPPED_UPLOADS)
+            return False
+
+        if content_hash is not None:
+            # Stored along with the file, so that later duplicate checks compare it instead of reading the file again
+            extra_args = self._add_metadata(extra_args, self.CONTENT_SHA256_METADATA_KEY, content_hash)
+
+        if skip_unchanged:
+            content_md5 = self.calculate_content_md5(path)
+
+            if self._file_unchanged(file_upload_path, bucket, content_md5, extra_args):
+                self.metrics.count(Metrics.SKIPPED_UPLOADS)
+                return False
+
+            extra_args = self._add_content_md5_metadata(extra_args, content_md5)
+
+        size = path.stat().st_size
+        progress = TransferProgress(file_upload_path, size)
+
+        with self.metrics.stage(self.UPLOAD_STAGE, file=file_upload_path) as details:
+            if self._should_upload_resumably(path):
+                ResumableUpload(
+                    client=self.client,
+                    file_path=path,
+                    bucket=str(bucket),
+                    key=file_upload_path,
+                    extra_args=extra_args,
+                    transfer_config=self.transfer_config,
+                    checkpoint_directory=self.checkpoint_directory,
+                    progress=progress,
+                ).upload()
+            else:
+                self.client.upload_file(
+                    str(path),
+                    str(bucket),
+                    file_upload_path,
+                    ExtraArgs=extra_args,
+                    Callback=progress,
+                    Config=self.transfer_config,
+                )
+
+            progress.finish()
+            self._record_transfer(details, progress)
+
+        self.object_index.add(bucket, file_upload_path, size, content_hash=content_hash)
+
+        return True
+
+    def _upload_fileobj(
+            self, fileobj, file_name, upload_path, bucket, extra_args={}, overwrite=False, skip_unchanged=False,
+    ):
+        file_upload_path = f'{upload_path}/{file_name}'
+
+        self._raise_if_not_overwritable(file_upload_path, bucket, overwrite)
+
+        if skip_unchanged:
+            content_md5 = self.calculate_fileobj_md5(fileobj)
+
+            if self._file_unchanged(file_upload_path, bucket, content_md5, extra_args):
+                self.metrics.count(Metrics.SKIPPED_UPLOADS)
+                return False
+
+            extra_args = self._add_content_md5_metadata(extra_args, content_md5)
+
+        size = fileobj.seek(0, os.SEEK_END)
+        fileobj.seek(0)
+
+        progress = TransferProgress(file_upload_path, size)
+
+        with self.metrics.stage(self.UPLOAD_STAGE, file=file_upload_path) as details:
+            self.client.upload_fileobj(
+                fileobj,
+                str(bucket),
+                file_upload_path,
+                ExtraArgs=extra_args,
+                Callback=progress,
+                Config=self.transfer_config,
+            )
+
+            progress.finish()
+            self._record_transfer(details, progress)
+
+        self.object_index.add(bucket, file_upload_path, size)
+
+        return True
+
+    def _raise_if_not_overwritable(self, file_upload_path, bucket, overwrite):
+        if overwrite is False and self.file_exists(file_upload_path, bucket):
+            raise FileExistsError(f"The file at upload path '{file_upload_path}' already exists")
+
+    def _already_uploaded(self, path, file_upload_path, bucket, content_hash=None):
+        self._index_upload_path(file_upload_path, bucket)
+
+        existing_object = self.object_index.lookup(bucket, file_upload_path)
+        local_etags = {}
+
+        # Only objects of the very same size can be copies, so the file is rarely read for the comparison at all
+        duplicates = [
+            indexed_object for indexed_object in self.object_index.find_by_size(bucket, path.stat().st_size)
+            if self._has_same_content(path, indexed_object, bucket, content_hash, local_etags)
+        ]
+
+        if existing_object is not None and existing_object in duplicates:
+            return True
+        if existing_object is not None:
             raise FileExistsError(f"The file at upload path '{file_upload_path}' already exists")
+        if duplicates:
+            raise FileExistsError(f"The file '{path.name}' was already uploaded to '{duplicates[0].key}'")
+
+        return False
+
+    def _has_same_content(self, path, indexed_object, bucket, content_hash, local_etags):
+        if content_hash is not None:
+            remote_content_hash = self._lookup_content_hash(indexed_object, bucket)
+
+            if remote_content_hash:
+                return remote_content_hash == content_hash
+
+        # Objects that were uploaded without a content hash can only be compared by calculating their ETag locally
+        if not indexed_object.etag:
+            return False
+
+        # ETags of multipart uploads end with the number of parts, the ones of single part uploads are the MD5 hash
+        part_count = int(indexed_object.etag.split('-', 1)[1]) if '-' in indexed_object.etag else None
+
+        if part_count not in local_etags:
+            local_etags[part_count] = self.calculate_etag(path, part_count, self.transfer_config.multipart_chunksize)
+
+        return local_etags[part_count] == indexed_object.etag
+
+    def _lookup_content_hash(self, indexed_object, bucket):
+        # Listings lack the metadata, so it is only requested for objects of the same size, and at most once each
+        if indexed_object.content_hash is None:
+            metadata = self.client.head_object(Key=indexed_object.key, Bucket=bucket).get(self.METADATA_KEY, {})
+            # Marked as looked up by an empty hash where the object lacks one
+            indexed_object.content_hash = metadata.get(self.CONTENT_SHA256_METADATA_KEY, '')
+
+        return indexed_object.content_hash
+
+    def _index_upload_path(self, file_path, bucket):
+        # The whole upload path is listed at once, all further lookups within it are answered from memory
+        with self.object_index.lock:
+            if not self.object_index.is_indexed(bucket, file_path):
+                upload_path = file_path.rsplit('/', 1)[0]
+                self.object_index.index(bucket, upload_path, self.list_objects(upload_path, bucket))
+
+    def _record_transfer(self, details, progress):
+        # Parts that were already uploaded by an interrupted run are not sent again, hence not counted either
+        sent_bytes = progress.transferred_bytes - progress.skipped_bytes
+
+        details['bytes'] = sent_bytes
+        details['throughput_megabytes_per_second'] = progress.throughput()
+
+        self.metrics.count(Metrics.UPLOADED_BYTES, sent_bytes)
+        self.metrics.count(Metrics.UPLOADED_FILES)
 
-        return self.client.upload_file(
-            str(path),
-            str(bucket),
-            file_upload_path,
-            ExtraArgs=extra_args,
+    def _count_retries(self, parsed=None, **kwargs):
+        self.count_retries(self.metrics, parsed)
+
+    @classmethod
+    def count_retries(cls, metrics, parsed=None, **kwargs):
+        retry_attempts = (parsed or {}).get(cls.RESPONSE_METADATA_KEY, {}).get(cls.RETRY_ATTEMPTS_KEY)
+
+        if retry_attempts:
+            metrics.count(Metrics.RETRIES, retry_attempts)
+
+    def _add_content_md5_metadata(self, extra_args, content_md5):
+        return self._add_metadata(extra_args, self.CONTENT_MD5_METADATA_KEY, content_md5)
+
+    def _add_metadata(self, extra_args, key, value):
+        metadata = {**extra_args.get(self.METADATA_KEY, {}), key: value}
+        return {**extra_args, self.METADATA_KEY: metadata}
+
+    def _should_upload_resumably(self, path):
+        return (
+            self.resumable and
+            self.checkpoint_directory is not None and
+            path.stat().st_size >= self.transfer_config.multipart_threshold
         )
 
-    def _file_already_exists(self, file_path, bucket):
+    def _file_unchanged(self, file_path, bucket, content_md5, extra_args):
         try:
-            self.client.head_object(Key=file_path, Bucket=bucket)
-            return True
-        except ClientError:
+            remote_file = self.client.head_object(Key=file_path, Bucket=bucket)
+        except ClientError as exception:
+            # Anything but a missing file, e.g. missing permissions or throttling, must not be mistaken for one
+            if self.extract_status_code(exception) == self.NOT_FOUND_STATUS_CODE:
+                return False
+            raise
+
+        # The ETag only equals the MD5 hash for single part uploads, hence the hash is stored as metadata as well
+        remote_md5s = {
+            remote_file.get(self.ETAG_KEY, '').strip('"'),
+            remote_file.get(self.METADATA_KEY, {}).get(self.CONTENT_MD5_METADATA_KEY),
+        }
+        if content_md5 not in remote_md5s:
             return False
 
+        return all(
+            remote_file.get(key) == extra_args.get(key)
+            for key in self.COMPARED_EXTRA_ARGS_KEYS
+        )
+
     def _init_client(self, region_name, endpoint_url, access_key, secret_key):
         return self.session.client(
             service_name=self.S3_KEY,
@@ -61,6 +462,73 @@ class Uploader:
             aws_secret_access_key=secret_key,
         )
 
+    @classmethod
+    def init_shared_client(cls, region_name, endpoint_url, access_key, secret, max_pool_connections, metrics):
+        from botocore.config import Config
+
+        # Clients are thread-safe, so uploaders running concurrently can reuse the connections of a single pool,
+        # which has to be large enough for all of their transfers at once
+        client = cls.init_session().client(
+            service_name=cls.S3_KEY,
+            region_name=region_name,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret,
+            config=Config(max_pool_connections=max_pool_connections),
+        )
+        client.meta.events.register(cls.AFTER_CALL_EVENT, functools.partial(cls.count_retries, metrics))
+
+        return client
+
+    @staticmethod
+    def extract_status_code(exception):
+        return exception.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+
     @staticmethod
     def init_session():
         return boto3.session.Session()
+
+    @classmethod
+    def calculate_content_md5(cls, path):
+        with open(str(path), 'rb') as file:
+            return cls.calculate_fileobj_md5(file)
+
+    @classmethod
+    def calculate_fileobj_md5(cls, fileobj):
+        content_hash = hashlib.md5()
+
+        fileobj.seek(0)
+        for chunk in iter(lambda: fileobj.read(cls.HASH_CHUNK_SIZE), b''):
+            content_hash.update(chunk)
+        fileobj.seek(0)
+
+        return content_hash.hexdigest()
+
+    @classmethod
+    def calculate_etag(cls, path, part_count, part_size):
+        if part_count is None:
+            return cls.calculate_content_md5(path)
+
+        if max(1, -(-path.stat().st_size // part_size)) != part_count:
+            # Uploaded with a different part size, hence the ETag cannot be reproduced
+            return None
+
+        part_hashes = hashlib.md5()
+
+        with open(str(path), 'rb') as file:
+            for part in iter(lambda: file.read(part_size), b''):
+                part_hashes.update(hashlib.md5(part).digest())
+
+        return f'{part_hashes.hexdigest()}-{part_count}'
+
+    @staticmethod
+    def init_transfer_config(multipart_threshold, multipart_chunk_size, max_concurrency, max_bandwidth):
+        settings = {
+            'multipart_threshold': multipart_threshold,
+            'multipart_chunksize': multipart_chunk_size,
+            'max_concurrency': max_concurrency,
+        }
+        transfer_config = TransferConfig(**{key: value for key, value in settings.items() if value is not None})
+        # Not a constructor argument of older boto3 versions, but honored by the underlying transfer manager
+        transfer_config.max_bandwidth = max_bandwidth
+        return transfer_config
@@ -0,0 +1,129 @@
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pytest
+
+REPOSITORY_DIRECTORY = Path(__file__).resolve().parent.parent
+
+# The modules of pycaster import each other by their bare names, the S3 stand-in is shared with the benchmarks
+sys.path.insert(0, str(REPOSITORY_DIRECTORY / 'pycaster'))
+sys.path.insert(0, str(REPOSITORY_DIRECTORY / 'benchmarks'))
+
+from catalog import SyntheticCatalog  # noqa: E402
+from database import Episode  # noqa: E402
+from manifest import ManifestEntry  # noqa: E402
+from s3_stand_in import S3StandIn  # noqa: E402
+
+
+class Show:
+    """
+    A show whose bucket is held by the S3 stand-in, with its configuration, database and caches in a directory
+    of its own.
+    """
+    BUCKET = 'show'
+    EPISODE_PATH = 'podcast/episodes'
+    FEED_PATH = 'podcast'
+    DATABASE_PATH = 'podcast/pycaster'
+    LOGO_PATH = 'podcast/logo'
+    LOGO = b'\xff\xd8\xff\xe0' + bytes(1024)
+    EPISODE_SIZE = 64 * 1024
+    FIRST_PUBLISHED = datetime(2020, 1, 6, 6, 0, tzinfo=timezone.utc)
+
+    def __init__(self, stand_in, directory):
+        self.stand_in = stand_in
+        self.directory = directory
+
+        self.stand_in.create_bucket(self.BUCKET)
+        self.stand_in.put_object(self.BUCKET, self.LOGO_PATH, self.LOGO, 'image/jpeg')
+
+    def build_pycaster(self, metrics=None, **hosting):
+        # Imported here, so that the tests of modules without heavy dependencies run without them being installed
+        from pycaster import Pycaster
+
+        config_path = self.directory / 'config.json'
+        self.write_config(config_path, **hosting)
+
+        return Pycaster(
+            republish=True,
+            config_location=str(config_path),
+            database_file=str(self.directory / 'pycaster.db'),
+            cache_directory=str(self.directory / '.pycaster-cache'),
+            metrics=metrics,
+        )
+
+    def write_config(self, config_path, **hosting):
+        config_path.write_text(json.dumps({
+            'hosting': {
+                'accessKey': 'test',
+                'secret': 'test',
+                'bucketName': self.BUCKET,
+                'endpointUrl': self.stand_in.endpoint_url,
+                'regionName': 'us-east-1',
+                'databasePath': self.DATABASE_PATH,
+                'episodePath': self.EPISODE_PATH,
+                'feedPath': self.FEED_PATH,
+                **hosting,
+            },
+            'podcast': {
+                'author': 'Test',
+                'category': 'Technology',
+                'description': 'A podcast to test pycaster with',
+                'email': 'test@example.com',
+                'explicit': 'no',
+                'language': 'en',
+                'logoUri': f'{self.stand_in.endpoint_url}/{self.BUCKET}/{self.LOGO_PATH}',
+                'name': 'Test',
+                'subtitle': 'Testing',
+                'website': 'https://example.com',
+            },
+        }))
+
+    def build_episode(self, number):
+        # Weekly episodes, in the order of their numbers
+        return Episode(
+            title=f'Episode {number}',
+            description=f'<p>Episode {number}</p>',
+            duration=60,
+            file_uri=f'{self.stand_in.endpoint_url}/{self.BUCKET}/{self.EPISODE_PATH}/episode-{number}.mp3',
+            file_type='audio/mpeg',
+            file_size=1000,
+            is_explicit=False,
+            published=self.FIRST_PUBLISHED + timedelta(days=7 * number),
+        )
+
+    def build_entry(self, title):
+        file_location = self.directory / f'{title.lower().replace(" ", "-")}.mp3'
+        SyntheticCatalog.write_mp3(file_location, self.EPISODE_SIZE)
+
+        return ManifestEntry(
+            title=title,
+            description=f'<p>{title}</p>',
+            duration=None,
+            file_location=str(file_location),
+            file_uri=f'{self.stand_in.endpoint_url}/{self.BUCKET}/{self.EPISODE_PATH}/{file_location.name}',
+            is_explicit='no',
+        )
+
+    def read_feed_titles(self, file_name='feed.xml'):
+        feed = self.stand_in.buckets[self.BUCKET][f'{self.FEED_PATH}/{file_name}'].data
+        return [item.findtext('title') for item in ElementTree.fromstring(feed).iter('item')]
+
+    def has_feed_file(self, file_name):
+        return f'{self.FEED_PATH}/{file_name}' in self.stand_in.buckets[self.BUCKET]
+
+
+@pytest.fixture
+def stand_in():
+    stand_in = S3StandIn().start()
+
+    yield stand_in
+
+    stand_in.stop()
+
+
+@pytest.fixture
+def show(stand_in, tmp_path):
+    return Show(stand_in, tmp_path)
@@ -0,0 +1,84 @@
+import gzip
+import re
+import sqlite3
+
+import pytest
+
+from backup import DatabaseBackup
+
+GENERATION_PATTERN = re.compile(r'pycaster-\d{8}T\d{12}Z-[0-9a-f]{16}\.db\.gz')
+
+
+@pytest.fixture
+def pycaster(show):
+    return show.build_pycaster()
+
+
+def build_backup(show, pycaster, retention=DatabaseBackup.DEFAULT_RETENTION):
+    return DatabaseBackup(pycaster.db, pycaster.uploader, show.BUCKET, show.DATABASE_PATH, retention)
+
+
+def list_generations(show):
+    return sorted(
+        key.rsplit('/', 1)[-1] for key in show.stand_in.buckets[show.BUCKET]
+        if key.startswith(f'{show.DATABASE_PATH}/{DatabaseBackup.BACKUP_FILE_PREFIX}')
+    )
+
+
+def read_backup(show, file_name, tmp_path):
+    database_path = tmp_path / 'restored.db'
+    backup_file = show.stand_in.buckets[show.BUCKET][f'{show.DATABASE_PATH}/{file_name}']
+    database_path.write_bytes(gzip.decompress(backup_file.data))
+
+    restored_db = sqlite3.connect(str(database_path))
+    try:
+        return [title for title, in restored_db.execute('SELECT title FROM episodes ORDER BY published')]
+    finally:
+        restored_db.close()
+
+
+def test_generations_are_named_by_time_and_content(show, pycaster):
+    backup = build_backup(show, pycaster)
+
+    assert backup.upload(backup.prepare())
+
+    generation, = list_generations(show)
+    assert GENERATION_PATTERN.fullmatch(generation)
+
+
+def test_unchanged_snapshots_are_not_uploaded(show, pycaster):
+    backup = build_backup(show, pycaster)
+    pycaster.db.insert_new_episodes([show.build_episode(1)])
+    backup.upload(backup.prepare())
+
+    assert not backup.upload(backup.prepare())
+    assert len(list_generations(show)) == 1
+
+
+def test_only_the_newest_generations_are_retained(show, pycaster, tmp_path):
+    backup = build_backup(show, pycaster, retention=2)
+
+    for number in range(1, 4):
+        pycaster.db.insert_new_episodes([show.build_episode(number)])
+        backup.upload(backup.prepare())
+
+    generations = list_generations(show)
+
+    assert len(generations) == 2
+    assert read_backup(show, generations[0], tmp_path) == ['Episode 1', 'Episode 2']
+    assert read_backup(show, generations[1], tmp_path) == ['Episode 1', 'Episode 2', 'Episode 3']
+
+
+def test_latest_copy_holds_the_newest_generation(show, pycaster, tmp_path):
+    backup = build_backup(show, pycaster)
+
+    for number in range(1, 3):
+        pycaster.db.insert_new_episodes([show.build_episode(number)])
+        backup.upload(backup.prepare())
+
+    latest_copy = show.stand_in.buckets[show.BUCKET][DatabaseBackup.build_latest_file_path(show.DATABASE_PATH)]
+    newest_generation = show.stand_in.buckets[show.BUCKET][f'{show.DATABASE_PATH}/{list_generations(show)[-1]}']
+
+    assert latest_copy.data == newest_generation.data
+    assert backup.latest_etag == latest_copy.etag
+    assert read_backup(show, DatabaseBackup.LATEST_BACKUP_FILE_NAME, tmp_path) == ['Episode 1', 'Episode 2']
@@ -0,0 +1,83 @@
+import pytest
+
+from bucket_reconciliation import BucketReconciliation, EpisodeDrift
+from uploader import Uploader
+
+FILE_SIZE = 1000
+
+
+@pytest.fixture
+def pycaster(show, monkeypatch):
+    # The S3 stand-in keeps no ACLs, every file counts as public
+    monkeypatch.setattr(Uploader, 'is_publicly_readable', lambda self, file_path, bucket: True)
+
+    return show.build_pycaster()
+
+
+def host_file(show, key, size=FILE_SIZE, content_type='audio/mpeg'):
+    show.stand_in.put_object(show.BUCKET, f'{show.EPISODE_PATH}/{key}', bytes(size), content_type)
+
+
+def insert_episode(show, pycaster, number):
+    episode = show.build_episode(number)
+    episode.file_uri = pycaster._build_hosted_file_uri(show.EPISODE_PATH, f'episode-{number}.mp3')
+    episode.file_size = FILE_SIZE
+    pycaster.db.insert_new_episodes([episode])
+
+    return episode
+
+
+def find_drift(show, pycaster):
+    reconciliation = BucketReconciliation(
+        uploader=pycaster.uploader,
+        bucket=show.BUCKET,
+        upload_path=show.EPISODE_PATH,
+        build_object_uri=pycaster._build_hosted_object_uri,
+        workers=2,
+    )
+
+    return reconciliation, reconciliation.find_drift(pycaster.db.iterate_episodes())
+
+
+def test_files_that_share_their_name_are_told_apart(show, pycaster):
+    insert_episode(show, pycaster, 1)
+    host_file(show, 'episode-1.mp3')
+    # Listed after the hosted file, which it would have replaced if they were matched by their names
+    host_file(show, 'originals/episode-1.mp3', size=4 * FILE_SIZE)
+
+    reconciliation, drifts = find_drift(show, pycaster)
+
+    assert drifts == []
+    assert reconciliation.orphaned_keys == [f'{show.EPISODE_PATH}/originals/episode-1.mp3']
+
+
+def test_drift_is_found(show, pycaster):
+    for number in range(1, 4):
+        insert_episode(show, pycaster, number)
+    host_file(show, 'episode-1.mp3', content_type='binary/octet-stream')
+    host_file(show, 'episode-2.mp3', size=2 * FILE_SIZE)
+
+    reconciliation, drifts = find_drift(show, pycaster)
+
+    assert {drift.episode.title: drift.problems for drift in drifts} == {
+        'Episode 1': {EpisodeDrift.CONTENT_TYPE: ('audio/mpeg', 'binary/octet-stream')},
+        'Episode 2': {EpisodeDrift.FILE_SIZE: (2 * FILE_SIZE, FILE_SIZE)},
+        'Episode 3': {EpisodeDrift.MISSING_FILE: (drifts[2].episode.file_uri, None)},
+    }
+    assert reconciliation.orphaned_keys == []
+
+
+def test_drift_is_repaired(show, pycaster):
+    for number in range(1, 3):
+        insert_episode(show, pycaster, number)
+    host_file(show, 'episode-1.mp3', content_type='binary/octet-stream')
+    host_file(show, 'episode-2.mp3', size=2 * FILE_SIZE)
+
+    pycaster.reconcile_bucket(workers=2)
+
+    objects = show.stand_in.buckets[show.BUCKET]
+    assert objects[f'{show.EPISODE_PATH}/episode-1.mp3'].headers['content-type'] == 'audio/mpeg'
+    assert [int(episode.file_size) for episode in pycaster.db.iterate_episodes()] == [FILE_SIZE, 2 * FILE_SIZE]
+    assert show.read_feed_titles() == ['Episode 2', 'Episode 1']
+    _, drifts = find_drift(show, pycaster)
+    assert drifts == []
@@ -0,0 +1,35 @@
+import json
+
+from conftest import REPOSITORY_DIRECTORY
+
+
+def test_template_holds_the_defaults_of_the_optional_keys(tmp_path):
+    from backup import DatabaseBackup
+    from feed_formats import RssFormat
+    from pycaster import Pycaster
+
+    config = json.loads((REPOSITORY_DIRECTORY / 'config.template.json').read_text())
+
+    # Only the keys without a default are left empty in the template
+    for section in config.values():
+        for key, value in section.items():
+            if value == '':
+                section[key] = 'https://example.com' if key == 'endpointUrl' else key
+
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps(config))
+
+    pycaster = Pycaster(republish=True, config_location=str(config_path))
+
+    assert pycaster.hosting_multipart_threshold == 8 * Pycaster.BYTES_PER_MEGABYTE
+    assert pycaster.hosting_multipart_chunk_size == 8 * Pycaster.BYTES_PER_MEGABYTE
+    assert pycaster.hosting_max_concurrency == Pycaster.DEFAULT_TRANSFER_CONCURRENCY
+    assert pycaster.hosting_max_bandwidth is None
+    assert pycaster.hosting_resumable_uploads is False
+    assert pycaster.hosting_feed_page_size is None
+    assert pycaster.hosting_compress_feed is False
+    assert pycaster.hosting_feed_cache_control is None
+    assert pycaster.hosting_feed_formats == [RssFormat]
+    assert pycaster.hosting_database_backup_retention == DatabaseBackup.DEFAULT_RETENTION
+    assert pycaster.hosting_sync_database is True
+    assert pycaster.guid is None
@@ -0,0 +1,109 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from database import Database, Episode
+
+FIRST_PUBLISHED = datetime(2020, 1, 6, 6, 0, tzinfo=timezone.utc)
+
+
+def build_episode(number, published=None):
+    return Episode(
+        title=f'Episode {number}',
+        description=f'<p>Episode</p><p>number {number}</p>',
+        duration=60 * number,
+        file_uri=f'https://bucket.example.com/podcast/episodes/episode-{number}.mp3',
+        file_type='audio/mpeg',
+        file_size=1000 * number,
+        is_explicit=False,
+        published=published or FIRST_PUBLISHED + timedelta(days=7 * number),
+    )
+
+
+def test_text_schema_is_migrated_to_the_latest_one(tmp_path):
+    database_file = str(tmp_path / 'pycaster.db')
+
+    # The schema of the very first releases, with every column stored as text and no schema version
+    legacy_db = sqlite3.connect(database_file)
+    legacy_db.execute(
+        '''
+        CREATE TABLE episodes(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT unique,
+            description TEXT,
+            file_uri TEXT unique,
+            file_type TEXT,
+            file_size TEXT,
+            duration TEXT,
+            is_explicit TEXT,
+            published TEXT
+        )
+        '''
+    )
+    legacy_db.execute(
+        'INSERT INTO episodes(title, description, file_uri, file_type, file_size, duration, is_explicit, published) '
+        'VALUES(?, ?, ?, ?, ?, ?, ?, ?)',
+        ('Pilot', '<p>First</p>', 'https://example.com/pilot.mp3', 'audio/mpeg', '1234', '1:02:03', 'yes',
+         '2019-05-01T06:00:00+02:00'),
+    )
+    legacy_db.commit()
+    legacy_db.close()
+
+    db = Database(database_file)
+    db.create_episode_database()
+
+    episode, = db.iterate_episodes()
+
+    assert db.db.execute('PRAGMA user_version').fetchone()[0] == 6
+    assert db.db.execute("SELECT name FROM sqlite_master WHERE name = 'episodes_content_hash'").fetchone() is None
+    assert episode.file_size == 1234
+    assert episode.duration == 3723
+    assert episode.is_explicit is True
+    assert episode.published == datetime(2019, 5, 1, 4, 0, tzinfo=timezone.utc)
+    assert episode.itunes_summary == 'First  \r\n'
+    assert episode.chapters_uri is None
+
+
+def test_migrations_are_only_applied_once(tmp_path):
+    database_file = str(tmp_path / 'pycaster.db')
+
+    db = Database(database_file)
+    db.create_episode_database()
+    db.insert_new_episodes([build_episode(1)])
+
+    db = Database(database_file)
+    db.create_episode_database()
+
+    assert [episode.title for episode in db.iterate_episodes()] == ['Episode 1']
+
+
+def test_index_of_the_content_hash_is_dropped(tmp_path):
+    database_file = str(tmp_path / 'pycaster.db')
+
+    # Created by the content hash migration of earlier releases
+    db = Database(database_file)
+    db.create_episode_database()
+    with db.db:
+        db.db.execute('CREATE INDEX episodes_content_hash ON episodes(content_hash)')
+        db.db.execute('PRAGMA user_version = 5')
+
+    db = Database(database_file)
+    db.create_episode_database()
+
+    assert db.db.execute("SELECT name FROM sqlite_master WHERE name = 'episodes_content_hash'").fetchone() is None
+
+
+def test_ranges_are_counted_from_the_oldest_released_episode(tmp_path):
+    db = Database(str(tmp_path / 'pycaster.db'))
+    db.create_episode_database()
+    db.insert_new_episodes([build_episode(number) for number in range(1, 6)])
+
+    released_before = FIRST_PUBLISHED + timedelta(days=7 * 4)
+
+    assert db.count_episodes() == 5
+    assert db.count_episodes(released_before) == 4
+    assert [episode.title for episode in db.iterate_episodes(limit=2, offset=1, newest_first=True)] == [
+        'Episode 3', 'Episode 2',
+    ]
+    assert [
+        episode.title for episode in db.iterate_episodes(limit=2, offset=2, released_before=released_before)
+    ] == ['Episode 3', 'Episode 4']
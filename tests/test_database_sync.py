@@ -0,0 +1,108 @@
+import gzip
+import json
+
+import pytest
+
+from backup import DatabaseBackup
+from database import Database
+from database_sync import DatabaseSync
+
+
+@pytest.fixture
+def database_sync(show, tmp_path):
+    (tmp_path / 'runner').mkdir()
+
+    return DatabaseSync(
+        uploader=show.build_pycaster().uploader,
+        bucket=show.BUCKET,
+        upload_path=show.DATABASE_PATH,
+        database_file=str(tmp_path / 'runner' / 'pycaster.db'),
+    )
+
+
+def back_up(show, tmp_path, numbers):
+    # Backed up by another runner, just like `DatabaseBackup` would
+    db = Database(str(tmp_path / f'backed-up-{len(numbers)}.db'))
+    db.create_episode_database()
+    db.insert_new_episodes([show.build_episode(number) for number in numbers])
+
+    snapshot_path = tmp_path / 'snapshot.db'
+    db.create_snapshot(str(snapshot_path))
+    show.stand_in.put_object(
+        show.BUCKET,
+        DatabaseBackup.build_latest_file_path(show.DATABASE_PATH),
+        gzip.compress(snapshot_path.read_bytes()),
+        'application/gzip',
+    )
+
+
+def read_titles(database_sync):
+    db = Database(str(database_sync.database_path))
+    return [episode.title for episode in db.iterate_episodes()]
+
+
+def test_database_is_downloaded_onto_a_fresh_runner(show, database_sync, tmp_path):
+    back_up(show, tmp_path, range(1, 3))
+
+    assert database_sync.pull()
+    assert read_titles(database_sync) == ['Episode 1', 'Episode 2']
+
+    latest_backup = show.stand_in.buckets[show.BUCKET][DatabaseBackup.build_latest_file_path(show.DATABASE_PATH)]
+    assert json.loads(database_sync.sync_state_path.read_text()) == {DatabaseSync.ETAG_KEY: latest_backup.etag}
+
+
+def test_unchanged_database_is_not_downloaded_again(show, database_sync, tmp_path):
+    back_up(show, tmp_path, range(1, 3))
+    database_sync.pull()
+    synced_database = database_sync.database_path.read_bytes()
+    show.stand_in.take_counters()
+
+    assert not database_sync.pull()
+
+    counters = show.stand_in.take_counters()
+    assert counters['requests'] == {'get_object': 1}
+    assert counters['sent_bytes'] == 0
+    assert database_sync.database_path.read_bytes() == synced_database
+
+
+def test_changed_database_replaces_the_synced_one(show, database_sync, tmp_path):
+    back_up(show, tmp_path, range(1, 3))
+    database_sync.pull()
+    back_up(show, tmp_path, range(1, 4))
+
+    assert database_sync.pull()
+    assert read_titles(database_sync) == ['Episode 1', 'Episode 2', 'Episode 3']
+
+
+def test_journal_files_of_the_replaced_database_are_removed(show, database_sync, tmp_path):
+    back_up(show, tmp_path, range(1, 3))
+    database_sync.pull()
+    back_up(show, tmp_path, range(1, 4))
+
+    journal_paths = [
+        database_sync.database_path.with_name(f'{database_sync.database_path.name}{suffix}')
+        for suffix in DatabaseSync.JOURNAL_FILE_SUFFIXES
+    ]
+    for journal_path in journal_paths:
+        journal_path.write_bytes(b'left behind by the replaced database')
+
+    database_sync.pull()
+
+    assert not any(journal_path.exists() for journal_path in journal_paths)
+    assert read_titles(database_sync) == ['Episode 1', 'Episode 2', 'Episode 3']
+
+
+def test_missing_backup_leaves_the_runner_without_a_database(database_sync):
+    assert not database_sync.pull()
+    assert not database_sync.database_path.exists()
+    assert list(database_sync.database_path.parent.iterdir()) == []
+
+
+def test_database_that_was_never_synced_is_kept(show, database_sync, tmp_path):
+    back_up(show, tmp_path, range(1, 3))
+    db = Database(str(database_sync.database_path))
+    db.create_episode_database()
+    db.insert_new_episodes([show.build_episode(5)])
+
+    assert not database_sync.pull()
+    assert read_titles(database_sync) == ['Episode 5']
@@ -0,0 +1,14 @@
+from feed_cache import FeedFragmentCache
+
+
+def test_fragments_unused_since_the_reset_are_pruned(tmp_path):
+    cache = FeedFragmentCache(tmp_path)
+    cache.put('outdated', b'<item/>\n')
+    cache.put('current', b'<item/>\n')
+
+    cache.reset()
+    cache.get('current')
+    cache.prune()
+
+    assert cache.get('outdated') is None
+    assert cache.get('current') == b'<item/>\n'
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from email.utils import format_datetime
+
+from conftest import Show
+
+
+def write_feed(path, numbers):
+    items = ''.join(
+        f'''
+        <item>
+            <title>Episode {number}</title>
+            <description>Imported episode {number}</description>
+            <enclosure url="https://old.example.com/episode-{number}.mp3" length="1000" type="audio/mpeg"/>
+            <pubDate>{format_datetime(Show.FIRST_PUBLISHED + timedelta(days=7 * number))}</pubDate>
+        </item>
+        '''
+        for number in numbers
+    )
+    path.write_text(f'<?xml version="1.0"?><rss version="2.0"><channel><title>Old</title>{items}</channel></rss>')
+
+    return str(path)
+
+
+def test_importing_older_episodes_rewrites_the_archive_pages(show, tmp_path):
+    pycaster = show.build_pycaster(feedPageSize=3)
+    pycaster.db.insert_new_episodes([show.build_episode(number) for number in range(4, 11)])
+    pycaster.republish_episodes()
+
+    assert show.read_feed_titles('feed-archive-2.xml') == ['Episode 9', 'Episode 8', 'Episode 7']
+
+    pycaster.import_feed(write_feed(tmp_path / 'old-feed.xml', range(1, 4)))
+
+    assert show.read_feed_titles() == ['Episode 10', 'Episode 9', 'Episode 8']
+    assert show.read_feed_titles('feed-archive-3.xml') == ['Episode 9', 'Episode 8', 'Episode 7']
+    assert show.read_feed_titles('feed-archive-2.xml') == ['Episode 6', 'Episode 5', 'Episode 4']
+    assert show.read_feed_titles('feed-archive-1.xml') == ['Episode 3', 'Episode 2', 'Episode 1']
+
+
+def test_importing_newer_episodes_keeps_the_older_archive_pages(show, tmp_path):
+    pycaster = show.build_pycaster(feedPageSize=3)
+    pycaster.db.insert_new_episodes([show.build_episode(number) for number in range(1, 8)])
+    pycaster.republish_episodes()
+
+    archived_page = show.stand_in.buckets[show.BUCKET][f'{show.FEED_PATH}/feed-archive-1.xml']
+
+    pycaster.import_feed(write_feed(tmp_path / 'old-feed.xml', range(8, 10)))
+
+    assert show.stand_in.buckets[show.BUCKET][f'{show.FEED_PATH}/feed-archive-1.xml'] is archived_page
+    assert show.read_feed_titles('feed-archive-3.xml') == ['Episode 9', 'Episode 8', 'Episode 7']
+    assert show.read_feed_titles('feed-archive-2.xml') == ['Episode 6', 'Episode 5', 'Episode 4']
+
+
+def test_replacing_episodes_rewrites_every_archive_page(show, tmp_path):
+    pycaster = show.build_pycaster(feedPageSize=3)
+    pycaster.db.insert_new_episodes([show.build_episode(number) for number in range(1, 8)])
+    pycaster.republish_episodes()
+
+    # Moves the oldest episode to the newest position, which shifts every other episode by one
+    feed_path = tmp_path / 'old-feed.xml'
+    write_feed(feed_path, [8])
+    feed_path.write_text(feed_path.read_text().replace('Episode 8', 'Episode 1'))
+
+    pycaster.import_feed(str(feed_path), conflict_resolution='replace')
+
+    assert show.read_feed_titles() == ['Episode 1', 'Episode 7', 'Episode 6']
+    assert show.read_feed_titles('feed-archive-2.xml') == ['Episode 7', 'Episode 6', 'Episode 5']
+    assert show.read_feed_titles('feed-archive-1.xml') == ['Episode 4', 'Episode 3', 'Episode 2']
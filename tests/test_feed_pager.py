@@ -0,0 +1,54 @@
+from feed_pager import FeedPager
+
+
+def build_feed_uri(file_name):
+    return f'https://bucket.example.com/podcast/{file_name}'
+
+
+def test_only_complete_pages_are_archived():
+    assert FeedPager(page_size=3, episode_count=2).count_archive_pages() == 0
+    assert FeedPager(page_size=3, episode_count=3).count_archive_pages() == 1
+    assert FeedPager(page_size=3, episode_count=7).count_archive_pages() == 2
+
+
+def test_archive_ranges_are_counted_from_the_oldest_episode():
+    pager = FeedPager(page_size=3, episode_count=7)
+
+    assert pager.archive_range(1) == (0, 3)
+    assert pager.archive_range(2) == (3, 6)
+
+
+def test_latest_range_overlaps_the_newest_archive_page():
+    assert FeedPager(page_size=3, episode_count=7).latest_range() == (4, 7)
+    assert FeedPager(page_size=3, episode_count=2).latest_range() == (0, 2)
+    assert FeedPager(page_size=3, episode_count=0).latest_range() == (0, 0)
+
+
+def test_subscription_feed_links_to_the_newest_archive_page():
+    assert FeedPager(page_size=3, episode_count=2).build_subscription_links(build_feed_uri) == []
+    assert FeedPager(page_size=3, episode_count=7).build_subscription_links(build_feed_uri, '.atom') == [
+        ('prev-archive', build_feed_uri('feed-archive-2.atom')),
+        ('next', build_feed_uri('feed-archive-2.atom')),
+    ]
+
+
+def test_archive_pages_only_link_to_older_pages():
+    pager = FeedPager(page_size=3, episode_count=7)
+
+    assert pager.build_archive_links(1, build_feed_uri, 'feed.xml') == [
+        ('current', build_feed_uri('feed.xml')),
+    ]
+    assert pager.build_archive_links(2, build_feed_uri, 'feed.xml') == [
+        ('current', build_feed_uri('feed.xml')),
+        ('prev-archive', build_feed_uri('feed-archive-1.xml')),
+        ('next', build_feed_uri('feed-archive-1.xml')),
+    ]
+
+
+def test_archive_pages_change_from_the_one_of_the_oldest_changed_episode_onward():
+    pager = FeedPager(page_size=3, episode_count=10, first_changed_index=4)
+
+    assert [pager.is_archive_page_changed(page) for page in range(1, 4)] == [False, True, True]
+    assert not FeedPager(page_size=3, episode_count=10).is_archive_page_changed(3)
+    assert not FeedPager(page_size=3, episode_count=10, first_changed_index=9).is_archive_page_changed(3)
+    assert FeedPager(page_size=3, episode_count=10, first_changed_index=0).is_archive_page_changed(1)
@@ -0,0 +1,45 @@
+from logo_cache import LogoCache
+
+
+def build_logo_uri(show):
+    return f'{show.stand_in.endpoint_url}/{show.BUCKET}/{show.LOGO_PATH}'
+
+
+def test_logo_is_downloaded_into_an_empty_cache(show, tmp_path):
+    show.stand_in.take_counters()
+
+    assert LogoCache(tmp_path / 'logos').retrieve(build_logo_uri(show)) == (show.LOGO, 'image/jpeg')
+    assert show.stand_in.take_counters()['sent_bytes'] == len(show.LOGO)
+
+
+def test_logo_is_retrieved_once_per_process(show, tmp_path):
+    logo_cache = LogoCache(tmp_path / 'logos')
+    logo_cache.retrieve(build_logo_uri(show))
+    show.stand_in.take_counters()
+
+    assert logo_cache.retrieve(build_logo_uri(show)) == (show.LOGO, 'image/jpeg')
+    assert show.stand_in.take_counters()['requests'] == {}
+
+
+def test_unchanged_logo_is_revalidated_without_downloading_it(show, tmp_path):
+    LogoCache(tmp_path / 'logos').retrieve(build_logo_uri(show))
+    show.stand_in.take_counters()
+
+    # A later run, which only has the copy on disk
+    assert LogoCache(tmp_path / 'logos').retrieve(build_logo_uri(show)) == (show.LOGO, 'image/jpeg')
+
+    counters = show.stand_in.take_counters()
+    assert counters['requests'] == {'get_object': 1}
+    assert counters['sent_bytes'] == 0
+
+
+def test_changed_logo_replaces_the_cached_one(show, tmp_path):
+    LogoCache(tmp_path / 'logos').retrieve(build_logo_uri(show))
+    changed_logo = b'\x89PNG\r\n\x1a\n' + bytes(512)
+    show.stand_in.put_object(show.BUCKET, show.LOGO_PATH, changed_logo, 'image/png')
+
+    assert LogoCache(tmp_path / 'logos').retrieve(build_logo_uri(show)) == (changed_logo, 'image/png')
+
+    show.stand_in.take_counters()
+    assert LogoCache(tmp_path / 'logos').retrieve(build_logo_uri(show)) == (changed_logo, 'image/png')
+    assert show.stand_in.take_counters()['sent_bytes'] == 0
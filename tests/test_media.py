@@ -0,0 +1,71 @@
+import hashlib
+
+import eyed3
+import pytest
+
+from catalog import SyntheticCatalog
+from media import MediaFile, PaddedTag
+
+FRAME_COUNT = 2000
+# Every frame of the synthetic files holds 1152 samples at 44.1 kHz
+DURATION = round(FRAME_COUNT * 1152 / 44100)
+
+
+def write_episode(tmp_path):
+    file_path = tmp_path / 'episode.mp3'
+    SyntheticCatalog.write_mp3(file_path, FRAME_COUNT * SyntheticCatalog.MP3_FRAME_SIZE)
+
+    return file_path
+
+
+def set_title(file_path, title):
+    tag = PaddedTag()
+    tag.parse(str(file_path))
+    tag.title = title
+    tag.save()
+
+
+def test_ingest_hashes_measures_and_times_the_file(tmp_path):
+    file_path = write_episode(tmp_path)
+
+    media_file = MediaFile.ingest(file_path)
+
+    assert media_file.content_hash == hashlib.sha256(file_path.read_bytes()).hexdigest()
+    assert media_file.size == FRAME_COUNT * SyntheticCatalog.MP3_FRAME_SIZE
+    assert media_file.duration == DURATION
+
+
+def test_ingest_skips_the_tag(tmp_path):
+    file_path = write_episode(tmp_path)
+    set_title(file_path, 'Episode 1')
+
+    media_file = MediaFile.ingest(file_path)
+
+    assert media_file.size == file_path.stat().st_size
+    assert media_file.duration == DURATION
+
+
+def test_tags_reserve_padding_for_later_ones(tmp_path):
+    file_path = write_episode(tmp_path)
+    audio = file_path.read_bytes()
+
+    set_title(file_path, 'Episode 1')
+    tagged_size = file_path.stat().st_size
+
+    tag = eyed3.id3.Tag()
+    tag.parse(str(file_path))
+    assert tag.file_info.tag_size >= PaddedTag.RESERVED_PADDING_SIZE
+    assert file_path.read_bytes()[tag.file_info.tag_size:] == audio
+
+    # Longer than the padding eyed3 leaves on its own, but still written in place, so the audio does not move
+    set_title(file_path, 'Episode 1: ' + 'A much longer title. ' * 50)
+
+    assert file_path.stat().st_size == tagged_size
+    assert file_path.read_bytes()[tag.file_info.tag_size:] == audio
+
+
+def test_tags_are_only_padded_for_the_supported_eyed3_release(monkeypatch):
+    monkeypatch.setattr(eyed3, 'version', '0.10.0')
+
+    with pytest.raises(RuntimeError, match='0.10.0'):
+        PaddedTag()
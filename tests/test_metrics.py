@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from metrics import Metrics
+
+
+def read_events(log_path):
+    return [json.loads(line) for line in log_path.read_text().splitlines()]
+
+
+def read_samples(textfile_path):
+    # Maps every sample, along with its labels, to its value
+    return dict(line.rsplit(' ', 1) for line in textfile_path.read_text().splitlines() if not line.startswith('#'))
+
+
+def test_publish_is_logged_as_json_lines(show, tmp_path):
+    metrics = Metrics('publish', log_file=str(tmp_path / 'metrics.jsonl'))
+    pycaster = show.build_pycaster(metrics=metrics)
+
+    pycaster._publish_episodes([show.build_entry(f'Episode {number}') for number in range(1, 3)])
+    metrics.finish()
+
+    *stage_events, run_event = read_events(tmp_path / 'metrics.jsonl')
+    stages = {event['stage'] for event in stage_events}
+
+    assert {event['event'] for event in stage_events} == {'stage'}
+    assert {event['command'] for event in stage_events} == {'publish'}
+    assert {pycaster.CONFIG_LOAD_STAGE, pycaster.FEED_UPLOAD_STAGE, pycaster.DATABASE_BACKUP_STAGE} <= stages
+    assert run_event['event'] == 'run'
+    assert run_event['status'] == 'success'
+    assert set(run_event['stage_durations_seconds']) == stages
+    # The feed and the database backup are counted as well
+    assert run_event[Metrics.UPLOADED_FILES] >= 2
+    assert run_event[Metrics.UPLOADED_BYTES] >= 2 * show.EPISODE_SIZE
+
+
+def test_failed_run_names_the_innermost_stage(tmp_path):
+    metrics = Metrics('publish', log_file=str(tmp_path / 'metrics.jsonl'))
+
+    with pytest.raises(ConnectionError):
+        with metrics.stage('upload'):
+            with metrics.stage('upload_episodes', files=2):
+                raise ConnectionError('Lost the connection to the bucket')
+    metrics.finish(ConnectionError('Lost the connection to the bucket'))
+
+    inner_event, outer_event, run_event = read_events(tmp_path / 'metrics.jsonl')
+
+    assert (inner_event['stage'], inner_event['files'], inner_event['error_type']) == (
+        'upload_episodes', 2, 'ConnectionError',
+    )
+    assert outer_event['stage'] == 'upload'
+    assert run_event['status'] == 'error'
+    assert run_event['failed_stage'] == 'upload_episodes'
+    assert run_event['error'] == 'Lost the connection to the bucket'
+
+
+def test_run_is_written_to_the_prometheus_textfile(tmp_path):
+    metrics = Metrics('publish', prometheus_textfile=str(tmp_path / 'pycaster.prom'))
+
+    with metrics.stage('upload'):
+        metrics.count(Metrics.UPLOADED_FILES, 3)
+    metrics.finish()
+
+    samples = read_samples(tmp_path / 'pycaster.prom')
+
+    assert samples['pycaster_last_run_success{command="publish"}'] == '1'
+    assert samples['pycaster_last_run_uploaded_files{command="publish"}'] == '3'
+    assert float(samples['pycaster_last_run_stage_duration_seconds{command="publish",stage="upload"}']) >= 0
+    assert [path.name for path in tmp_path.iterdir()] == ['pycaster.prom']
+
+
+def test_shows_of_a_network_are_reported_on_their_own(tmp_path):
+    metrics = Metrics(
+        'network',
+        log_file=str(tmp_path / 'metrics.jsonl'),
+        prometheus_textfile=str(tmp_path / 'pycaster.prom'),
+    )
+
+    show_metrics = metrics.for_show('news')
+    show_metrics.finish(ValueError('The manifest is invalid'))
+
+    run_event, = read_events(tmp_path / 'metrics.jsonl')
+    samples = read_samples(tmp_path / 'pycaster-news.prom')
+
+    assert (run_event['show'], run_event['status']) == ('news', 'error')
+    assert samples['pycaster_last_run_success{command="network",show="news"}'] == '0'
+    assert not (tmp_path / 'pycaster.prom').exists()
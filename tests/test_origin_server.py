@@ -0,0 +1,203 @@
+import gzip
+import http.client
+import os
+import threading
+from datetime import timedelta
+from email.utils import format_datetime
+
+import pytest
+
+from origin_server import OriginServer
+
+FEED = b'<rss version="2.0"><channel><title>Test</title></channel></rss>\n'
+EPISODE = bytes(range(256)) * 4
+EPISODE_PATH = '/podcast/episodes/episode-1.mp3'
+FEED_PATH = '/podcast/feed.xml'
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / 'episode-1.mp3').write_bytes(EPISODE)
+    (tmp_path / 'episode-empty.mp3').write_bytes(b'')
+    (tmp_path.parent / 'secret.txt').write_bytes(b'secret')
+
+    server = OriginServer(
+        ('127.0.0.1', 0),
+        feed_path='podcast',
+        episode_path='podcast/episodes',
+        episode_directory=str(tmp_path),
+        render_documents=lambda: {'feed.xml': (FEED, 'text/xml')},
+        is_feed_stale=lambda: False,
+    )
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, method='GET', **headers):
+    connection = http.client.HTTPConnection(*server.server_address)
+
+    try:
+        connection.request(method, path, headers={name.replace('_', '-'): value for name, value in headers.items()})
+        response = connection.getresponse()
+        return response, response.read()
+    finally:
+        connection.close()
+
+
+def test_feed_is_served_along_with_its_validators(server):
+    response, body = request(server, FEED_PATH)
+
+    assert response.status == 200
+    assert body == FEED
+    assert response.getheader('ETag')
+    assert response.getheader('Last-Modified')
+    assert response.getheader('Vary') == 'Accept-Encoding'
+
+
+def test_feed_is_compressed_for_clients_that_accept_gzip(server):
+    plain_response, _ = request(server, FEED_PATH)
+    response, body = request(server, FEED_PATH, Accept_Encoding='br, gzip;q=0.5')
+
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert gzip.decompress(body) == FEED
+    assert response.getheader('ETag') != plain_response.getheader('ETag')
+
+
+def test_feed_is_not_compressed_for_clients_that_refuse_gzip(server):
+    response, body = request(server, FEED_PATH, Accept_Encoding='gzip;q=0, identity')
+
+    assert response.getheader('Content-Encoding') is None
+    assert body == FEED
+
+
+@pytest.mark.parametrize('if_none_match', ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_matching_entity_tags_are_not_modified(server, if_none_match):
+    etag = request(server, FEED_PATH)[0].getheader('ETag')
+    response, body = request(server, FEED_PATH, If_None_Match=if_none_match.format(etag=etag))
+
+    assert response.status == 304
+    assert body == b''
+    assert response.getheader('ETag') == etag
+
+
+def test_entity_tags_take_precedence_over_modification_dates(server):
+    last_modified = request(server, FEED_PATH)[0].getheader('Last-Modified')
+    response, _ = request(server, FEED_PATH, If_None_Match='"other"', If_Modified_Since=last_modified)
+
+    assert response.status == 200
+
+
+@pytest.mark.parametrize('offset, status', [
+    (timedelta(0), 304),
+    (timedelta(hours=1), 304),
+    (-timedelta(hours=1), 200),
+])
+def test_modification_dates_are_compared(server, offset, status):
+    last_modified = server.find_document('feed.xml').last_modified
+    response, _ = request(server, FEED_PATH, If_Modified_Since=format_datetime(last_modified + offset, usegmt=True))
+
+    assert response.status == status
+
+
+@pytest.mark.parametrize('if_modified_since', ['yesterday', '', 'Mon, 01 Jan 2000 00:00:00'])
+def test_malformed_modification_dates_are_ignored(server, if_modified_since):
+    response, body = request(server, FEED_PATH, If_Modified_Since=if_modified_since)
+
+    assert response.status == 200
+    assert body == FEED
+
+
+@pytest.mark.parametrize('byte_range, first_byte, last_byte', [
+    ('bytes=0-3', 0, 3),
+    ('bytes=10-', 10, len(EPISODE) - 1),
+    ('bytes=-4', len(EPISODE) - 4, len(EPISODE) - 1),
+    ('bytes=-5000', 0, len(EPISODE) - 1),
+    ('bytes=1000-5000', 1000, len(EPISODE) - 1),
+])
+def test_single_byte_ranges_are_served_partially(server, byte_range, first_byte, last_byte):
+    response, body = request(server, EPISODE_PATH, Range=byte_range)
+
+    assert response.status == 206
+    assert response.getheader('Content-Range') == f'bytes {first_byte}-{last_byte}/{len(EPISODE)}'
+    assert body == EPISODE[first_byte:last_byte + 1]
+
+
+@pytest.mark.parametrize('byte_range', ['bytes=5-2', 'bytes=-', 'bytes=0-1,4-5', 'lines=0-1'])
+def test_invalid_byte_ranges_are_ignored(server, byte_range):
+    response, body = request(server, EPISODE_PATH, Range=byte_range)
+
+    assert response.status == 200
+    assert body == EPISODE
+
+
+@pytest.mark.parametrize('path, byte_range', [
+    (EPISODE_PATH, f'bytes={len(EPISODE)}-'),
+    (EPISODE_PATH, 'bytes=-0'),
+    ('/podcast/episodes/episode-empty.mp3', 'bytes=-1'),
+])
+def test_unsatisfiable_byte_ranges_are_rejected(server, path, byte_range):
+    file_size = os.path.getsize(str(server.episode_directory / path.rpartition('/')[2]))
+    response, body = request(server, path, Range=byte_range)
+
+    assert response.status == 416
+    assert response.getheader('Content-Range') == f'bytes */{file_size}'
+    assert body == b''
+
+
+def test_ranges_of_changed_files_are_served_in_full(server):
+    etag = request(server, EPISODE_PATH)[0].getheader('ETag')
+
+    partial_response, _ = request(server, EPISODE_PATH, Range='bytes=0-3', If_Range=etag)
+    full_response, body = request(server, EPISODE_PATH, Range='bytes=0-3', If_Range='"outdated"')
+
+    assert partial_response.status == 206
+    assert full_response.status == 200
+    assert body == EPISODE
+
+
+def test_head_requests_have_no_body(server):
+    response, body = request(server, EPISODE_PATH, method='HEAD')
+
+    assert response.status == 200
+    assert response.getheader('Content-Length') == str(len(EPISODE))
+    assert body == b''
+
+
+@pytest.mark.parametrize('path', [
+    '/podcast/episodes/..%2Fsecret.txt',
+    '/podcast/episodes/%2E%2E',
+    '/podcast/episodes/..%5Csecret.txt',
+    '/podcast/episodes/missing.mp3',
+    '/podcast/missing.xml',
+])
+def test_unknown_paths_are_not_found(server, path):
+    response, body = request(server, path)
+
+    assert response.status == 404
+    assert body == b''
+
+
+def test_documents_keep_their_validators_while_their_bytes_do_not_change(tmp_path):
+    documents = [{'feed.xml': (FEED, 'text/xml')}]
+    server = OriginServer(
+        ('127.0.0.1', 0),
+        feed_path='podcast',
+        episode_path='podcast/episodes',
+        episode_directory=str(tmp_path),
+        render_documents=lambda: documents[-1],
+        is_feed_stale=lambda: True,
+    )
+
+    try:
+        document = server.find_document('feed.xml')
+        assert server.find_document('feed.xml') is document
+
+        documents.append({'feed.xml': (FEED.replace(b'Test', b'Changed'), 'text/xml')})
+        assert server.find_document('feed.xml').etag != document.etag
+    finally:
+        server.server_close()
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timezone
+
+from catalog import SyntheticCatalog
+from conftest import Show
+from drop_directory import DropDirectory
+
+
+def test_every_episode_of_a_batch_is_in_the_feed(show):
+    pycaster = show.build_pycaster()
+    entries = [show.build_entry(f'Episode {number}') for number in range(1, 6)]
+
+    pycaster._publish_episodes(entries)
+
+    # Newest first, which keeps the order of the manifest for clients that sort by publishing date
+    assert show.read_feed_titles() == [f'Episode {number}' for number in range(5, 0, -1)]
+
+
+def test_batches_are_appended_to_the_paged_feed(show):
+    pycaster = show.build_pycaster(feedPageSize=3)
+
+    pycaster._publish_episodes([show.build_entry(f'Episode {number}') for number in range(1, 3)])
+    pycaster._publish_episodes([show.build_entry(f'Episode {number}') for number in range(3, 8)])
+
+    assert show.read_feed_titles() == ['Episode 7', 'Episode 6', 'Episode 5']
+    assert show.read_feed_titles('feed-archive-2.xml') == ['Episode 6', 'Episode 5', 'Episode 4']
+    assert show.read_feed_titles('feed-archive-1.xml') == ['Episode 3', 'Episode 2', 'Episode 1']
+
+
+def test_backdated_episodes_are_inserted_into_the_archive_pages(show):
+    pycaster = show.build_pycaster(feedPageSize=3)
+    pycaster._publish_episodes([show.build_entry(f'Episode {number}') for number in range(2, 6)])
+
+    backfilled_entry = show.build_entry('Episode 1')
+    backfilled_entry.release = datetime(2020, 1, 6, 6, 0, tzinfo=timezone.utc)
+    pycaster._publish_episodes([backfilled_entry])
+
+    assert show.read_feed_titles('feed-archive-1.xml') == ['Episode 3', 'Episode 2', 'Episode 1']
+    assert show.read_feed_titles() == ['Episode 5', 'Episode 4', 'Episode 3']
+
+
+def test_release_rereads_the_bucket_changed_by_other_runs(show):
+    pycaster = show.build_pycaster(feedPageSize=3)
+    pycaster._publish_episodes([show.build_entry(f'Episode {number}') for number in range(1, 5)])
+
+    # Deleted by another run, which the daemon only notices by listing the bucket again
+    del show.stand_in.buckets[show.BUCKET][f'{show.FEED_PATH}/feed-archive-1.xml']
+    pycaster._release_due_episodes()
+
+    assert show.read_feed_titles('feed-archive-1.xml') == ['Episode 3', 'Episode 2', 'Episode 1']
+
+
+def test_watch_daemon_syncs_the_database_backed_up_by_other_runs(show, tmp_path):
+    daemon = show.build_pycaster()
+    daemon._publish_episodes([show.build_entry(f'Episode {number}') for number in range(1, 3)])
+
+    # Published by a batch on another host while the daemon was waiting for arrivals
+    (tmp_path / 'other-host').mkdir()
+    other_show = Show(show.stand_in, tmp_path / 'other-host')
+    other_show.build_pycaster()._publish_episodes([other_show.build_entry('Episode 3')])
+
+    (tmp_path / 'drop').mkdir()
+    SyntheticCatalog.write_mp3(tmp_path / 'drop' / 'episode-4.mp3', show.EPISODE_SIZE)
+    (tmp_path / 'drop' / 'episode-4.json').write_text(json.dumps({'title': 'Episode 4', 'description': 'Episode 4'}))
+    drop_directory = DropDirectory(tmp_path / 'drop', settle_seconds=0, poll_interval=1)
+
+    daemon._publish_arrivals(drop_directory, drop_directory.find_arrivals())
+
+    assert show.read_feed_titles() == ['Episode 4', 'Episode 3', 'Episode 2', 'Episode 1']
+
+
+def test_release_syncs_the_database_backed_up_by_other_runs(show, tmp_path):
+    daemon = show.build_pycaster()
+    daemon._publish_episodes([show.build_entry(f'Episode {number}') for number in range(1, 3)])
+
+    (tmp_path / 'other-host').mkdir()
+    other_show = Show(show.stand_in, tmp_path / 'other-host')
+    other_show.build_pycaster()._publish_episodes([other_show.build_entry('Episode 3')])
+
+    daemon._release_due_episodes()
+
+    assert show.read_feed_titles() == ['Episode 3', 'Episode 2', 'Episode 1']
@@ -0,0 +1,58 @@
+from publish_journal import PublishJournal
+
+FILE_URI = 'https://bucket.example.com/podcast/episodes/episode-1.mp3'
+
+
+def test_stages_are_resumed_by_another_run(tmp_path):
+    journal = PublishJournal(str(tmp_path))
+    journal.record(FILE_URI, PublishJournal.INGESTED_STAGE, restart=True, content_hash='abc', size=3)
+    journal.record(FILE_URI, PublishJournal.UPLOADED_STAGE, etag='"etag"')
+
+    state = PublishJournal(str(tmp_path)).load(FILE_URI)
+
+    assert state[PublishJournal.STAGES_KEY] == [PublishJournal.INGESTED_STAGE, PublishJournal.UPLOADED_STAGE]
+    assert state['content_hash'] == 'abc'
+    assert state['etag'] == '"etag"'
+
+
+def test_restarting_forgets_the_stages_of_the_earlier_run(tmp_path):
+    journal = PublishJournal(str(tmp_path))
+    journal.record(FILE_URI, PublishJournal.INGESTED_STAGE, content_hash='abc')
+    journal.record(FILE_URI, PublishJournal.UPLOADED_STAGE, etag='"etag"')
+    journal.record(FILE_URI, PublishJournal.INGESTED_STAGE, restart=True, content_hash='def')
+
+    state = PublishJournal(str(tmp_path)).load(FILE_URI)
+
+    assert state == {PublishJournal.STAGES_KEY: [PublishJournal.INGESTED_STAGE], 'content_hash': 'def'}
+
+
+def test_reverted_stages_are_no_longer_completed(tmp_path):
+    journal = PublishJournal(str(tmp_path))
+    journal.record(FILE_URI, PublishJournal.INSERTED_STAGE)
+    journal.revert(FILE_URI, PublishJournal.INSERTED_STAGE)
+
+    assert not PublishJournal(str(tmp_path)).has_completed(FILE_URI, PublishJournal.INSERTED_STAGE)
+
+
+def test_torn_state_is_cut_off(tmp_path):
+    journal = PublishJournal(str(tmp_path))
+    journal.record(FILE_URI, PublishJournal.INGESTED_STAGE, content_hash='abc')
+
+    journal_path, = tmp_path.glob(f'*{PublishJournal.JOURNAL_FILE_EXTENSION}')
+    with open(str(journal_path), 'ab') as journal_file:
+        journal_file.write(b'{"stages": ["ingested", "upl')
+
+    resumed_journal = PublishJournal(str(tmp_path))
+    assert resumed_journal.has_completed(FILE_URI, PublishJournal.INGESTED_STAGE)
+
+    resumed_journal.record(FILE_URI, PublishJournal.UPLOADED_STAGE, etag='"etag"')
+    assert PublishJournal(str(tmp_path)).has_completed(FILE_URI, PublishJournal.UPLOADED_STAGE)
+
+
+def test_completed_episodes_are_forgotten(tmp_path):
+    journal = PublishJournal(str(tmp_path))
+    journal.record(FILE_URI, PublishJournal.INGESTED_STAGE)
+    journal.complete([FILE_URI])
+
+    assert PublishJournal(str(tmp_path)).load(FILE_URI) == {}
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from publish_pipeline import PublishPipeline
+
+
+class RecordingStages:
+    def __init__(self, failing_entry=None):
+        self.failing_entry = failing_entry
+        self.failed = threading.Event()
+        self.uploaded = []
+        self.published = []
+        self.discarded = []
+
+    def ingest(self, entry):
+        if entry == self.failing_entry:
+            self.failed.set()
+            raise ValueError(f'The episode {entry} is broken')
+
+        if self.failing_entry is not None:
+            # Finishes only once the failure was handed to the event loop, so its upload is still pending then
+            self.failed.wait()
+            time.sleep(0.2)
+
+        return f'{entry}.media'
+
+    def upload(self, entry, media_file):
+        self.uploaded.append(entry)
+
+    def prepare(self, entries, media_files):
+        return list(zip(entries, media_files))
+
+    def discard(self, publication):
+        self.discarded.append(publication)
+
+    def publish(self, publication):
+        self.published.append(publication)
+
+    def build_pipeline(self, workers):
+        return PublishPipeline(
+            ingest=self.ingest,
+            upload=self.upload,
+            prepare=self.prepare,
+            discard=self.discard,
+            publish=self.publish,
+            workers=workers,
+        )
+
+
+def test_episodes_are_published_once_all_of_them_are_uploaded():
+    stages = RecordingStages()
+
+    stages.build_pipeline(workers=2).run(['a', 'b', 'c'])
+
+    assert sorted(stages.uploaded) == ['a', 'b', 'c']
+    assert stages.published == [[('a', 'a.media'), ('b', 'b.media'), ('c', 'c.media')]]
+
+
+def test_failing_ingest_cancels_the_pending_uploads():
+    stages = RecordingStages(failing_entry='b')
+
+    with pytest.raises(ValueError):
+        stages.build_pipeline(workers=2).run(['a', 'b'])
+
+    assert stages.uploaded == []
+    assert stages.published == []
+    assert stages.discarded == []
@@ -0,0 +1,62 @@
+from xml.etree import ElementTree
+
+import pytest
+
+from database import Database
+from metrics import Metrics
+from pycaster import Pycaster
+from show_network import ShowNetwork
+from uploader import Uploader
+
+SHOW_NAMES = ('news', 'sports', 'weather')
+
+
+@pytest.fixture
+def network_directory(show, tmp_path):
+    network_directory = tmp_path / 'shows'
+    network_directory.mkdir()
+
+    for number, name in enumerate(SHOW_NAMES, start=1):
+        show.write_config(
+            network_directory / f'{name}{ShowNetwork.CONFIG_FILE_EXTENSION}',
+            # The weather show is hosted with credentials of its own
+            accessKey='weather' if name == 'weather' else 'test',
+            databasePath=f'{name}/pycaster',
+            episodePath=f'{name}/episodes',
+            feedPath=name,
+        )
+
+        db = Database(str(network_directory / f'{name}.db'))
+        db.create_episode_database()
+        db.insert_new_episodes([show.build_episode(number)])
+
+    return network_directory
+
+
+def read_feed_titles(show, feed_path):
+    feed = show.stand_in.buckets[show.BUCKET][f'{feed_path}/feed.xml'].data
+    return [item.findtext('title') for item in ElementTree.fromstring(feed).iter('item')]
+
+
+def test_shows_with_the_same_credentials_share_a_client(show, network_directory, monkeypatch):
+    shared_clients = []
+    init_shared_client = Uploader.init_shared_client
+
+    def record_shared_client(**kwargs):
+        shared_clients.append((kwargs['access_key'], kwargs['max_pool_connections'], init_shared_client(**kwargs)))
+        return shared_clients[-1][2]
+
+    def refuse_to_init_client(*args):
+        raise AssertionError('A show created a client of its own')
+
+    monkeypatch.setattr(Uploader, 'init_shared_client', record_shared_client)
+    monkeypatch.setattr(Uploader, '_init_client', refuse_to_init_client)
+
+    Pycaster.republish_shows([str(network_directory)], workers=2, metrics=Metrics('network'))
+
+    # Two shows that may run at once, each with the default number of concurrent transfers
+    assert [(access_key, pool_size) for access_key, pool_size, _ in shared_clients] == [
+        ('test', 2 * Pycaster.DEFAULT_TRANSFER_CONCURRENCY),
+        ('weather', Pycaster.DEFAULT_TRANSFER_CONCURRENCY),
+    ]
+    assert [read_feed_titles(show, name) for name in SHOW_NAMES] == [['Episode 1'], ['Episode 2'], ['Episode 3']]
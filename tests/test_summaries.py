@@ -0,0 +1,30 @@
+from xml.etree import ElementTree
+
+from feed_cache import FeedFragmentCache
+
+ITUNES_SUMMARY_TAG = f'{{{FeedFragmentCache.NAMESPACES["itunes"]}}}summary'
+
+
+def read_summaries(show, file_name):
+    feed = show.stand_in.buckets[show.BUCKET][f'{show.FEED_PATH}/{file_name}'].data
+    return [item.findtext(ITUNES_SUMMARY_TAG) for item in ElementTree.fromstring(feed).iter('item')]
+
+
+def test_recomputed_summaries_reach_every_archive_page(show):
+    pycaster = show.build_pycaster(feedPageSize=3)
+    pycaster.db.insert_new_episodes([show.build_episode(number) for number in range(1, 8)])
+
+    # As if the summaries were converted by an older release
+    with pycaster.db.db:
+        pycaster.db.db.execute("UPDATE episodes SET itunes_summary = 'Outdated'")
+
+    pycaster.republish_episodes()
+    assert read_summaries(show, 'feed-archive-1.xml') == ['Outdated'] * 3
+
+    pycaster.recompute_itunes_summaries()
+
+    expected_summaries = [episode.itunes_summary for episode in pycaster.db.iterate_episodes(newest_first=True)]
+    assert all(summary != 'Outdated' for summary in expected_summaries)
+    assert read_summaries(show, 'feed.xml') == expected_summaries[:3]
+    assert read_summaries(show, 'feed-archive-2.xml') == expected_summaries[1:4]
+    assert read_summaries(show, 'feed-archive-1.xml') == expected_summaries[4:]
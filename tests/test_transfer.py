@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from boto3.s3.transfer import TransferConfig
+
+from conftest import Show
+from transfer import ResumableUpload
+from uploader import Uploader
+
+PART_SIZE = 16 * 1024
+PART_COUNT = 4
+KEY = f'{Show.EPISODE_PATH}/episode.mp3'
+
+
+class FailingClient:
+    """
+    Passes every request on to the client, but fails the upload of one part like a dropped connection would.
+    """
+
+    def __init__(self, client, failing_part_number):
+        self.client = client
+        self.failing_part_number = failing_part_number
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def upload_part(self, **kwargs):
+        if kwargs['PartNumber'] == self.failing_part_number:
+            raise ConnectionError(f"Lost the connection while sending part {kwargs['PartNumber']}")
+        return self.client.upload_part(**kwargs)
+
+
+@pytest.fixture
+def client(stand_in):
+    stand_in.create_bucket(Show.BUCKET)
+
+    return Uploader.init_session().client(
+        service_name='s3',
+        region_name='us-east-1',
+        endpoint_url=stand_in.endpoint_url,
+        aws_access_key_id='test',
+        aws_secret_access_key='test',
+    )
+
+
+@pytest.fixture
+def file_path(tmp_path):
+    file_path = tmp_path / 'episode.mp3'
+    file_path.write_bytes(b''.join(bytes([part_number]) * PART_SIZE for part_number in range(PART_COUNT)))
+
+    return file_path
+
+
+def build_upload(client, file_path, checkpoint_directory):
+    return ResumableUpload(
+        client=client,
+        file_path=file_path,
+        bucket=Show.BUCKET,
+        key=KEY,
+        extra_args={Uploader.CONTENT_TYPE_KEY: 'audio/mpeg'},
+        # A single thread sends the parts in order, so that the failing part does not cancel any other one
+        transfer_config=TransferConfig(multipart_chunksize=PART_SIZE, max_concurrency=1),
+        checkpoint_directory=checkpoint_directory,
+    )
+
+
+def fail_part(client, file_path, checkpoint_directory, part_number):
+    with pytest.raises(ConnectionError):
+        build_upload(FailingClient(client, part_number), file_path, checkpoint_directory).upload()
+
+
+def count_sent_parts(stand_in):
+    return stand_in.take_counters()['requests'].get('upload_part', 0)
+
+
+def test_checkpoint_records_the_parts_that_were_sent(client, file_path, tmp_path):
+    fail_part(client, file_path, tmp_path / 'uploads', part_number=3)
+
+    checkpoint_path, = (tmp_path / 'uploads').glob(f'*{ResumableUpload.CHECKPOINT_FILE_EXTENSION}')
+    checkpoint = json.loads(checkpoint_path.read_text())
+
+    assert checkpoint['key'] == KEY
+    assert sorted(checkpoint['parts']) == ['1', '2', '4']
+
+
+def test_rerun_only_sends_the_missing_parts(stand_in, client, file_path, tmp_path):
+    fail_part(client, file_path, tmp_path / 'uploads', part_number=3)
+    stand_in.take_counters()
+
+    build_upload(client, file_path, tmp_path / 'uploads').upload()
+
+    assert count_sent_parts(stand_in) == 1
+    assert stand_in.buckets[Show.BUCKET][KEY].data == file_path.read_bytes()
+    assert list((tmp_path / 'uploads').iterdir()) == []
+
+
+def test_parts_unknown_to_the_bucket_are_sent_again(stand_in, client, file_path, tmp_path):
+    fail_part(client, file_path, tmp_path / 'uploads', part_number=3)
+
+    # Lost by the storage provider, although the checkpoint lists it
+    multipart_upload, = stand_in.multipart_uploads.values()
+    del multipart_upload['parts'][2]
+    stand_in.take_counters()
+
+    build_upload(client, file_path, tmp_path / 'uploads').upload()
+
+    assert count_sent_parts(stand_in) == 2
+    assert stand_in.buckets[Show.BUCKET][KEY].data == file_path.read_bytes()
+
+
+def test_expired_uploads_are_started_over(stand_in, client, file_path, tmp_path):
+    fail_part(client, file_path, tmp_path / 'uploads', part_number=3)
+
+    stand_in.multipart_uploads.clear()
+    stand_in.take_counters()
+
+    build_upload(client, file_path, tmp_path / 'uploads').upload()
+
+    assert count_sent_parts(stand_in) == PART_COUNT
+    assert stand_in.buckets[Show.BUCKET][KEY].data == file_path.read_bytes()
+
+
+def test_parts_of_a_changed_file_are_sent_again(stand_in, client, file_path, tmp_path):
+    fail_part(client, file_path, tmp_path / 'uploads', part_number=3)
+
+    # Re-tagged in place, which only changes the first part
+    file_bytes = bytearray(file_path.read_bytes())
+    file_bytes[:3] = b'ID3'
+    file_path.write_bytes(bytes(file_bytes))
+    stand_in.take_counters()
+
+    build_upload(client, file_path, tmp_path / 'uploads').upload()
+
+    assert count_sent_parts(stand_in) == 2
+    assert stand_in.buckets[Show.BUCKET][KEY].data == file_path.read_bytes()
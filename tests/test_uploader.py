@@ -0,0 +1,56 @@
+import hashlib
+
+import pytest
+
+from uploader import Uploader
+
+
+def write_file(path, data):
+    path.write_bytes(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def upload(show, uploader, path, content_hash=None):
+    return uploader.upload_file_publicly(
+        file_location=str(path),
+        upload_path=show.EPISODE_PATH,
+        bucket=show.BUCKET,
+        content_hash=content_hash,
+    )
+
+
+def refuse_to_read(*args):
+    raise AssertionError('The file was read to calculate its ETag')
+
+
+def test_renamed_copies_are_found_by_their_content_hash(show, tmp_path, monkeypatch):
+    uploader = show.build_pycaster().uploader
+    original_path, content_hash = write_file(tmp_path / 'original.mp3', bytes(range(256)) * 64)
+    copy_path, _ = write_file(tmp_path / 'copy.mp3', original_path.read_bytes())
+    upload(show, uploader, original_path, content_hash)
+
+    # Listed again, as if another run had uploaded the original
+    uploader.refresh_index()
+    monkeypatch.setattr(Uploader, 'calculate_etag', refuse_to_read)
+
+    with pytest.raises(FileExistsError, match='original.mp3'):
+        upload(show, uploader, copy_path, content_hash)
+
+
+def test_files_of_the_same_size_are_told_apart_by_their_content_hash(show, tmp_path, monkeypatch):
+    uploader = show.build_pycaster().uploader
+    upload(show, uploader, *write_file(tmp_path / 'first.mp3', bytes(16 * 1024)))
+    uploader.refresh_index()
+    monkeypatch.setattr(Uploader, 'calculate_etag', refuse_to_read)
+
+    assert upload(show, uploader, *write_file(tmp_path / 'second.mp3', bytes([1]) * 16 * 1024))
+    assert f'{show.EPISODE_PATH}/second.mp3' in show.stand_in.buckets[show.BUCKET]
+
+
+def test_copies_of_files_without_a_content_hash_are_found_by_their_etag(show, tmp_path):
+    uploader = show.build_pycaster().uploader
+    copy_path, content_hash = write_file(tmp_path / 'copy.mp3', bytes(range(256)) * 64)
+    show.stand_in.put_object(show.BUCKET, f'{show.EPISODE_PATH}/original.mp3', copy_path.read_bytes(), 'audio/mpeg')
+
+    with pytest.raises(FileExistsError, match='original.mp3'):
+        upload(show, uploader, copy_path, content_hash)